@@ -0,0 +1,86 @@
+"""
+    Query latency benchmark for the SQLite transaction database: sections and sums worked out
+    by the database (transaction_database.DatabaseView) against loading the transactions and
+    working them out in pandas, and against pandas with everything already in memory.
+
+    Also reports how long the bulk insert takes and how big the database is.
+
+    usage (from the benchmarks directory):
+        python bench_database.py [--rows 1000000] [--accounts 3] [--repeats 5] [--directory /tmp]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER, apply_schema
+import transaction_database as database
+import data_view
+import rollups
+
+
+def time_call(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def get_queries(accounts: list) -> dict:
+    """the sections and sums to time, as functions of a view of every transaction"""
+    last_quarter = ("2023-10-01", "2023-12-31")
+    return {
+        "one account, one quarter: count": lambda view: len(
+            view.filter(data_view.account_in(accounts[:1])).between_dates(*last_quarter)),
+        "one account, one quarter: rows": lambda view: view.filter(
+            data_view.account_in(accounts[:1])).between_dates(*last_quarter).frame(),
+        "spends of one type: count": lambda view: len(
+            view.filter(data_view.type_in(["Eft-Pos"])).filter(data_view.spends_only())),
+        "one quarter: monthly totals by type": lambda view: rollups.get_cube(
+            view.between_dates(*last_quarter)).get("month", HEADER.SPEND_TYPE),
+        "everything: weekly totals by type": lambda view: rollups.get_cube(view).get("week", HEADER.SPEND_TYPE),
+    }
+
+
+def run(n_rows: int, n_accounts: int, repeats: int, directory: str):
+    data = make_transactions(n_rows)
+    accounts = [f"account {i}" for i in range(n_accounts)]
+    data[HEADER.ACCOUNT] = np.array(accounts)[np.random.default_rng(1).integers(0, n_accounts, n_rows)]
+    data = apply_schema(data.sort_values(HEADER.DATE, kind="stable", ignore_index=True))
+
+    filename = os.path.join(directory, f"history.{database.DATABASE_EXTENSION}")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(filename + suffix):
+            os.remove(filename + suffix)
+    start = time.perf_counter()
+    database.save_database(data, filename)
+    insert_seconds = time.perf_counter() - start
+    print(f"{n_rows} rows, {n_accounts} accounts")
+    print(f"insert: {insert_seconds:.2f} s ({n_rows / insert_seconds:,.0f} rows/s), "
+          f"{os.path.getsize(filename) / 2 ** 20:.1f} MB on disk")
+
+    with database.TransactionDatabase(filename) as transactions:
+        load_seconds = time_call(transactions.load, 1)
+        print(f"load everything: {load_seconds:.2f} s\n")
+        print(f"{'query':>38} {'sqlite':>10} {'load + pandas':>14} {'in memory':>10}")
+        for name, query in get_queries(accounts).items():
+            # fresh views each time, so that nothing is reused from the last repeat
+            sql = time_call(lambda: query(database.DatabaseView(transactions)), repeats)
+            memory = time_call(lambda: query(data_view.DataView(data.copy(deep=False))), repeats)
+            print(f"{name:>38} {sql * 1000:8.1f}ms {(load_seconds + memory) * 1000:12.1f}ms {memory * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--directory", default="/tmp")
+    args = parser.parse_args()
+    run(args.rows, args.accounts, args.repeats, args.directory)
@@ -0,0 +1,73 @@
+"""
+    Benchmark for trimming a large dataset by date: comparing every date against the bounds,
+    against binary searches over the sorted dates of a data_view.DataView. Both are also
+    timed after filtering to spends only, to check that date ranges compose with other filters.
+
+    usage (from the benchmarks directory):
+        python bench_date_range.py [--rows 20000000] [--repeats 20]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from transaction_structure import HEADER
+import data_view
+
+
+def make_data(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """just the date and amount columns, since those are all the filters look at"""
+    rng = np.random.default_rng(seed)
+    days = np.sort(rng.integers(0, 10 * 365, n_rows))
+    return pd.DataFrame({
+        HEADER.DATE: pd.Timestamp("2015-01-01") + pd.to_timedelta(days, unit="D"),
+        HEADER.QUANTITY: np.round(rng.normal(-20, 60, n_rows), 2),
+    })
+
+
+def time_call(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats
+
+
+def run(n_rows: int, repeats: int):
+    data = make_data(n_rows)
+    start_date, end_date = pd.Timestamp("2019-03-01"), pd.Timestamp("2019-06-30")
+    bounds = (np.datetime64(start_date), np.datetime64(end_date))
+
+    def masked(frame):
+        return frame.loc[(frame[HEADER.DATE] >= bounds[0]) & (frame[HEADER.DATE] <= bounds[1])]
+
+    view = data_view.DataView(data)
+    view.date_index
+    spends = view.filter(data_view.spends_only())
+    spends_frame = spends.frame()
+
+    # new views every time, so the cached children aren't what is being timed
+    results = [
+        ("mask, all rows", time_call(lambda: masked(data), repeats)),
+        ("searchsorted, all rows", time_call(
+            lambda: data_view.DataView(data, None, view.date_index).between_dates(start_date, end_date), repeats)),
+        ("mask, spends only", time_call(lambda: masked(spends_frame), repeats)),
+        ("searchsorted, spends only", time_call(
+            lambda: data_view.DataView(data, spends.rows, view.date_index).between_dates(start_date, end_date),
+            repeats)),
+    ]
+    print(f"{n_rows} rows, {len(view.between_dates(start_date, end_date))} in range")
+    for name, seconds in results:
+        print(f"{name:<28}{seconds * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeats)
@@ -0,0 +1,84 @@
+"""
+    Benchmark for the dedup index: how long it takes to import a statement that half overlaps
+    the history, for histories of different lengths. With the index on disk the time should stay
+    the same however long the history gets. Statements with nothing in common with the history
+    are timed too, which is where the Bloom filter helps.
+
+    usage (from the benchmarks directory):
+        python bench_dedup.py [--history 100000 1000000] [--statement 10000] [--directory /tmp]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import dedup_index
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def import_statement(filename: str, statement: pd.DataFrame, bloom: bool):
+    """opens the index from disk, adds a statement to it, and saves it, the way one ingest does"""
+    index = dedup_index.DedupIndex(filename, bloom=bloom)
+    is_new = index.add(statement)
+    index.save()
+    return int(is_new.sum()), index.lookups
+
+
+def run(history_sizes: list, statement_rows: int, directory: str):
+    print(f"{'history':>10} {'build':>8} {'bloom':>6} {'overlapping':>12} {'new only':>10} {'lookups':>8}")
+    for n_rows in history_sizes:
+        history = make_transactions(n_rows, n_merchants=2000, seed=0)
+        history[HEADER.ACCOUNT] = "cheque"
+        unrelated = make_transactions(statement_rows, n_merchants=2000, seed=1)
+        unrelated[HEADER.ACCOUNT] = "savings"
+        overlapping = pd.concat([history.iloc[-statement_rows // 2:], unrelated.iloc[:statement_rows // 2]],
+                                ignore_index=True)
+        for bloom in (False, True):
+            filename = os.path.join(directory, "history.index")
+            for name in (filename, filename + dedup_index.BLOOM_SUFFIX):
+                if os.path.exists(name):
+                    os.remove(name)
+            build, _ = time_call(import_statement, filename, history, bloom)
+            # each import is undone by copying the built index back, so every run starts from the same history
+            with open(filename, "rb") as file:
+                built = file.read()
+            bloom_built = None
+            if bloom:
+                with open(filename + dedup_index.BLOOM_SUFFIX, "rb") as file:
+                    bloom_built = file.read()
+
+            def restore():
+                with open(filename, "wb") as file:
+                    file.write(built)
+                if bloom_built is not None:
+                    with open(filename + dedup_index.BLOOM_SUFFIX, "wb") as file:
+                        file.write(bloom_built)
+
+            restore()
+            overlap_time, (added, _) = time_call(import_statement, filename, overlapping, bloom)
+            assert added == len(overlapping) - statement_rows // 2
+            restore()
+            new_time, (_, lookups) = time_call(import_statement, filename, unrelated, bloom)
+            print(f"{n_rows:>10} {build:7.2f}s {str(bloom):>6} {overlap_time * 1000:10.1f}ms "
+                  f"{new_time * 1000:8.1f}ms {lookups:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--statement", type=int, default=10_000)
+    parser.add_argument("--directory", default="/tmp")
+    args = parser.parse_args()
+    run(args.history, args.statement, args.directory)
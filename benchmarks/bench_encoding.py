@@ -0,0 +1,69 @@
+"""
+    Peak-memory report comparing the dense one-hot encoding (encode_data_for_learning)
+    with the sparse encoding (encode_data_sparse) that the clusterers now use.
+
+    Memory is measured with tracemalloc, which sees numpy, pandas and scipy allocations.
+    The dense figure includes converting the frame into the float matrix that k-means works on,
+    since that is where the memory actually blows up.
+
+    usage (from the benchmarks directory):
+        python bench_encoding.py [--rows 100000] [--merchants 500 2000 5000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import classification
+import clustering
+
+
+def dense_path(data):
+    return clustering.as_float_matrix(classification.encode_data_for_learning(data))
+
+
+def sparse_path(data):
+    encoded = classification.encode_data_sparse(data)
+    return encoded.one_hot(), encoded.prototype_matrix()
+
+
+def measure(function, data):
+    """returns the peak traced memory in MB and the run time of function(data)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(data)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return peak / 2 ** 20, elapsed
+
+
+def run(n_rows, merchant_counts, skip_dense_above):
+    print(f"{'rows':>9} {'merchants':>10} {'dense MB':>10} {'dense s':>8} {'sparse MB':>10} {'sparse s':>9} {'ratio':>7}")
+    for merchants in merchant_counts:
+        data = make_transactions(n_rows, n_merchants=merchants)
+        sparse_mb, sparse_time = measure(sparse_path, data)
+        if n_rows * merchants <= skip_dense_above:
+            dense_mb, dense_time = measure(dense_path, data)
+            dense_text = f"{dense_mb:10.1f} {dense_time:8.2f}"
+            ratio_text = f"{dense_mb / sparse_mb:6.1f}x"
+        else:
+            dense_text = f"{'skipped':>10} {'-':>8}"
+            ratio_text = f"{'-':>7}"
+        print(f"{n_rows:>9} {merchants:>10} {dense_text} {sparse_mb:10.1f} {sparse_time:9.2f} {ratio_text}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--merchants", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--skip-dense-above", type=int, default=10 ** 9,
+                        help="skip the dense path when rows * merchants is larger than this")
+    args = parser.parse_args()
+    run(args.rows, args.merchants, args.skip_dense_above)
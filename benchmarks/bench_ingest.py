@@ -0,0 +1,73 @@
+"""
+    Benchmark for streaming statement ingest: rows/second and peak RSS of ingest_statement,
+    compared with reading the whole file with pd.read_csv and format_data.
+
+    Each measurement runs in a fresh process so that peak RSS only reflects that reader.
+
+    usage (from the benchmarks directory):
+        python bench_ingest.py [--rows 2000000] [--chunk-rows 100000] [--directory /tmp]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import ingest
+
+GENERATE_CHUNK = 200_000
+
+
+def write_statement(filename: str, n_rows: int) -> None:
+    """writes an ANZ style csv export of n_rows transactions, a chunk at a time"""
+    with open(filename, "w") as file:
+        for i, start in enumerate(range(0, n_rows, GENERATE_CHUNK)):
+            chunk = make_transactions(min(GENERATE_CHUNK, n_rows - start), seed=i)
+            chunk[HEADER.DATE] = chunk[HEADER.DATE].dt.strftime(ingest.ANZ_DATE_FORMAT)
+            chunk.to_csv(file, index=False, header=(i == 0))
+
+
+def streaming(filename, store_filename, chunk_rows, results):
+    ingest.store.delete_store(store_filename)
+    report = ingest.ingest_statement(filename, store_filename, chunk_rows)
+    results.put(("streaming ingest", report.rows, report.seconds, report.peak_rss))
+
+
+def whole_file(filename, store_filename, chunk_rows, results):
+    import pandas as pd
+    import spending_tracker as tracker
+    start = time.perf_counter()
+    data = tracker.format_data(pd.read_csv(filename))
+    results.put(("read_csv + format_data", len(data), time.perf_counter() - start, ingest.get_peak_rss()))
+
+
+def run(n_rows: int, chunk_rows: int, directory: str):
+    filename = os.path.join(directory, f"statement-{n_rows}.csv")
+    if not os.path.exists(filename):
+        write_statement(filename, n_rows)
+    store_filename = os.path.join(directory, "ingested.parquet")
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    for target in (streaming, whole_file):
+        process = context.Process(target=target, args=(filename, store_filename, chunk_rows, results))
+        process.start()
+        name, rows, seconds, peak_rss = results.get()
+        process.join()
+        print(f"{name:>24}: {rows} rows, {seconds:7.2f} s, {rows / seconds:12,.0f} rows/s, "
+              f"peak RSS {peak_rss / 2 ** 20:7.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=ingest.CHUNK_ROWS)
+    parser.add_argument("--directory", default="/tmp")
+    args = parser.parse_args()
+    run(args.rows, args.chunk_rows, args.directory)
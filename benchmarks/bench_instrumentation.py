@@ -0,0 +1,75 @@
+"""
+    Benchmark for the instrumentation overhead: a traced call and a span with tracing off and on,
+    and a whole k-means fit with tracing and debug logging off and on. With everything off the fit
+    should take as long as it did before it was instrumented.
+
+    usage (from the benchmarks directory):
+        python bench_instrumentation.py [--rows 200000] [--k 8] [--calls 1000000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import logging
+import sys
+import time
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import instrumentation
+import classification as classifier
+import clustering
+
+
+def per_call(function, calls: int) -> float:
+    """returns how long one call of function takes, in nanoseconds"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def time_fit(matrix, k: int, repeats: int = 3) -> float:
+    """returns the fastest of a few k-means fits, in seconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        clustering.k_means(matrix, k, random_state=0, tol=0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(n_rows: int, k: int, calls: int):
+    plain = lambda: None
+    traced = instrumentation.traced("call")(plain)
+
+    def with_span():
+        with instrumentation.span("span"):
+            pass
+
+    print(f"{'':<24}{'plain':>10}{'traced':>10}{'span':>10}")
+    for tracing in (False, True):
+        if tracing:
+            instrumentation.start_tracing()
+        times = [per_call(function, calls) for function in (plain, traced, with_span)]
+        print(f"{'tracing ' + ('on' if tracing else 'off'):<24}" + "".join(f"{t:>8.0f}ns" for t in times))
+        instrumentation.stop_tracing()
+
+    matrix = classifier.encode_data_sparse(make_transactions(n_rows, n_merchants=2000, seed=0)).one_hot()
+    off = time_fit(matrix, k)
+    instrumentation.start_tracing()
+    traced_fit = time_fit(matrix, k)
+    iterations = sum(span.name == "k_means iteration" for span in instrumentation.stop_tracing().spans)
+    logging.basicConfig(level=logging.DEBUG, stream=open("/dev/null", "w"))
+    debug = time_fit(matrix, k)
+    print(f"k_means on {n_rows} rows, {iterations // 3} iterations: off {off:.3f}s, "
+          f"traced {traced_fit:.3f}s, debug logging {debug:.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows, args.k, args.calls)
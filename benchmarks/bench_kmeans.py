@@ -0,0 +1,83 @@
+"""
+    Benchmark comparing the vectorised k-means engine with the original
+    iterrows implementation of k_means_no_library.
+
+    The original implementation is far too slow to run to convergence on large inputs,
+    so both engines are timed per assignment pass (the part that dominates each iteration),
+    and the new engine is also timed for a full fit.
+
+    usage (from the benchmarks directory):
+        python bench_kmeans.py [--sizes 10000 100000 1000000] [--legacy-max-rows 10000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import contextlib
+import io
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import classification
+import clustering
+
+
+def legacy_assignment_pass(encoded_data, k_means: dict) -> float:
+    """one assignment pass of the original k_means_no_library loop, copied verbatim
+    (including the print, which was a large part of its cost)"""
+    error = 0
+    for id, data_point in encoded_data.iterrows():
+        min_distance = np.inf
+        current_closest = None
+        for vector in k_means.keys():
+            k_vector = np.array(vector)
+            new_dist = np.sum((k_vector - data_point) ** 2)
+            if new_dist < min_distance:
+                min_distance = new_dist
+                current_closest = vector
+            print(min_distance)
+        k_means[current_closest].append(data_point)
+        error += min_distance
+    return error
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run(sizes, k, legacy_max_rows):
+    print(f"{'rows':>10} {'legacy pass (s)':>16} {'new pass (s)':>13} {'speedup':>9} {'new fit (s)':>12}")
+    for n_rows in sizes:
+        encoded = classification.encode_data_for_learning(make_transactions(n_rows))
+        matrix = clustering.as_float_matrix(encoded)
+        rng = np.random.default_rng(0)
+        centroids = rng.random((k, matrix.shape[1]))
+
+        new_pass, _ = time_call(clustering.assign_to_centroids, matrix, centroids)
+        fit_time, (labels, fitted, inertia) = time_call(clustering.k_means, matrix, k, random_state=0)
+
+        if n_rows <= legacy_max_rows:
+            legacy_means = {tuple(row): [] for row in centroids}
+            with contextlib.redirect_stdout(io.StringIO()):
+                legacy_pass, _ = time_call(legacy_assignment_pass, encoded, legacy_means)
+            legacy_text = f"{legacy_pass:16.3f}"
+            speedup_text = f"{legacy_pass / new_pass:8.0f}x"
+        else:
+            legacy_text = f"{'skipped':>16}"
+            speedup_text = f"{'-':>9}"
+        print(f"{n_rows:>10} {legacy_text} {new_pass:13.4f} {speedup_text} {fit_time:12.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("-k", type=int, default=6)
+    parser.add_argument("--legacy-max-rows", type=int, default=10_000,
+                        help="largest input the original implementation is run on")
+    args = parser.parse_args()
+    run(args.sizes, args.k, args.legacy_max_rows)
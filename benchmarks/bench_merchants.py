@@ -0,0 +1,53 @@
+"""
+    Report on what merchant normalization saves: the number of categories (one-hot columns)
+    with and without it, and how long clustering takes on each. The Details column is made up
+    the way real statements look, with a store number and city after every merchant.
+
+    usage (from the benchmarks directory):
+        python bench_merchants.py [--rows 20000] [--merchants 200] [--stores 50] [--k 8]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import time
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import classification
+import clustering
+import merchants
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n_rows: int, n_merchants: int, n_stores: int, k: int):
+    data = make_transactions(n_rows, n_merchants=n_merchants, n_stores=n_stores)
+    print(f"{n_rows} rows, {n_merchants} merchants with {n_stores} store numbers each")
+    print(f"{'':<12}{'columns':>9}{'encode s':>10}{'k-means s':>11}{'k-prototypes s':>16}")
+    for name, normalize in (("raw", False), ("normalized", True)):
+        merchants.normalize_merchant.cache_clear()
+        encoded, encode_time = time_call(classification.encode_data_sparse, data, None, None, None, normalize)
+        one_hot = encoded.one_hot()
+        _, k_means_time = time_call(clustering.k_means, one_hot, k, 0)
+        _, prototypes_time = time_call(classification.fit_k_prototypes, encoded, k, None, 0)
+        print(f"{name:<12}{one_hot.shape[1]:>9}{encode_time:>10.2f}{k_means_time:>11.2f}{prototypes_time:>16.2f}")
+    # new statements mostly repeat merchants that have been seen before, which the memo already knows
+    _, again_time = time_call(classification.encode_data_sparse, data)
+    info = merchants.normalize_merchant.cache_info()
+    print(f"encoding again: {again_time:.2f} s, with {info.hits} of {info.hits + info.misses} names from the memo")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--merchants", type=int, default=200)
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+    run(args.rows, args.merchants, args.stores, args.k)
@@ -0,0 +1,71 @@
+"""
+    Benchmark for combining many overlapping account statements and cancelling the
+    transfers between them.
+
+    usage (from the benchmarks directory):
+        python bench_merge.py [--accounts 36] [--rows-per-account 50000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import statement_merge
+
+
+def make_accounts(n_accounts: int, rows_per_account: int, transfers: int, seed: int = 0) -> list:
+    """builds one statement per account, each split into two exports that overlap by a month,
+    with transfers between random pairs of accounts"""
+    rng = np.random.default_rng(seed)
+    accounts = []
+    for i in range(n_accounts):
+        data = make_transactions(rows_per_account, seed=i)
+        data[HEADER.ACCOUNT] = f"account {i}"
+        accounts.append(data)
+    for _ in range(transfers):
+        source, target = rng.choice(n_accounts, size=2, replace=False)
+        date = pd.Timestamp("2020-01-01") + pd.Timedelta(days=int(rng.integers(0, 4 * 365)))
+        amount = float(rng.integers(1, 100000)) / 100
+        row = accounts[source].iloc[:1].assign(**{HEADER.DATE: date, HEADER.QUANTITY: -amount})
+        accounts[source] = pd.concat([accounts[source], row], ignore_index=True)
+        row = accounts[target].iloc[:1].assign(**{HEADER.DATE: date + pd.Timedelta(days=1), HEADER.QUANTITY: amount})
+        accounts[target] = pd.concat([accounts[target], row], ignore_index=True)
+
+    exports = []
+    split = pd.Timestamp("2022-01-01")
+    for data in accounts:
+        exports.append(data[data[HEADER.DATE] < split + pd.Timedelta(days=30)])
+        exports.append(data[data[HEADER.DATE] >= split])
+    return exports
+
+
+def run(n_accounts: int, rows_per_account: int, transfers: int):
+    exports = make_accounts(n_accounts, rows_per_account, transfers)
+    total = sum(len(export) for export in exports)
+
+    start = time.perf_counter()
+    combined = statement_merge.remove_overlaps(exports)
+    overlap_time = time.perf_counter() - start
+    start = time.perf_counter()
+    matches = statement_merge.match_transfers(combined)
+    transfer_time = time.perf_counter() - start
+
+    print(f"{len(exports)} exports, {total} rows in, {len(combined)} after removing overlaps")
+    print(f"remove_overlaps: {overlap_time:.2f} s")
+    print(f"match_transfers: {transfer_time:.2f} s, {len(matches)} transfers matched ({transfers} planted)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, default=36)
+    parser.add_argument("--rows-per-account", type=int, default=50_000)
+    parser.add_argument("--transfers", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.accounts, args.rows_per_account, args.transfers)
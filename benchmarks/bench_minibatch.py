@@ -0,0 +1,83 @@
+"""
+    Benchmark for mini-batch k-prototypes: wall-clock time and cost of fit_mini_batch_model
+    streaming a csv export through ingest.read_statement_chunks, compared with fitting KPrototypes
+    on the whole file at once.
+
+    Both models are scored the same way: the mini-batch prototypes are translated into the
+    coding of the whole-file fit, and the cost is the total dissimilarity of every row to its
+    closest prototype with the whole-file gamma.
+
+    usage (from the benchmarks directory):
+        python bench_minibatch.py [--rows 20000] [--k 8] [--batch-rows 4096] [--chunk-rows 100000]
+                                  [--directory /tmp] [--skip-full]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, '../source')
+from bench_ingest import write_statement
+import classification
+import clustering
+import ingest
+
+
+def to_coding(model: classification.PrototypeModel, encoded: classification.EncodedData):
+    """returns model's prototypes in the coding of encoded"""
+    raw = model.numeric_centroids * model.numeric_range + model.numeric_min
+    numeric = (raw - encoded.numeric_min) / encoded.numeric_range
+    codes = np.empty(model.categorical_centroids.shape, dtype=encoded.codes.dtype)
+    for column, categories in enumerate(encoded.categories):
+        centroid_codes = model.categorical_centroids[:, column]
+        values = np.asarray(model.categories[column], dtype=object)[np.maximum(centroid_codes, 0)]
+        codes[:, column] = np.where(centroid_codes >= 0, categories.get_indexer(values), -1)
+    return numeric, codes
+
+
+def get_cost(encoded, numeric, codes, gamma) -> float:
+    return float(clustering.assign_to_prototypes(encoded.numeric, encoded.codes, numeric, codes, gamma)[1].sum())
+
+
+def run(n_rows: int, k: int, batch_rows: int, chunk_rows: int, directory: str, skip_full: bool):
+    filename = os.path.join(directory, f"statement-{n_rows}.csv")
+    if not os.path.exists(filename):
+        write_statement(filename, n_rows)
+
+    start = time.perf_counter()
+    model = classification.fit_mini_batch_model(ingest.read_statement_chunks(filename, chunk_rows), k,
+                                                batch_rows, random_state=0)
+    mini_batch_time = time.perf_counter() - start
+
+    encoded = classification.encode_data_sparse(ingest.read_statement(filename))
+    gamma = clustering.default_gamma(encoded.numeric)
+    print(f"{n_rows} rows, k = {k}")
+    print(f"{'':<14}{'seconds':>10}{'cost':>14}")
+    print(f"{'mini-batch':<14}{mini_batch_time:>10.2f}{get_cost(encoded, *to_coding(model, encoded), gamma):>14.1f}")
+    if skip_full:
+        return
+    start = time.perf_counter()
+    # the whole file has to be read and encoded before KPrototypes can start, so that is timed too
+    encoded = classification.encode_data_sparse(ingest.read_statement(filename))
+    k_proto = classification.fit_k_prototypes(encoded, k, random_state=0)
+    full_time = time.perf_counter() - start
+    centroids = k_proto.cluster_centroids_
+    n_numeric = len(classification.NUMERIC_COLUMNS)
+    print(f"{'KPrototypes':<14}{full_time:>10.2f}"
+          f"{get_cost(encoded, centroids[:, :n_numeric], centroids[:, n_numeric:].astype(encoded.codes.dtype), gamma):>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--batch-rows", type=int, default=classification.MINI_BATCH_ROWS)
+    parser.add_argument("--chunk-rows", type=int, default=ingest.CHUNK_ROWS)
+    parser.add_argument("--directory", default="/tmp")
+    parser.add_argument("--skip-full", action="store_true", help="only fit the mini-batch model, for files too big for KPrototypes")
+    args = parser.parse_args()
+    run(args.rows, args.k, args.batch_rows, args.chunk_rows, args.directory, args.skip_full)
@@ -0,0 +1,62 @@
+"""
+    Scaling benchmark for the parallel clustering engines: wall-clock time of k-means (on the
+    sparse one-hot encoding) and k-prototypes (on the category codes) with 1, 2, 4, 8 and 16
+    worker processes, next to the single process engines.
+
+    Every run uses the same seed, and the cost is printed so it can be seen to be identical for
+    every number of workers. Speedups are relative to 1 worker, and can't go past the number
+    of cores the machine has (printed at the top).
+
+    usage (from the benchmarks directory):
+        python bench_parallel.py [--rows 1000000] [--k 8] [--workers 1 2 4 8 16] [--max-iter 10]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import classification
+import clustering
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def run(n_rows: int, k: int, worker_counts: list, max_iter: int):
+    encoded = classification.encode_data_sparse(make_transactions(n_rows, n_merchants=200))
+    one_hot = encoded.one_hot()
+    print(f"{n_rows} rows, {one_hot.shape[1]} one-hot columns, k = {k}, {max_iter} iterations, "
+          f"{os.cpu_count()} cores")
+    engines = {
+        "k-means": lambda workers: clustering.k_means(one_hot, k, random_state=0, max_iter=max_iter,
+                                                      workers=workers)[2],
+        "k-prototypes": lambda workers: clustering.k_prototypes(encoded.numeric, encoded.codes, k, random_state=0,
+                                                                max_iter=max_iter, workers=workers)[3],
+    }
+    print(f"{'engine':<14}{'workers':>9}{'seconds':>10}{'speedup':>9}{'cost':>16}")
+    for name, engine in engines.items():
+        seconds, cost = time_call(engine, None)
+        print(f"{name:<14}{'-':>9}{seconds:>10.2f}{'':>9}{cost:>16.4f}")
+        baseline = None
+        for workers in worker_counts:
+            seconds, cost = time_call(engine, workers)
+            baseline = baseline or seconds
+            print(f"{name:<14}{workers:>9}{seconds:>10.2f}{baseline / seconds:>9.2f}{cost:>16.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--max-iter", type=int, default=10)
+    args = parser.parse_args()
+    run(args.rows, args.k, args.workers, args.max_iter)
@@ -0,0 +1,65 @@
+"""
+    Benchmark for plotting a long history: drawing every transaction, against drawing the
+    thinned out series the menu now uses, and against asking for a plot that has already
+    been drawn.
+
+    usage (from the benchmarks directory):
+        python bench_plotting.py [--rows 1000000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import tempfile
+import time
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import plotting
+
+
+def draw_every_point(data, filename: str):
+    figure = Figure(figsize=plotting.FIGURE_SIZE)
+    FigureCanvasAgg(figure)
+    figure.add_subplot().plot(data[HEADER.DATE].to_numpy(), data[HEADER.QUANTITY].to_numpy())
+    figure.savefig(filename)
+
+
+def run(n_rows: int):
+    data = make_transactions(n_rows).sort_values(HEADER.DATE, ignore_index=True)
+    with tempfile.TemporaryDirectory() as directory:
+        # import matplotlib's date handling first, so it isn't counted against whichever runs first
+        plotting.spending_by_time(data.head(10), plotting.Plotter(directory)).result()
+
+        start = time.perf_counter()
+        draw_every_point(data, directory + "/every_point.png")
+        every_point = time.perf_counter() - start
+
+        plotter = plotting.Plotter(directory)
+        start = time.perf_counter()
+        plot = plotting.spending_by_time(data, plotter)
+        returned = time.perf_counter() - start
+        plot.result()
+        thinned = time.perf_counter() - start
+
+        start = time.perf_counter()
+        plotting.spending_by_time(data, plotter).result()
+        cached = time.perf_counter() - start
+
+    print(f"{n_rows} transactions over {data[HEADER.DATE].dt.year.nunique()} years")
+    print(f"every point:              {every_point:.2f} s")
+    print(f"thinned out:              {thinned:.2f} s (menu waits {returned:.3f} s)")
+    print(f"already drawn:            {cached:.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    run(args.rows)
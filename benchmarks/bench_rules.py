@@ -0,0 +1,59 @@
+"""
+    Report on what the rules save: how many transactions are labelled by rules learnt from a
+    labelled history (the busiest merchants), how long applying them takes, and how long
+    k-prototypes takes on everything compared to only the transactions left over.
+
+    usage (from the benchmarks directory):
+        python bench_rules.py [--rows 20000] [--merchants 200] [--known 20] [--k 8]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import classification
+import merchants
+import rules
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(n_rows: int, n_merchants: int, n_known: int, k: int):
+    data = make_transactions(n_rows, n_merchants=n_merchants, n_stores=50)
+    with tempfile.TemporaryDirectory() as directory:
+        rule_set = rules.RuleSet(os.path.join(directory, "rules.json"))
+        # the merchants someone shops at most have been labelled before
+        busiest = merchants.normalize_column(data[HEADER.LOCATION]).value_counts().index[:n_known]
+        for merchant in busiest:
+            rule_set.add_merchant(merchant, "Known")
+        rule_set.add_keyword("RENT", "Housing")
+        labels, apply_time = time_call(rule_set.apply, data)
+    unknown = labels.isna().to_numpy()
+    print(f"{n_rows} rows, {n_merchants} merchants, rules for the busiest {n_known}")
+    print(f"rules labelled {n_rows - unknown.sum()} rows in {apply_time * 1000:.1f} ms")
+    print(f"{'':<12}{'rows':>9}{'k-prototypes s':>16}")
+    for name, rows in (("everything", data), ("left over", data[unknown])):
+        encoded = classification.encode_data_sparse(rows)
+        _, fit_time = time_call(classification.fit_k_prototypes, encoded, k, None, 0)
+        print(f"{name:<12}{len(rows):>9}{fit_time:>16.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--merchants", type=int, default=200)
+    parser.add_argument("--known", type=int, default=20)
+    parser.add_argument("--k", type=int, default=8)
+    args = parser.parse_args()
+    run(args.rows, args.merchants, args.known, args.k)
@@ -0,0 +1,65 @@
+"""
+    Benchmark for the typed transaction schema: resident memory of a statement as plain text and
+    float columns compared with after apply_schema, and how long the usual groupbys and filters
+    take on each. Also shows how far a float total drifts from the exact total in cents.
+
+    usage (from the benchmarks directory):
+        python bench_schema.py [--rows 1000000] [--merchants 2000] [--repeat 5]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER, apply_schema
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(n_rows: int, n_merchants: int, repeat: int):
+    plain = make_transactions(n_rows, n_merchants=n_merchants, n_stores=20).assign(**{HEADER.ACCOUNT: "cheque"})
+    # the way pd.read_csv hands back an export without any dtypes: text as objects, amounts as floats
+    plain = plain.astype({column: object for column in plain.columns
+                          if column not in (HEADER.QUANTITY, HEADER.DATE, HEADER.FOREIGN, HEADER.CONVERSION_COST)})
+    start = time.perf_counter()
+    typed = apply_schema(plain)
+    schema_time = time.perf_counter() - start
+    merchant = plain[HEADER.LOCATION].iloc[0]
+
+    print(f"{n_rows} rows, apply_schema took {schema_time:.2f} s")
+    print(f"{'':<10}{'MB':>9}{'groupby type s':>16}{'groupby merchant s':>20}{'filter s':>10}")
+    for name, data in (("plain", plain), ("typed", typed)):
+        memory = data.memory_usage(deep=True).sum() / 2 ** 20
+        by_type = best_time(lambda: data.groupby(HEADER.SPEND_TYPE, observed=True)[HEADER.QUANTITY].sum(), repeat)
+        by_merchant = best_time(lambda: data.groupby(HEADER.LOCATION, observed=True)[HEADER.QUANTITY].sum(), repeat)
+        filtered = best_time(lambda: data[data[HEADER.LOCATION] == merchant], repeat)
+        print(f"{name:<10}{memory:>9.1f}{by_type:>16.4f}{by_merchant:>20.4f}{filtered:>10.4f}")
+
+    # amounts with cents in them, added up pairwise (as numpy does) and one at a time (as a running balance does)
+    amounts = np.round(plain[HEADER.QUANTITY].to_numpy() + 0.01, 2)
+    pairwise_total = float(np.sum(amounts))
+    running_total = float(np.cumsum(amounts)[-1])
+    exact_total = int(typed[HEADER.QUANTITY].sum() + len(typed))
+    print(f"float totals {pairwise_total!r} and {running_total!r}, exact total {exact_total / 100:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--merchants", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.merchants, args.repeat)
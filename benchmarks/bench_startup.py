@@ -0,0 +1,56 @@
+"""
+    Benchmark for how long the program takes to start, using python's -X importtime. Shows
+    the cost of importing the user interface, then what each of the lazily imported
+    libraries costs the first time a menu option needs it.
+
+    usage (from the benchmarks directory):
+        python bench_startup.py [--top 15]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import subprocess
+import sys
+
+LAZY_LIBRARIES = ["matplotlib.pyplot", "classification", "kmodes.kprototypes", "pyarrow.parquet"]
+
+
+def get_import_times(statement: str) -> list:
+    """runs statement in a fresh interpreter from the source directory, returning
+    [(module, self microseconds, cumulative microseconds)] in import order. Modules imported by
+    other modules are indented under them, the same as -X importtime shows them"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                            cwd="../source", capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name[1:].rstrip(), int(self_time), int(cumulative)))
+    return times
+
+
+def run(top: int):
+    times = get_import_times("import user_interface")
+    total = sum(self_time for _, self_time, _ in times)
+    print(f"import user_interface: {total / 1000:.0f} ms over {len(times)} modules")
+    print("slowest modules imported by the user interface:")
+    # each level of imports is indented by two more spaces
+    direct = [entry for entry in times if entry[0].startswith("  ") and not entry[0].startswith("   ")]
+    for name, _, cumulative in sorted(direct, key=lambda entry: -entry[2])[:top]:
+        print(f"    {name.strip():<30}{cumulative / 1000:8.0f} ms")
+
+    print("first use of each lazily imported library, after the user interface:")
+    for library in LAZY_LIBRARIES:
+        # only what the library imports that the user interface hadn't already is counted under it
+        extra = get_import_times(f"import user_interface; import {library}")
+        cost = sum(cumulative for name, _, cumulative in extra if name == library)
+        print(f"    {library:<30}{cost / 1000:8.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    run(args.top)
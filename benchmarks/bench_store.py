@@ -0,0 +1,80 @@
+"""
+    Load-time benchmark for a multi-year history: csv and xlsx (read, then format_data)
+    against the columnar transaction store.
+
+    usage (from the benchmarks directory):
+        python bench_store.py [--rows 500000] [--directory /tmp]
+
+    xlsx is skipped when openpyxl isn't installed, and for very large inputs since
+    excel files are limited to about a million rows.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import os
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+from transaction_structure import HEADER
+import spending_tracker as tracker
+import transaction_store as store
+
+
+def time_call(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def write_files(data: pd.DataFrame, directory: str, with_xlsx: bool) -> dict:
+    """writes data out the way each format would hold it, returning the file names"""
+    exported = data.copy()
+    exported[HEADER.DATE] = exported[HEADER.DATE].dt.strftime("%d/%m/%Y")
+    files = {"csv": os.path.join(directory, "history.csv"),
+             "store": os.path.join(directory, f"history.{store.STORE_EXTENSION}")}
+    exported.to_csv(files["csv"], index=False)
+    store.save_store(data, files["store"])
+    if with_xlsx:
+        files["xlsx"] = os.path.join(directory, "history.xlsx")
+        exported.to_excel(files["xlsx"], index=False)
+    return files
+
+
+def run(n_rows: int, directory: str):
+    try:
+        import openpyxl
+        with_xlsx = n_rows <= 1_000_000
+    except ImportError:
+        with_xlsx = False
+
+    data = make_transactions(n_rows)
+    files = write_files(data, directory, with_xlsx)
+    last_year = data[HEADER.DATE].max() - pd.Timedelta(days=365)
+
+    results = [
+        ("csv + format_data", time_call(lambda: tracker.format_data(pd.read_csv(files["csv"])))[0]),
+        ("store", time_call(store.load_store, files["store"])[0]),
+        ("store, 2 columns", time_call(store.load_store, files["store"], columns=[HEADER.DATE, HEADER.QUANTITY])[0]),
+        ("store, last year only", time_call(store.load_store, files["store"], start_date=last_year)[0]),
+    ]
+    if with_xlsx:
+        results.insert(1, ("xlsx + format_data", time_call(lambda: tracker.format_data(pd.read_excel(files["xlsx"])))[0]))
+
+    print(f"{n_rows} rows")
+    for name, seconds in results:
+        print(f"{name:>24}: {seconds:8.3f} s")
+    for name, filename in files.items():
+        size = sum(os.path.getsize(part) for part in store.get_parts(filename))
+        print(f"{name:>24}: {size / 2 ** 20:8.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--directory", default="/tmp")
+    args = parser.parse_args()
+    run(args.rows, args.directory)
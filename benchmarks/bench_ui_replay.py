@@ -0,0 +1,46 @@
+"""
+    Benchmark for long interactive sessions: replays the same drill-down navigation (into a
+    section of the data, a section of that, and back out again) more and more times, timing
+    it and tracking memory. Memory should stay flat however long the session goes on.
+
+    usage (from the benchmarks directory):
+        python bench_ui_replay.py [--rows 1000000] [--cycles 10 100 1000]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_transactions
+import user_interface
+
+# options -> section -> spends only -> section -> date range -> back to the start
+DRILL_DOWN = ["6", "0", "6", "3", "01-01-2021", "31-12-2021", "q", "q", "q", "q"]
+
+
+def run(n_rows: int, cycles: list):
+    data = user_interface.tracker.format_data(make_transactions(n_rows))
+    print(f"{'cycles':>8}{'seconds':>10}{'peak MB':>10}")
+    for n_cycles in cycles:
+        tracemalloc.start()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            user_interface.replay(DRILL_DOWN * n_cycles + ["q!"], data)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{n_cycles:>8}{seconds:>10.2f}{peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cycles", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    run(args.rows, args.cycles)
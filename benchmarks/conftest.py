@@ -0,0 +1,46 @@
+"""
+    Settings for the pytest-benchmark suite in test_benchmark_suite.py.
+
+    Every benchmark is run once per statement size given with --sizes. Runs are saved to (and
+    compared with) the baselines directory next to this file, and a comparison fails any
+    benchmark that got more than REGRESSION_THRESHOLD slower, unless another limit is given
+    with --benchmark-compare-fail.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import os
+
+from pytest_benchmark.utils import parse_compare_fail
+
+BASELINE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_STORAGE = "file://./.benchmarks"
+REGRESSION_THRESHOLD = "median:25%"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                     help="the numbers of transactions to benchmark with")
+
+
+def pytest_configure(config):
+    # pytest-benchmark reads these options in its own pytest_configure, which runs after this one
+    if config.getoption("benchmark_storage", None) == DEFAULT_STORAGE:
+        config.option.benchmark_storage = "file://" + BASELINE_DIRECTORY
+    if config.getoption("benchmark_compare", None) and not config.getoption("benchmark_compare_fail", None):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+
+def get_size_name(n_rows: int) -> str:
+    """10000 -> 10k, 1000000 -> 1M"""
+    for unit, size in (("M", 1_000_000), ("k", 1_000)):
+        if n_rows >= size and n_rows % size == 0:
+            return f"{n_rows // size}{unit}"
+    return str(n_rows)
+
+
+def pytest_generate_tests(metafunc):
+    if "n_rows" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("sizes")
+        metafunc.parametrize("n_rows", sizes, ids=[get_size_name(size) for size in sizes], scope="session")
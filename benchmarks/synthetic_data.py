@@ -0,0 +1,235 @@
+"""
+    Helpers for building fake transaction data to benchmark against, since real
+    statements can't be checked into the repo.
+
+    make_transactions is a quick uniform mix of made up rows. make_statement is closer to a real
+    ANZ export: a few merchants get most of the purchases, each merchant has its own typical
+    amount, and there are fortnightly pay days, bank fees, foreign currency purchases and transfers
+    between accounts. write_statement saves either one the way ANZ exports it.
+
+    usage (from the benchmarks directory):
+        python synthetic_data.py statement.csv [--rows 100000] [--accounts cheque savings] [--seed 0]
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from transaction_structure import HEADER, to_display
+
+SPEND_TYPES = ["Eft-Pos", "Visa Purchase", "Direct Debit", "Automatic Payment",
+               "Bank Fee", "Transfer", "Salary", "Payment"]
+
+
+def get_merchant_name(number: int) -> str:
+    """a made up merchant name without any digits in it (which merchant normalization would strip)"""
+    letters = ""
+    while True:
+        letters = chr(ord("A") + number % 26) + letters
+        number = number // 26 - 1
+        if number < 0:
+            return f"MERCHANT {letters}"
+
+
+def make_transactions(n_rows: int, n_merchants: int = 40, seed: int = 0, n_stores: int = 0) -> pd.DataFrame:
+    """builds a dataframe of n_rows transactions with the same columns as an ANZ export.
+    With n_stores, each merchant's details also get one of n_stores store numbers and a city,
+    the way real statements show them"""
+    rng = np.random.default_rng(seed)
+    merchants = np.array([get_merchant_name(i) for i in range(n_merchants)], dtype=object)
+    particulars = np.array(["", "CARD 1234", "CARD 5678", "RENT", "POWER"], dtype=object)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 4 * 365, n_rows), unit="D")
+    details = merchants[rng.zipf(1.5, n_rows) % n_merchants]
+    if n_stores:
+        cities = np.array(["AUCKLAND", "WELLINGTON", "CHRISTCHURCH", "HAMILTON"], dtype=object)
+        stores = np.char.mod("%d", rng.integers(100, 100 + n_stores, n_rows)).astype(object)
+        details = details + " " + stores + " " + cities[rng.integers(0, len(cities), n_rows)]
+    return pd.DataFrame({
+        HEADER.SPEND_TYPE: rng.choice(SPEND_TYPES, n_rows),
+        HEADER.LOCATION: details,
+        HEADER.PARTICULARS: rng.choice(particulars, n_rows),
+        HEADER.CODE: rng.choice(["", "1234", "ABCD"], n_rows),
+        HEADER.REF: rng.choice(["", "REF1", "REF2"], n_rows),
+        HEADER.QUANTITY: np.round(-np.abs(rng.lognormal(3, 1, n_rows)), 2),
+        HEADER.DATE: dates,
+        HEADER.FOREIGN: np.nan,
+        HEADER.CONVERSION_COST: np.nan,
+    })
+
+
+# the types a purchase can be, and how likely each one is
+PURCHASE_TYPES = ["Eft-Pos", "Visa Purchase", "Direct Debit", "Automatic Payment"]
+PURCHASE_TYPE_WEIGHTS = [0.5, 0.35, 0.1, 0.05]
+CITIES = ["AUCKLAND", "WELLINGTON", "CHRISTCHURCH", "HAMILTON", "DUNEDIN"]
+# (currency, NZD per unit) for foreign currency purchases
+CURRENCIES = [("AUD", 1.08), ("USD", 1.65), ("GBP", 2.08), ("EUR", 1.78)]
+# the fee ANZ adds to a foreign currency purchase, as a share of its amount
+CONVERSION_RATE = 0.025
+ANZ_DATE_FORMAT = "%d/%m/%Y"
+
+
+def get_merchant_weights(n_merchants: int, skew: float) -> np.ndarray:
+    """returns how likely each merchant is to be the one a purchase is from: the n-th most popular
+    merchant is chosen in proportion to 1 / n ** skew, which is how spending spreads over shops"""
+    weights = 1 / np.arange(1, n_merchants + 1) ** skew
+    return weights / weights.sum()
+
+
+def make_statement(n_rows: int, seed: int = 0, start_date: str = "2020-01-01", days: int = 4 * 365,
+                   n_merchants: int = 500, merchant_skew: float = 1.1, n_stores: int = 0, accounts: list = None,
+                   transfer_share: float = 0.02, foreign_share: float = 0.03, fee_share: float = 0.01,
+                   pay_days: int = 14, pay: float = 2500.0) -> pd.DataFrame:
+    """builds n_rows transactions that look like an ANZ export, newest first like the real thing.
+
+    parameters:
+        n_rows: how many transactions there are in total
+        seed: the random seed, the same seed always gives the same statement
+        start_date, days: the dates the transactions are spread over
+        n_merchants: how many different merchants the purchases are from
+        merchant_skew: how much the purchases favour the most popular merchants (see get_merchant_weights)
+        n_stores: when given, each purchase also gets one of n_stores store numbers and a city in its details
+        accounts: the accounts the transactions are spread over, which are then given in an Account column.
+            Transfers go between these accounts, or out of the statement when there is only one
+        transfer_share, foreign_share, fee_share: roughly what share of the rows are transfers, foreign
+            currency purchases and bank fees
+        pay_days: how many days apart pay days are. Each account is paid every pay_days days
+        pay: how much each pay is, in dollars
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start_date)
+    account_names = list(accounts) if accounts else ["cheque"]
+    n_accounts = len(account_names)
+
+    # pay days and transfers come first, purchases fill up the rest of the rows
+    pay_offsets = np.arange(rng.integers(0, pay_days), days, pay_days)
+    n_pay = min(n_rows, len(pay_offsets) * n_accounts)
+    n_transfers = min((n_rows - n_pay) // 2, int(n_rows * transfer_share / 2))
+    n_fees = min(n_rows - n_pay - 2 * n_transfers, int(n_rows * fee_share))
+    n_purchases = n_rows - n_pay - 2 * n_transfers - n_fees
+
+    parts = []
+
+    pay_account = np.tile(np.arange(n_accounts), len(pay_offsets))[:n_pay]
+    parts.append(pd.DataFrame({
+        HEADER.SPEND_TYPE: "Salary",
+        HEADER.LOCATION: "WORK LTD",
+        HEADER.PARTICULARS: "SALARY",
+        HEADER.CODE: "",
+        HEADER.REF: "PAY",
+        HEADER.QUANTITY: np.round(pay * rng.normal(1, 0.02, n_pay), 2),
+        "day": np.repeat(pay_offsets, n_accounts)[:n_pay],
+        "account": pay_account,
+    }))
+
+    merchants = np.array([get_merchant_name(i) for i in range(n_merchants)], dtype=object)
+    # each merchant has its own typical amount, and is mostly paid by card
+    typical_amounts = rng.lognormal(3, 1, n_merchants)
+    merchant_types = rng.choice(PURCHASE_TYPES, n_merchants, p=PURCHASE_TYPE_WEIGHTS)
+    chosen = rng.choice(n_merchants, n_purchases, p=get_merchant_weights(n_merchants, merchant_skew))
+    details = merchants[chosen]
+    if n_stores:
+        stores = np.char.mod("%d", rng.integers(100, 100 + n_stores, n_purchases)).astype(object)
+        details = details + " " + stores + " " + np.array(CITIES, dtype=object)[rng.integers(0, len(CITIES), n_purchases)]
+    types = merchant_types[chosen]
+    amounts = -np.round(typical_amounts[chosen] * rng.lognormal(0, 0.4, n_purchases), 2)
+    card = np.isin(types, ["Eft-Pos", "Visa Purchase"])
+    purchases = pd.DataFrame({
+        HEADER.SPEND_TYPE: types,
+        HEADER.LOCATION: details,
+        HEADER.PARTICULARS: np.where(card, "CARD 4835", ""),
+        HEADER.CODE: np.where(card, "", "DD"),
+        HEADER.REF: "",
+        HEADER.QUANTITY: amounts,
+        "day": rng.integers(0, days, n_purchases),
+        "account": rng.integers(0, n_accounts, n_purchases),
+    })
+    # some of the card purchases were made overseas
+    foreign = card & (rng.random(n_purchases) < foreign_share / max(card.mean(), 1e-9))
+    currencies = rng.integers(0, len(CURRENCIES), n_purchases)
+    rates = np.array([rate for _, rate in CURRENCIES])[currencies]
+    purchases[HEADER.FOREIGN] = np.where(foreign, np.round(-amounts / rates, 2), np.nan)
+    purchases[HEADER.CONVERSION_COST] = np.where(foreign, np.round(-amounts * CONVERSION_RATE, 2), np.nan)
+    purchases.loc[foreign, HEADER.PARTICULARS] = np.array([name for name, _ in CURRENCIES], dtype=object)[currencies[foreign]]
+    parts.append(purchases)
+
+    parts.append(pd.DataFrame({
+        HEADER.SPEND_TYPE: "Bank Fee",
+        HEADER.LOCATION: "ANZ",
+        HEADER.PARTICULARS: rng.choice(["ACCOUNT FEE", "OVERSEAS FEE"], n_fees),
+        HEADER.CODE: "",
+        HEADER.REF: "",
+        HEADER.QUANTITY: rng.choice([-5.0, -2.5], n_fees),
+        "day": rng.integers(0, days, n_fees),
+        "account": rng.integers(0, n_accounts, n_fees),
+    }))
+
+    # transfers are taken out of one account and arrive in another up to a few days later
+    source = rng.integers(0, n_accounts, n_transfers)
+    target = (source + rng.integers(1, max(n_accounts, 2), n_transfers)) % max(n_accounts, 2)
+    out_day = rng.integers(0, days, n_transfers)
+    transfer_amounts = np.round(rng.lognormal(5, 1, n_transfers), 2)
+    names = np.array(account_names + ["SAVINGS"], dtype=object)
+    parts.append(pd.DataFrame({
+        HEADER.SPEND_TYPE: "Transfer",
+        HEADER.LOCATION: "TRANSFER TO " + names[target].astype(str).astype(object),
+        HEADER.PARTICULARS: "",
+        HEADER.CODE: "",
+        HEADER.REF: "TFR",
+        HEADER.QUANTITY: -transfer_amounts,
+        "day": out_day,
+        "account": source,
+    }))
+    if n_accounts > 1:
+        arrived = "TRANSFER FROM " + names[source].astype(str).astype(object)
+        account = target
+    else:
+        # with only one account the money left the statement, so the other half is another payment in
+        arrived = np.full(n_transfers, "REFUND", dtype=object)
+        account = source
+    parts.append(pd.DataFrame({
+        HEADER.SPEND_TYPE: "Transfer" if n_accounts > 1 else "Payment",
+        HEADER.LOCATION: arrived,
+        HEADER.PARTICULARS: "",
+        HEADER.CODE: "",
+        HEADER.REF: "TFR",
+        HEADER.QUANTITY: transfer_amounts if n_accounts > 1 else np.round(transfer_amounts / 10, 2),
+        "day": np.minimum(out_day + rng.integers(0, 3, n_transfers), days - 1),
+        "account": account,
+    }))
+
+    data = pd.concat(parts, ignore_index=True)
+    data = data.iloc[np.lexsort((rng.random(len(data)), -data["day"].to_numpy()))].reset_index(drop=True)
+    data[HEADER.DATE] = start + pd.to_timedelta(data.pop("day"), unit="D")
+    account = data.pop("account")
+    columns = [HEADER.SPEND_TYPE, HEADER.LOCATION, HEADER.PARTICULARS, HEADER.CODE, HEADER.REF,
+               HEADER.QUANTITY, HEADER.DATE, HEADER.FOREIGN, HEADER.CONVERSION_COST]
+    data = data[columns]
+    if accounts:
+        data[HEADER.ACCOUNT] = np.array(account_names, dtype=object)[account.to_numpy()]
+    return data
+
+
+def write_statement(data: pd.DataFrame, filename: str) -> None:
+    """saves transactions the way ANZ exports them: a csv file with dd/mm/yyyy dates and amounts in dollars"""
+    data = to_display(data)
+    data[HEADER.DATE] = data[HEADER.DATE].dt.strftime(ANZ_DATE_FORMAT)
+    data.to_csv(filename, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("filename", help="where to save the statement")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-date", default="2020-01-01")
+    parser.add_argument("--days", type=int, default=4 * 365)
+    parser.add_argument("--merchants", type=int, default=500)
+    parser.add_argument("--stores", type=int, default=0)
+    parser.add_argument("--accounts", nargs="+", help="spread the transactions over these accounts")
+    args = parser.parse_args()
+    write_statement(make_statement(args.rows, args.seed, args.start_date, args.days, args.merchants,
+                                   n_stores=args.stores, accounts=args.accounts), args.filename)
@@ -0,0 +1,152 @@
+"""
+    Benchmark suite for the whole pipeline, run on synthetic ANZ statements (see synthetic_data.make_statement)
+    of 10k, 100k and 1M transactions: loading and ingesting an export, format_data, both encodings, k-means,
+    both k-prototypes engines (KPrototypes only up to 10k), filtering and the rollups. The statements are made from a fixed seed, so every
+    run works on the same data.
+
+    usage (from the benchmarks directory):
+        python -m pytest test_benchmark_suite.py                                   run everything
+        python -m pytest test_benchmark_suite.py --sizes 10000 100000              only some sizes
+        python -m pytest test_benchmark_suite.py --benchmark-save=baseline         record a new baseline
+        python -m pytest test_benchmark_suite.py --benchmark-compare               compare with the last saved run,
+                                                                                   failing anything 25% slower
+
+    Baselines are kept in the baselines directory, in a folder for each platform and Python version.
+    Timings only mean something on the machine they were recorded on, so record a baseline before
+    starting on a change and compare against it once the change is made.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import os
+import sys
+import pytest
+import pandas as pd
+
+sys.path.insert(0, '../source')
+from synthetic_data import make_statement, write_statement
+import ingest
+import spending_tracker as tracker
+import classification as classifier
+import clustering
+import data_view
+import rollups
+
+ACCOUNTS = ["cheque", "savings"]
+CLUSTERS = 8
+# one-hot encoding into a dense frame takes gigabytes past this many rows
+DENSE_MAX_ROWS = 100_000
+# KPrototypes (the engine used below classification.PARALLEL_MIN_ROWS, or on one core) tries 10
+# initialisations, which takes tens of seconds at 10k rows and many minutes past it
+KMODES_MAX_ROWS = 10_000
+# small sizes get more rounds, so that every size takes about as long to measure
+ROUND_ROWS = 300_000
+MIN_ROUNDS = 3
+
+
+def run(benchmark, n_rows: int, function, *args, setup=None, rounds: int = None):
+    """benchmarks function(*args), or function(*setup()) when each round needs fresh arguments"""
+    if rounds is None:
+        rounds = max(MIN_ROUNDS, ROUND_ROWS // n_rows)
+    benchmark.group = f"{n_rows} transactions"
+    if setup is None:
+        return benchmark.pedantic(function, args, rounds=rounds, iterations=1, warmup_rounds=1)
+    return benchmark.pedantic(function, setup=lambda: (setup(), {}), rounds=rounds, warmup_rounds=1)
+
+
+@pytest.fixture(scope="session")
+def statement(n_rows):
+    return make_statement(n_rows, seed=0, accounts=ACCOUNTS)
+
+
+@pytest.fixture(scope="session")
+def statement_file(statement, n_rows, tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp("statements") / f"statement-{n_rows}.csv")
+    write_statement(statement, filename)
+    return filename
+
+
+@pytest.fixture(scope="session")
+def data(statement_file):
+    return tracker.format_data(ingest.load_statement(statement_file))
+
+
+@pytest.fixture(scope="session")
+def encoded(data):
+    return classifier.encode_data_sparse(data)
+
+
+class TestIngest:
+    """
+    class that runs the benchmarks for reading statements in
+    """
+    def test_load_statement(self, benchmark, n_rows, statement_file):
+        loaded = run(benchmark, n_rows, ingest.load_statement, statement_file)
+        assert len(loaded) == n_rows
+
+    def test_ingest_statement(self, benchmark, n_rows, statement_file, tmp_path):
+        store_filename = str(tmp_path / "transactions.parquet")
+
+        def setup():
+            ingest.store.delete_store(store_filename)
+            index_filename = store_filename + ingest.dedup_index.INDEX_SUFFIX
+            if os.path.exists(index_filename):
+                os.remove(index_filename)
+            return statement_file, store_filename
+
+        report = run(benchmark, n_rows, ingest.ingest_statement, setup=setup)
+        assert report.rows == n_rows
+
+    def test_format_data(self, benchmark, n_rows, statement_file):
+        raw = pd.read_csv(statement_file)
+        formatted = run(benchmark, n_rows, tracker.format_data, setup=lambda: (raw.copy(),))
+        assert formatted[tracker.HEADER.DATE].is_monotonic_increasing
+
+
+class TestClassification:
+    """
+    class that runs the benchmarks for encoding and clustering
+    """
+    def test_encode_sparse(self, benchmark, n_rows, data):
+        encoded = run(benchmark, n_rows, classifier.encode_data_sparse, data)
+        assert encoded.codes.shape[0] == n_rows
+
+    def test_encode_dense(self, benchmark, n_rows, data):
+        if n_rows > DENSE_MAX_ROWS:
+            pytest.skip(f"dense encoding is only benchmarked up to {DENSE_MAX_ROWS} rows")
+        encoded = run(benchmark, n_rows, classifier.encode_data_for_learning, data)
+        assert len(encoded) == n_rows
+
+    def test_k_means(self, benchmark, n_rows, encoded):
+        one_hot = encoded.one_hot()
+        labels, inertia = run(benchmark, n_rows, classifier.k_means_no_library, one_hot, CLUSTERS, 0)
+        assert len(set(labels)) == CLUSTERS
+
+    def test_k_prototypes(self, benchmark, n_rows, encoded):
+        labels, *_ = run(benchmark, n_rows, clustering.k_prototypes, encoded.numeric, encoded.codes, CLUSTERS, None, 0)
+        assert len(labels) == n_rows
+
+    def test_k_prototypes_kmodes(self, benchmark, n_rows, encoded):
+        # the default engine when there is no worker pool (see classification.get_cluster_workers)
+        if n_rows > KMODES_MAX_ROWS:
+            pytest.skip(f"KPrototypes is only benchmarked up to {KMODES_MAX_ROWS} rows")
+        model, clusters = run(benchmark, n_rows, classifier.fit_prototype_model, encoded, CLUSTERS, 0,
+                              rounds=MIN_ROUNDS)
+        assert len(clusters) == n_rows
+
+
+class TestAnalysis:
+    """
+    class that runs the benchmarks for sectioning and summarising the data
+    """
+    def test_filter(self, benchmark, n_rows, data):
+        def section():
+            view = data_view.DataView(data).filter(data_view.spends_only())
+            return view.between_dates(pd.Timestamp("2021-01-01"), pd.Timestamp("2021-12-31")).frame()
+
+        section_data = run(benchmark, n_rows, section)
+        assert 0 < len(section_data) < n_rows
+
+    def test_aggregate(self, benchmark, n_rows, data):
+        cube = run(benchmark, n_rows, rollups.RollupCube, data)
+        assert cube.rows == n_rows
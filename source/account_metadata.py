@@ -0,0 +1,243 @@
+"""
+    Module that keeps track of information about each bank account (number, name and a
+    known balance), and uses it to work out the balance of an account over time.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import copy
+import json
+import os
+import weakref
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, to_cents
+
+REGISTRY_FILE = "../data/accounts.json"
+
+# the balance index of each dataset, by id, see get_balance_index
+_balance_indexes = {}
+
+
+class AccountMetadata:
+    """
+    Information about one bank account.
+
+    Parameters:
+        account: the name the account's transactions are tagged with (see HEADER.ACCOUNT)
+        number: the bank account number
+        name: a friendly name for the account
+        anchor_balance: the balance of the account at the end of anchor_date
+        anchor_date: the date anchor_balance is known for
+    """
+
+    def __init__(self, account: str, number: str = "", name: str = "", anchor_balance: float = 0.0,
+                 anchor_date=None):
+        self.account = account
+        self.number = number
+        self.name = name
+        self.anchor_balance = anchor_balance
+        self.anchor_date = pd.Timestamp(anchor_date) if anchor_date is not None else None
+
+    def to_dict(self) -> dict:
+        return {
+            "account": self.account,
+            "number": self.number,
+            "name": self.name,
+            "anchor_balance": self.anchor_balance,
+            "anchor_date": self.anchor_date.isoformat() if self.anchor_date is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        return cls(values["account"], values.get("number", ""), values.get("name", ""),
+                   values.get("anchor_balance", 0.0), values.get("anchor_date"))
+
+
+class AccountRegistry:
+    """
+    The metadata for every known account, saved as a json file.
+    """
+
+    def __init__(self, filename: str = REGISTRY_FILE):
+        self.filename = filename
+        self.accounts = {}
+        if os.path.exists(filename):
+            with open(filename) as file:
+                for values in json.load(file):
+                    metadata = AccountMetadata.from_dict(values)
+                    self.accounts[metadata.account] = metadata
+
+    def get(self, account: str) -> AccountMetadata:
+        """returns the metadata for account, or None if nothing is known about it"""
+        return self.accounts.get(account)
+
+    def add(self, metadata: AccountMetadata) -> None:
+        """adds or replaces the metadata for an account"""
+        self.accounts[metadata.account] = metadata
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.filename, "w") as file:
+            json.dump([metadata.to_dict() for metadata in self.accounts.values()], file, indent=2)
+
+
+class _AccountBalances:
+    """the daily balance index for a single account. The daily totals and running balance are kept
+    in whole cents, so the running balance never drifts"""
+
+    def __init__(self, days: np.ndarray, net: np.ndarray, metadata: AccountMetadata):
+        self.days = days
+        self.net = net
+        self.metadata = metadata
+        self.running = np.cumsum(net)
+        self.offset = self._get_offset()
+
+    def _get_offset(self) -> float:
+        """the balance before the first transaction, worked out from the anchor balance"""
+        if self.metadata is None or self.metadata.anchor_date is None:
+            return 0.0
+        anchor_day = np.datetime64(self.metadata.anchor_date, "D")
+        position = np.searchsorted(self.days, anchor_day, side="right") - 1
+        running_at_anchor = self.running[position] / 100 if position >= 0 else 0.0
+        return self.metadata.anchor_balance - running_at_anchor
+
+    def balance_on(self, day: np.datetime64) -> float:
+        position = np.searchsorted(self.days, day, side="right") - 1
+        return self.offset + (self.running[position] / 100 if position >= 0 else 0.0)
+
+    def append(self, days: np.ndarray, net: np.ndarray) -> None:
+        """adds daily totals for new days. New days after the last known day just extend the running
+        total; anything earlier means the index has to be rebuilt from the combined daily totals"""
+        if len(days) == 0:
+            return
+        if len(self.days) == 0 or days[0] > self.days[-1]:
+            start = self.running[-1] if len(self.running) else 0
+            self.days = np.concatenate([self.days, days])
+            self.net = np.concatenate([self.net, net])
+            self.running = np.concatenate([self.running, start + np.cumsum(net)])
+        else:
+            combined = pd.Series(np.concatenate([self.net, net]), index=np.concatenate([self.days, days]))
+            combined = combined.groupby(level=0).sum()
+            self.days = combined.index.to_numpy()
+            self.net = combined.to_numpy()
+            self.running = np.cumsum(self.net)
+        self.offset = self._get_offset()
+
+
+class BalanceIndex:
+    """
+    The balance of each account at the end of every day, built with a single cumulative sum per
+    account. Balances on a given date are found with a binary search, so lookups don't need
+    to look at the transactions again.
+
+    Parameters:
+        data: transactions with an account column
+        registry: where the anchor balances come from. Accounts without one start at 0
+    """
+
+    def __init__(self, data: pd.DataFrame, registry: AccountRegistry = None):
+        self.registry = registry if registry is not None else AccountRegistry()
+        self.accounts = {}
+        self.rows = 0
+        self.append(data)
+
+    @staticmethod
+    def _daily_totals(data: pd.DataFrame) -> dict:
+        """returns {account: (sorted days, net amount in cents on each day)}"""
+        days = data[HEADER.DATE].to_numpy().astype("datetime64[D]")
+        totals = pd.Series(to_cents(data[HEADER.QUANTITY])).groupby(
+            [data[HEADER.ACCOUNT].astype(str).to_numpy(), days]).sum()
+        result = {}
+        for account, account_totals in totals.groupby(level=0):
+            result[account] = (account_totals.index.get_level_values(1).to_numpy().astype("datetime64[D]"),
+                               account_totals.to_numpy())
+        return result
+
+    def append(self, new_data: pd.DataFrame) -> None:
+        """adds newly imported transactions to the index"""
+        for account, (days, net) in self._daily_totals(new_data).items():
+            if account in self.accounts:
+                self.accounts[account].append(days, net)
+            else:
+                self.accounts[account] = _AccountBalances(days, net, self.registry.get(account))
+        self.rows += len(new_data)
+
+    def copy(self):
+        """returns a copy of the index that can be appended to without changing this one"""
+        index = BalanceIndex.__new__(BalanceIndex)
+        index.registry = self.registry
+        index.accounts = {account: copy.copy(balances) for account, balances in self.accounts.items()}
+        index.rows = self.rows
+        return index
+
+    def refresh_metadata(self) -> None:
+        """picks up changed anchor balances from the registry"""
+        for account, balances in self.accounts.items():
+            balances.metadata = self.registry.get(account)
+            balances.offset = balances._get_offset()
+
+    def balance_on(self, date, account: str = None) -> float:
+        """returns the balance at the end of date, for one account or (by default) all of them together"""
+        day = np.datetime64(pd.Timestamp(date), "D")
+        accounts = [account] if account is not None else list(self.accounts)
+        return float(sum(self.accounts[name].balance_on(day) for name in accounts))
+
+    def balance_series(self, start, end, account: str = None) -> pd.Series:
+        """returns the daily balance between start and end (inclusive), for one account or all of them"""
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq="D")
+        lookup = days.to_numpy().astype("datetime64[D]")
+        accounts = [account] if account is not None else list(self.accounts)
+        total = np.zeros(len(days))
+        for name in accounts:
+            balances = self.accounts[name]
+            positions = np.searchsorted(balances.days, lookup, side="right") - 1
+            running = np.where(positions >= 0, balances.running[np.maximum(positions, 0)] / 100, 0.0) \
+                if len(balances.running) else np.zeros(len(days))
+            total += balances.offset + running
+        return pd.Series(total, index=days, name="Balance")
+
+
+def get_balance_index(data: pd.DataFrame, registry: AccountRegistry = None) -> BalanceIndex:
+    """returns the balance index for a dataset, building it the first time it is asked for and again
+    if rows have been added since (in the same way as rollups.get_cube). The anchor balances are
+    read from the registry every time, so that changing one doesn't need the index to be rebuilt.
+
+    parameters:
+        registry: where the anchor balances come from, defaults to the one in ../data
+    """
+    registry = registry if registry is not None else AccountRegistry()
+    entry = _balance_indexes.get(id(data))
+    index = entry[1] if entry is not None and entry[0]() is data and entry[2] == len(data) else None
+    if index is None:
+        index = _register(data, BalanceIndex(data, registry))
+    else:
+        index.registry = registry
+        index.refresh_metadata()
+    return index
+
+
+def _register(data: pd.DataFrame, index: BalanceIndex) -> BalanceIndex:
+    """makes index the balance index of data, for as long as data is around and has the same number of rows"""
+    forget = lambda _, key=id(data): _balance_indexes.pop(key, None)
+    _balance_indexes[id(data)] = (weakref.ref(data, forget), index, len(data))
+    return index
+
+
+def append_to_balance_index(data: pd.DataFrame, new_data: pd.DataFrame, combined: pd.DataFrame,
+                            registry: AccountRegistry = None) -> BalanceIndex:
+    """registers a balance index for combined (which is data with new_data added on the end), made by
+    adding new_data to data's index rather than adding up every transaction again"""
+    index = get_balance_index(data, registry).copy()
+    index.append(new_data)
+    return _register(combined, index)
+
+
+def keep_balance_index(data: pd.DataFrame, cancelled: pd.DataFrame, registry: AccountRegistry = None) -> BalanceIndex:
+    """registers the balance index of data for cancelled, which is data with the transfers between
+    its accounts taken out (see statement_merge.cancel_transfers). A transfer still moved money out
+    of one account and into another, so the balances are those worked out from data"""
+    return _register(cancelled, get_balance_index(data, registry))
@@ -0,0 +1,234 @@
+"""
+    Headless entry point for running the whole pipeline without any prompts, so that it can be
+    run as a scheduled job over every account export:
+
+        ingest -> merge -> filter -> classify -> aggregate -> save
+
+    Options can be given on the command line or in a json job file (whose keys are the option
+    names, with underscores). Anything given on the command line overrides the job file.
+
+    usage (from the source directory):
+        python batch.py cheque.csv savings.csv --output combined --summary weekly.csv
+        python batch.py --job nightly.json
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from transaction_structure import HEADER, to_display
+import spending_tracker as tracker
+import classification as classifier
+import model_cache
+import transaction_store as store
+import transaction_database as database
+import ingest
+import statement_merge
+import rollups
+import data_view
+import rules as rule_engine
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class StageTimer:
+    """
+    Records how long each stage of the pipeline takes, and how many transactions came out of it.
+    """
+
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name: str, function, *args):
+        """runs function(*args) as the stage called name, returning its result"""
+        start = time.perf_counter()
+        with instrumentation.span("stage: " + name):
+            result = function(*args)
+        rows = len(result) if isinstance(result, (pd.DataFrame, list)) else None
+        self.stages.append((name, time.perf_counter() - start, rows))
+        return result
+
+    def report(self) -> str:
+        lines = [f"{'stage':<14}{'seconds':>10}{'rows':>12}"]
+        for name, seconds, rows in self.stages:
+            lines.append(f"{name:<14}{seconds:>10.2f}{rows if rows is not None else '':>12}")
+        lines.append(f"{'total':<14}{sum(stage[1] for stage in self.stages):>10.2f}")
+        return "\n".join(lines)
+
+
+def load_file(filename: str) -> pd.DataFrame:
+    return tracker.format_data(ingest.load_statement(filename))
+
+
+def load_files(filenames: list, workers: int = None) -> list:
+    """loads the statement files in separate processes, since parsing them is cpu bound"""
+    if len(filenames) == 1:
+        return [load_file(filenames[0])]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(load_file, filenames))
+
+
+def filter_data(data: pd.DataFrame, start_date=None, end_date=None, spends_only: bool = False,
+                types: list = None) -> pd.DataFrame:
+    """applies the same filters as the data partitioning menu"""
+    view = data_view.DataView(data)
+    if spends_only:
+        view = view.filter(data_view.spends_only())
+    if types:
+        view = view.filter(data_view.type_in(types))
+    if start_date is not None or end_date is not None:
+        first_date, last_date = view.date_span()
+        view = view.between_dates(start_date or first_date, end_date or last_date)
+    return view.frame().reset_index(drop=True)
+
+
+def classify(data: pd.DataFrame, model_key: str, cache: model_cache.ModelCache = None,
+             rules: rule_engine.RuleSet = None) -> pd.DataFrame:
+    """labels the data with a saved classification model. Unlike classify_new_transactions this
+    never prompts, so data that doesn't fit the model is still labelled (with a warning).
+    If rules are given, the rows they apply to are labelled by them and the model does the rest"""
+    if cache is None:
+        cache = model_cache.ModelCache()
+    model = cache.get(model_key)
+    if model is None:
+        raise ValueError(f"There is no saved classification model called '{model_key}'")
+    labels = rules.apply(data) if rules is not None else pd.Series(None, index=data.index, dtype=object)
+    unknown = labels.isna().to_numpy()
+    if unknown.any():
+        encoded = model.encode(data[unknown])
+        clusters, distances = model.predict(encoded)
+        if len(distances) and distances.mean() > classifier.DRIFT_THRESHOLD * model.mean_cost:
+            logger.warning("these transactions don't fit the classification model very well")
+        labels[unknown] = model.label(encoded).to_numpy()
+    data = data.copy()
+    data[rollups.CLASSIFICATION] = labels.to_numpy()
+    return data
+
+
+def summarise(data: pd.DataFrame, period: str, by: str = None) -> pd.DataFrame:
+    """returns the rollup table for period, as a flat table ready to save.
+    Raises a ValueError if the data has nothing to break the table down by"""
+    cube = rollups.get_cube(data)
+    if by is not None and not cube.has_dimension(by):
+        if by == rollups.CLASSIFICATION:
+            raise ValueError("the transactions haven't been classified, so the summary can't be broken down "
+                             "by classification. Give a --model to label them with")
+        raise ValueError(f"the transactions have no {by} to break the summary down by")
+    return cube.get(period, by).reset_index()
+
+
+def save(data: pd.DataFrame, filename: str) -> None:
+    """saves to a plain csv file if the name ends in .csv, to a database if it ends in .db,
+    and to the transaction store otherwise"""
+    if filename.endswith(".csv"):
+        to_display(data).to_csv(filename, index=False)
+    elif filename.endswith("." + database.DATABASE_EXTENSION):
+        database.save_database(data, filename)
+    else:
+        if not filename.endswith("." + store.STORE_EXTENSION):
+            filename += "." + store.STORE_EXTENSION
+        store.save_store(data, filename)
+
+
+def save_summary(table: pd.DataFrame, filename: str) -> None:
+    """saves a rollup table to a plain csv file if the name ends in .csv, and to a parquet file otherwise.
+    The table is saved as it is, since it has a column for each total rather than the transaction columns
+    that the transaction store and databases are made for"""
+    if filename.endswith("." + database.DATABASE_EXTENSION):
+        raise ValueError("a summary can't be saved to a database, only to a .csv or .parquet file")
+    if filename.endswith(".csv"):
+        table.to_csv(filename, index=False)
+    else:
+        if not filename.endswith("." + store.STORE_EXTENSION):
+            filename += "." + store.STORE_EXTENSION
+        table.to_parquet(filename, index=False)
+
+
+def run_pipeline(files: list, output: str = None, summary: str = None, period: str = "week", by: str = None,
+                 model: str = None, rules: str = None, start_date=None, end_date=None, spends_only: bool = False,
+                 types: list = None, cancel_transfers: bool = True,
+                 window_days: int = statement_merge.TRANSFER_WINDOW_DAYS, workers: int = None) -> StageTimer:
+    """runs every stage of the pipeline over files, returning the timings of each stage.
+    See the command line options for what each parameter does"""
+    timer = StageTimer()
+    frames = timer.run("ingest", load_files, files, workers)
+    data = timer.run("merge", statement_merge.merge_frames, frames, cancel_transfers, window_days)
+    data = timer.run("filter", filter_data, data, start_date, end_date, spends_only, types)
+    if model is not None:
+        data = timer.run("classify", classify, data, model, None,
+                         rule_engine.RuleSet(rules) if rules is not None else None)
+    if summary is not None:
+        table = timer.run("aggregate", summarise, data, period, by)
+        timer.run("save summary", save_summary, table, summary)
+    if output is not None:
+        timer.run("save", save, data, output)
+    return timer
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="statement files (csv, xlsx, store or database files)")
+    parser.add_argument("--job", help="a json file of options to use")
+    parser.add_argument("--output", help="where to save the combined transactions (.csv, .db for a database, otherwise a store file)")
+    parser.add_argument("--summary", help="where to save the rollup table (.csv, otherwise a .parquet file)")
+    parser.add_argument("--period", choices=rollups.PERIODS, default="week", help="the period to summarise by")
+    parser.add_argument("--by", choices=[HEADER.SPEND_TYPE, rollups.CLASSIFICATION],
+                        help="break the summary down by transaction type or classification")
+    parser.add_argument("--model", help="label the transactions with this saved classification model, "
+                                        f"such as '{model_cache.LATEST_MODEL_KEY}'")
+    parser.add_argument("--rules", help="label the transactions these rules apply to before using the model, "
+                                        f"such as '{rule_engine.RULES_FILE}'")
+    parser.add_argument("--start-date", help="only keep transactions from this date (yyyy-mm-dd)")
+    parser.add_argument("--end-date", help="only keep transactions up to this date (yyyy-mm-dd)")
+    parser.add_argument("--spends-only", action="store_true", help="only keep money going out")
+    parser.add_argument("--types", nargs="+", help="only keep these transaction types")
+    parser.add_argument("--keep-transfers", dest="cancel_transfers", action="store_false",
+                        help="don't cancel out transfers between the accounts")
+    parser.add_argument("--window-days", type=int, default=statement_merge.TRANSFER_WINDOW_DAYS,
+                        help="how many days apart the two halves of a transfer can be")
+    parser.add_argument("--workers", type=int, help="how many processes to load files with")
+    instrumentation.add_arguments(parser)
+    return parser
+
+
+def parse_arguments(arguments: list = None) -> argparse.Namespace:
+    """parses the command line, using the job file (if there is one) for anything not given"""
+    parser = get_parser()
+    options = parser.parse_args(arguments)
+    if options.job is not None:
+        with open(options.job) as file:
+            job = json.load(file)
+        unknown = set(job) - set(vars(options))
+        if unknown:
+            parser.error(f"unknown options in {options.job}: {', '.join(sorted(unknown))}")
+        parser.set_defaults(**job)
+        options = parser.parse_args(arguments)
+    if not options.files:
+        parser.error("no statement files were given")
+    if options.summary is not None and options.summary.endswith("." + database.DATABASE_EXTENSION):
+        parser.error("the summary can't be saved to a database, give a .csv or .parquet file")
+    return options
+
+
+def main(arguments: list = None) -> None:
+    options = parse_arguments(arguments)
+    instrumentation.start(options)
+    pipeline_options = {name: value for name, value in vars(options).items()
+                        if name not in ("job", "log_level", "trace", "profile")}
+    try:
+        timer = instrumentation.run_action("batch pipeline", run_pipeline, **pipeline_options)
+    except ValueError as error:
+        raise SystemExit(f"error: {error}")
+    finally:
+        instrumentation.finish(options)
+    print(timer.report())
+
+
+if __name__ == "__main__":
+    main()
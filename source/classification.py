@@ -4,12 +4,168 @@
     author: Ben Shirley
     Date: 29 oct 2023
 """
+from __future__ import annotations
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from kmodes.kprototypes import KPrototypes
+import scipy.sparse
 from transaction_structure import *
+from lazy_module import LazyModule
+import clustering
+import merchants
+import instrumentation
 
+# kmodes pulls in scikit-learn, so it and matplotlib are only imported once they are used
+plt = LazyModule("matplotlib.pyplot")
+kprototypes = LazyModule("kmodes.kprototypes")
+
+logger = logging.getLogger(__name__)
+
+# the columns used for learning when the data is encoded compactly
+NUMERIC_COLUMNS = [HEADER.QUANTITY]
+CATEGORICAL_COLUMNS = [HEADER.SPEND_TYPE, HEADER.LOCATION, HEADER.PARTICULARS]
+# the elbow search stops once adding a cluster improves the cost by less than this ratio
+ELBOW_COST_RATIO = 1.01
+# the largest number of clusters the elbow search will try by default
+ELBOW_MAX_K = 20
+# every fit in the elbow search starts from one set of centroids, warm-started or not, so that
+# the costs along the curve come from the same amount of searching and can be compared
+ELBOW_N_INIT = 1
+# bump this whenever encode_data_sparse changes, so that saved models stop being used
+ENCODING_SCHEMA_VERSION = 4
+# new transactions trigger a full refit when they fit the existing clusters this many times worse
+DRIFT_THRESHOLD = 2.0
+# how many rows the mini-batch fit moves the prototypes by at a time
+MINI_BATCH_ROWS = 4096
+# below this many rows, starting worker processes costs more than splitting the clustering up saves
+PARALLEL_MIN_ROWS = 200_000
+
+class EncodedData:
+    """
+    Compact encoding of a set of transactions for learning.
+
+    Attributes:
+        numeric: (rows x numeric columns) float array, min-max normalised
+        codes: (rows x categorical columns) int32 array of category codes, -1 where the value is missing
+        categories: for each categorical column, the values that the codes refer to
+        numeric_min, numeric_range: the values used to normalise the numeric columns
+    """
+
+    def __init__(self, numeric: np.ndarray, codes: np.ndarray, categories: list,
+                 numeric_min: np.ndarray, numeric_range: np.ndarray):
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+        self.numeric_min = numeric_min
+        self.numeric_range = numeric_range
+
+    def __len__(self):
+        return self.numeric.shape[0]
+
+    def one_hot(self) -> scipy.sparse.csr_matrix:
+        """returns the numeric columns followed by the one-hot encoded categories as a sparse matrix,
+        which is the same layout encode_data_for_learning produces but without ever building it densely"""
+        n_rows = len(self)
+        blocks = [scipy.sparse.csr_matrix(self.numeric)]
+        for column in range(self.codes.shape[1]):
+            column_codes = self.codes[:, column]
+            present = column_codes >= 0
+            block = scipy.sparse.csr_matrix((np.ones(present.sum()), (np.flatnonzero(present), column_codes[present])),
+                                      shape=(n_rows, len(self.categories[column])))
+            blocks.append(block)
+        return scipy.sparse.hstack(blocks, format="csr")
+
+    def rows(self, index) -> EncodedData:
+        """returns some of the rows (a slice or an index array), in the same coding"""
+        return EncodedData(self.numeric[index], self.codes[index], self.categories,
+                           self.numeric_min, self.numeric_range)
+
+    def prototype_matrix(self) -> np.ndarray:
+        """returns the numeric columns followed by the category codes, which is the layout
+        KPrototypes expects. the categorical columns are the ones after len(NUMERIC_COLUMNS)"""
+        return np.column_stack([self.numeric, self.codes])
+
+class PrototypeModel:
+    """
+    A fitted k-prototypes model, kept in the same coding as the EncodedData it was fitted on
+    so that it can be saved, reused and updated with new transactions without refitting.
+
+    Attributes:
+        numeric_centroids: (k x numeric columns) array of cluster means
+        categorical_centroids: (k x categorical columns) array of cluster modes, as category codes
+        gamma: the weight given to categorical mismatches
+        cost: the total cost of every row the model has seen
+        labels: mapping from cluster number to the label the user gave it
+        categories, numeric_min, numeric_range: the encoding the model was fitted with
+        counts: the number of rows assigned to each cluster so far
+        category_counts: for each categorical column, a (k x categories + 1) array counting how often
+            each category was assigned to each cluster. Column 0 counts missing values.
+    """
+
+    def __init__(self, numeric_centroids: np.ndarray, categorical_centroids: np.ndarray,
+                 gamma: float, cost: float, labels: dict = None, categories: list = None,
+                 numeric_min: np.ndarray = None, numeric_range: np.ndarray = None,
+                 counts: np.ndarray = None, category_counts: list = None):
+        self.numeric_centroids = numeric_centroids
+        self.categorical_centroids = categorical_centroids
+        self.gamma = gamma
+        self.cost = cost
+        self.labels = labels if labels is not None else {}
+        self.categories = categories
+        self.numeric_min = numeric_min
+        self.numeric_range = numeric_range
+        self.counts = counts
+        self.category_counts = category_counts
+
+    @property
+    def k(self) -> int:
+        return self.numeric_centroids.shape[0]
+
+    @property
+    def mean_cost(self) -> float:
+        """the average dissimilarity between a row and its prototype"""
+        return self.cost / max(int(self.counts.sum()), 1)
+
+    def encode(self, data: pd.DataFrame) -> EncodedData:
+        """encodes new rows in the same coding as the model. Categories the model hasn't seen
+        before are added to the end of its categories, so existing codes don't change"""
+        encoded = encode_data_sparse(data, self.categories, self.numeric_min, self.numeric_range)
+        self.categories = encoded.categories
+        for column, counts in enumerate(self.category_counts):
+            missing = len(self.categories[column]) + 1 - counts.shape[1]
+            if missing > 0:
+                self.category_counts[column] = np.pad(counts, ((0, 0), (0, missing)))
+        return encoded
+
+    def predict(self, encoded: EncodedData):
+        """returns the closest cluster to every row, and the dissimilarity to it"""
+        return clustering.assign_to_prototypes(encoded.numeric, encoded.codes, self.numeric_centroids,
+                                               self.categorical_centroids, self.gamma)
+
+    def label(self, encoded: EncodedData) -> pd.Series:
+        """returns the user's label for every row (or the cluster number if it has no label)"""
+        clusters = pd.Series(self.predict(encoded)[0])
+        return clusters.map(lambda cluster: self.labels.get(cluster, cluster))
+
+    def partial_fit(self, encoded: EncodedData, clusters: np.ndarray, distances: np.ndarray) -> None:
+        """moves the prototypes towards a batch of newly assigned rows. Each numeric centroid becomes the
+        running mean of every row assigned to it, and each categorical centroid the most common category"""
+        batch_counts = np.bincount(clusters, minlength=self.k)
+        self.counts = self.counts + batch_counts
+        sums = np.zeros(self.numeric_centroids.shape)
+        np.add.at(sums, clusters, encoded.numeric)
+        filled = batch_counts > 0
+        self.numeric_centroids[filled] += ((sums[filled] - batch_counts[filled, np.newaxis] * self.numeric_centroids[filled])
+                                           / self.counts[filled, np.newaxis])
+        for column, counts in enumerate(self.category_counts):
+            np.add.at(counts, (clusters, encoded.codes[:, column] + 1), 1)
+            self.categorical_centroids[filled, column] = counts[filled].argmax(axis=1) - 1
+        self.cost += float(distances.sum())
+
+@instrumentation.traced()
 def encode_data_for_learning(data: pd.DataFrame) -> pd.DataFrame:
     """prepares the given data for learning by normalising it, removing unwanted attributes, and one-hot encoding""" 
 
@@ -18,7 +174,9 @@ def encode_data_for_learning(data: pd.DataFrame) -> pd.DataFrame:
     foreign = data[HEADER.FOREIGN]
     conversion = data[HEADER.CONVERSION_COST]
 
-    chopped_data = data.drop([HEADER.DATE, HEADER.CODE, HEADER.FOREIGN, HEADER.CONVERSION_COST, HEADER.REF], axis=1, inplace=False)
+    chopped_data = data.drop([HEADER.DATE, HEADER.CODE, HEADER.FOREIGN, HEADER.CONVERSION_COST, HEADER.REF, HEADER.ACCOUNT],
+                             axis=1, inplace=False, errors="ignore")
+    chopped_data = merchants.normalize_merchants(chopped_data)
     #one-hot encoding:
     spending_types = chopped_data[HEADER.SPEND_TYPE].unique()
     locations = chopped_data[HEADER.LOCATION].unique()
@@ -28,29 +186,280 @@ def encode_data_for_learning(data: pd.DataFrame) -> pd.DataFrame:
     encoded_data[HEADER.QUANTITY] = (encoded_data[HEADER.QUANTITY] - encoded_data[HEADER.QUANTITY].min()) / (encoded_data[HEADER.QUANTITY].max()-encoded_data[HEADER.QUANTITY].min())
     
     return encoded_data
-def elbow_method_for_number_clusters(data) -> int:
-    k=1
-    old_cost = np.inf
-    new_cost = 1000
-    while old_cost / new_cost > 1.01:
-        old_cost = new_cost
-        new_data, new_cost = perform_k_prototypes_clustering(data, k)
-        k += 1
-    return k
+
+@instrumentation.traced()
+def encode_data_sparse(data: pd.DataFrame, categories: list = None, numeric_min: np.ndarray = None,
+                       numeric_range: np.ndarray = None, normalize: bool = True) -> EncodedData:
+    """prepares the given data for learning without one-hot encoding it into a dense frame.
+    Merchant names are normalized (see merchants.py), categories are turned into integer codes,
+    and the amount is normalised like in encode_data_for_learning
+
+    parameters:
+        data: the data to be encoded
+        categories, numeric_min, numeric_range: an existing encoding to follow, so that new data can be
+            compared with a model fitted earlier. Values missing from categories are added to the end.
+        normalize: whether to normalize the merchant names. Only turned off to measure what it saves
+    """
+    numeric = np.column_stack([to_dollars(data[column]) for column in NUMERIC_COLUMNS])
+    if numeric_min is None:
+        numeric_min = numeric.min(axis=0)
+        numeric_range = numeric.max(axis=0) - numeric_min
+        numeric_range[numeric_range == 0] = 1
+    numeric = (numeric - numeric_min) / numeric_range
+
+    codes = np.empty((len(data), len(CATEGORICAL_COLUMNS)), dtype=np.int32)
+    new_categories = []
+    for i, column in enumerate(CATEGORICAL_COLUMNS):
+        values = data[column]
+        if normalize and column in merchants.MERCHANT_COLUMNS:
+            values = merchants.normalize_column(values)
+        column_codes, uniques = pd.factorize(values, sort=True)
+        # categorical columns come back as a CategoricalIndex, but codes are matched up by value
+        uniques = pd.Index(np.asarray(uniques), dtype=object)
+        if categories is None:
+            known = uniques
+        else:
+            known = categories[i]
+            unseen = uniques[known.get_indexer(uniques) == -1]
+            known = known.append(unseen)
+            # translate the codes from this data's own numbering into the existing one
+            translation = np.append(known.get_indexer(uniques), -1)
+            column_codes = translation[column_codes]
+        codes[:, i] = column_codes
+        new_categories.append(known)
+    return EncodedData(numeric, codes, new_categories, numeric_min, numeric_range)
+
+def get_kmodes_verbosity() -> int:
+    """returns how much KPrototypes should print about each iteration: everything when this module
+    logs at DEBUG level, otherwise nothing"""
+    return 2 if logger.isEnabledFor(logging.DEBUG) else 0
+
+@instrumentation.traced()
+def fit_k_prototypes(encoded: EncodedData, k: int, init=None, random_state=None, verbose: int = None,
+                     n_init: int = None) -> kprototypes.KPrototypes:
+    """fits KPrototypes on data that has already been through encode_data_sparse.
+
+    parameters:
+        encoded: the encoded data
+        k: the number of clusters to be formed
+        init: optional (numeric centroids, categorical centroids) pair to start from, with the
+            categorical centroids given as codes in the same coding as encoded.codes
+        verbose: the KPrototypes verbosity, see get_kmodes_verbosity for the default
+        n_init: how many starting points to fit from, keeping the best. Defaults to KPrototypes'
+            own default, or to 1 when init is given
+    """
+    if verbose is None:
+        verbose = get_kmodes_verbosity()
+    matrix = encoded.prototype_matrix()
+    categorical = list(range(len(NUMERIC_COLUMNS), matrix.shape[1]))
+    if init is None:
+        options = {} if n_init is None else {"n_init": n_init}
+        k_proto = kprototypes.KPrototypes(n_clusters=k, init="Cao", verbose=verbose, random_state=random_state,
+                                          **options)
+    else:
+        numeric_init, categorical_init = init
+        # KPrototypes renumbers each categorical column by its sorted unique values,
+        # so the starting centroids have to be given in that numbering
+        categorical_init = np.column_stack([
+            np.searchsorted(np.unique(encoded.codes[:, column]), categorical_init[:, column])
+            for column in range(encoded.codes.shape[1])
+        ])
+        k_proto = kprototypes.KPrototypes(n_clusters=k, init=[numeric_init, categorical_init], n_init=1,
+                              verbose=verbose, random_state=random_state)
+    k_proto.fit(matrix, categorical=categorical)
+    return k_proto
+
+def get_cluster_workers(n_rows: int):
+    """returns how many processes to cluster n_rows with, or None to use a single process"""
+    workers = os.cpu_count() or 1
+    return workers if workers > 1 and n_rows >= PARALLEL_MIN_ROWS else None
+
+@instrumentation.traced()
+def fit_prototype_model(encoded: EncodedData, k: int, random_state=None, verbose: int = None, workers: int = None):
+    """fits k-prototypes on encoded data and keeps the result as a PrototypeModel.
+
+    parameters:
+        workers: when given, the fit is done by clustering.k_prototypes across this many processes
+            instead of by KPrototypes, which only uses one core
+
+    returns:
+        the model, and the cluster each row was assigned to
+    """
+    if workers is not None:
+        clusters, numeric_centroids, categorical_centroids, cost = clustering.k_prototypes(
+            encoded.numeric, encoded.codes, k, random_state=random_state, workers=workers)
+        gamma = clustering.default_gamma(encoded.numeric)
+    else:
+        k_proto = fit_k_prototypes(encoded, k, random_state=random_state, verbose=verbose)
+        centroids = k_proto.cluster_centroids_
+        n_numeric = len(NUMERIC_COLUMNS)
+        clusters = k_proto.labels_
+        if clusters is None:
+            # with no more distinct rows than clusters, kmodes uses the rows as the centroids and
+            # skips assigning them, so they are assigned here instead
+            matrix = encoded.prototype_matrix()
+            clusters = k_proto.predict(matrix, categorical=list(range(n_numeric, matrix.shape[1])))
+        numeric_centroids = centroids[:, :n_numeric]
+        categorical_centroids = centroids[:, n_numeric:].astype(encoded.codes.dtype)
+        gamma, cost = k_proto.gamma, k_proto.cost_
+    fitted_k = numeric_centroids.shape[0]
+    category_counts = []
+    for column in range(encoded.codes.shape[1]):
+        counts = np.zeros((fitted_k, len(encoded.categories[column]) + 1), dtype=np.int64)
+        np.add.at(counts, (clusters, encoded.codes[:, column] + 1), 1)
+        category_counts.append(counts)
+    model = PrototypeModel(numeric_centroids, categorical_centroids, gamma, cost, categories=encoded.categories,
+                           numeric_min=encoded.numeric_min, numeric_range=encoded.numeric_range,
+                           counts=np.bincount(clusters, minlength=fitted_k), category_counts=category_counts)
+    return model, clusters
+
+def _fit_for_elbow(encoded: EncodedData, k: int, init, random_state):
+    """fits a single value of k for the elbow search. Lives at module level so it can be sent to a process pool"""
+    k_proto = fit_k_prototypes(encoded, k, init, random_state, n_init=ELBOW_N_INIT)
+    centroids = k_proto.cluster_centroids_
+    n_numeric = len(NUMERIC_COLUMNS)
+    return k, k_proto.cost_, (centroids[:, :n_numeric], centroids[:, n_numeric:].astype(encoded.codes.dtype))
+
+def classify_incrementally(model: PrototypeModel, new_data: pd.DataFrame, drift_threshold: float = DRIFT_THRESHOLD):
+    """classifies newly imported transactions against an existing model instead of re-clustering everything.
+
+    Each new row is assigned to its closest prototype and given that prototype's label, then the
+    prototypes are nudged towards the new rows. If the new rows fit the model much worse than the
+    rows it was fitted on (their average dissimilarity is more than drift_threshold times the model's),
+    the model is left alone so the caller can refit from scratch.
+
+    returns:
+        the labels for the new rows, and whether the data has drifted too far for the model
+    """
+    encoded = model.encode(new_data)
+    clusters, distances = model.predict(encoded)
+    labels = pd.Series(clusters, index=new_data.index).map(lambda cluster: model.labels.get(cluster, cluster))
+    if len(distances) == 0:
+        return labels, False
+    drifted = distances.mean() > drift_threshold * model.mean_cost
+    if not drifted:
+        model.partial_fit(encoded, clusters, distances)
+    return labels, drifted
+
+def fit_mini_batch_model(chunks, k: int, batch_rows: int = MINI_BATCH_ROWS, random_state=None) -> PrototypeModel:
+    """fits k-prototypes one mini-batch at a time, so the transactions never have to be in memory
+    all at once and each row is only looked at once.
+
+    The prototypes are seeded k-means++ style from the first chunk, which also fixes the numeric
+    scaling and gamma. After that every batch is assigned to its closest prototypes, and each numeric
+    centroid moves to the running mean of the rows assigned to it so far while each categorical centroid
+    becomes the most common category in its running counts (PrototypeModel.partial_fit). Categories first
+    seen in later chunks are added to the end of the encoding.
+
+    parameters:
+        chunks: an iterable of transaction frames, such as ingest.read_statement_chunks(filename)
+        k: the number of clusters to be formed
+        batch_rows: the number of rows in each mini-batch
+
+    returns:
+        the fitted model. Its cost is the sum of each row's dissimilarity at the time it was assigned
+    """
+    rng = np.random.default_rng(random_state)
+    model = None
+    for chunk in chunks:
+        if model is None:
+            encoded = encode_data_sparse(chunk)
+            gamma = clustering.default_gamma(encoded.numeric)
+            numeric_centroids, categorical_centroids = clustering.extend_prototypes(
+                encoded.numeric, encoded.codes, np.empty((0, encoded.numeric.shape[1])),
+                np.empty((0, encoded.codes.shape[1]), dtype=encoded.codes.dtype), k, gamma, rng)
+            model = PrototypeModel(numeric_centroids, categorical_centroids.astype(encoded.codes.dtype), gamma, 0.0,
+                                   categories=encoded.categories, numeric_min=encoded.numeric_min,
+                                   numeric_range=encoded.numeric_range, counts=np.zeros(k, dtype=np.int64),
+                                   category_counts=[np.zeros((k, len(values) + 1), dtype=np.int64)
+                                                    for values in encoded.categories])
+        else:
+            encoded = model.encode(chunk)
+        for start in range(0, len(encoded), batch_rows):
+            batch = encoded.rows(slice(start, start + batch_rows))
+            clusters, distances = model.predict(batch)
+            model.partial_fit(batch, clusters, distances)
+    if model is None:
+        raise ValueError("There are no transactions to cluster")
+    return model
+
+def elbow_reached(costs: list) -> bool:
+    """the elbow is reached once adding a cluster improves the cost by less than ELBOW_COST_RATIO"""
+    if len(costs) < 2:
+        return False
+    return costs[-1] == 0 or costs[-2] / costs[-1] <= ELBOW_COST_RATIO
+
+def elbow_cost_curve(data: pd.DataFrame, max_k: int = None, workers: int = None,
+                     warm_start: bool = True, random_state=None) -> list:
+    """works out the k-prototypes cost for k = 1, 2, 3... until the elbow is reached.
+
+    The data is only encoded once. Candidate values of k are fitted in waves of `workers`
+    at a time in a process pool, and each wave is warm-started from the centroids of the largest
+    k fitted so far, extended with k-means++ style seeds. With workers=1 every k starts from
+    the previous k's centroids. The fits that start from scratch are given the same single
+    starting point as the warm-started ones (see ELBOW_N_INIT).
+
+    parameters:
+        data: the data to be clustered
+        max_k: the largest k to try, defaults to ELBOW_MAX_K
+        workers: the number of processes to use, defaults to the number of cpus
+        warm_start: whether to start each fit from the previous centroids instead of from scratch
+
+    returns:
+        the list of costs, where costs[i] is the cost for k = i + 1
+    """
+    encoded = encode_data_sparse(data)
+    if max_k is None:
+        max_k = ELBOW_MAX_K
+    max_k = min(max_k, len(encoded))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    rng = np.random.default_rng(random_state)
+    gamma = clustering.default_gamma(encoded.numeric)
+
+    costs = []
+    previous = None
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        k = 1
+        while k <= max_k:
+            wave = list(range(k, min(k + workers, max_k + 1)))
+            if warm_start and previous is not None:
+                numeric_init, categorical_init = clustering.extend_prototypes(
+                    encoded.numeric, encoded.codes, previous[0], previous[1], wave[-1], gamma, rng)
+                inits = [(numeric_init[:wave_k], categorical_init[:wave_k]) for wave_k in wave]
+            else:
+                inits = [None] * len(wave)
+
+            if executor is None:
+                results = [_fit_for_elbow(encoded, wave_k, init, random_state) for wave_k, init in zip(wave, inits)]
+            else:
+                results = list(executor.map(_fit_for_elbow, repeat(encoded), wave, inits, repeat(random_state)))
+
+            for wave_k, cost, centroids in results:
+                costs.append(cost)
+                if elbow_reached(costs):
+                    return costs
+            previous = results[-1][2]
+            k += len(wave)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return costs
+
+def elbow_method_for_number_clusters(data, workers: int = None) -> int:
+    """finds the number of clusters to use with the elbow method: the last k for which
+    adding a cluster still improved the cost by more than 1%"""
+    costs = elbow_cost_curve(data, workers=workers)
+    if elbow_reached(costs) and costs[-1] != 0:
+        return len(costs) - 1
+    return len(costs)
     
 
-def elbow_method_for_number_clusters_with_graph(data):
+def elbow_method_for_number_clusters_with_graph(data, workers: int = None):
     """graphs the overall cost of the k-prototype clustering varying values of k to 
     see which number of clusters fits the data best"""
-    cost_values = []
-    k=1
-    old_cost = np.inf
-    new_cost = 1000
-    while old_cost / new_cost > 1.01:
-        old_cost = new_cost
-        new_data, new_cost = perform_k_prototypes_clustering(data, k)
-        cost_values.append(new_cost)
-        k += 1
+    cost_values = elbow_cost_curve(data, workers=workers)
     plt.figure(figsize=(8, 6))
     plt.plot(range(1, len(cost_values)+1), cost_values, marker='o', linestyle='--', color='b')
     plt.xlabel('Number of Clusters (k)')
@@ -59,80 +468,62 @@ def elbow_method_for_number_clusters_with_graph(data):
     plt.grid(True)
     plt.show()
 
-def perform_k_prototypes_clustering(data: pd.DataFrame, k:int) -> pd.DataFrame:
+@instrumentation.traced()
+def perform_k_prototypes_clustering(data: pd.DataFrame, k:int, sparse: bool = True) -> pd.DataFrame:
     """performs k-prototypes clustering, which is a combination of k-means for the numerical data, and
     k-modes for the catagorical data
+
+    parameters:
+        sparse: when set, each categorical column is passed as a single column of integer codes
+            rather than as thousands of one-hot columns
     """
-    encoded_data = encode_data_for_learning(data)
-    # currently the only numerical data is the amount
-    k_proto = KPrototypes(n_clusters=k, init="Cao", verbose=2)
+    if sparse:
+        encoded = encode_data_sparse(data)
+        encoded_data = encoded.prototype_matrix()
+        categorical = list(range(len(NUMERIC_COLUMNS), encoded_data.shape[1]))
+    else:
+        encoded_data = encode_data_for_learning(data)
+        # currently the only numerical data is the amount
+        categorical = list(range(1, len(encoded_data.columns)))
+    k_proto = kprototypes.KPrototypes(n_clusters=k, init="Cao", verbose=get_kmodes_verbosity())
 
-    clusters = k_proto.fit_predict(encoded_data, categorical=list(range(1, len(encoded_data.columns))))
+    clusters = k_proto.fit_predict(encoded_data, categorical=categorical)
     data["classification"] = clusters
     return data, k_proto.cost_
 
-def perform_k_means_clustering(data: pd.DataFrame, k: int) -> pd.DataFrame:
+@instrumentation.traced()
+def perform_k_means_clustering(data: pd.DataFrame, k: int, random_state=None, sparse: bool = True,
+                               workers: int = None) -> pd.DataFrame:
     """
     performs k-means clusteringing on the data to provide each entry a catagory based on similarity.
 
     parameters:
         Data: data to be catagorised
         k: the number of clusters to be formed
+        random_state: optional seed so that repeated runs give the same clusters
+        sparse: when set, the one-hot encoding is kept as a sparse matrix instead of a dense frame
+        workers: the number of processes to cluster with, defaults to one
     """
    
-    encoded_data = encode_data_for_learning(data)
+    if sparse:
+        encoded_data = encode_data_sparse(data).one_hot()
+    else:
+        encoded_data = encode_data_for_learning(data)
    
-    cluster_assignments, inertia = k_means_no_library(encoded_data, k)
+    cluster_assignments, inertia = k_means_no_library(encoded_data, k, random_state, workers)
         
     data["classification"] = cluster_assignments
     return data, inertia
 
-def k_means_no_library(encoded_data: pd.DataFrame, k: int) -> pd.Series:
-    """This is my own implementation of the k-means algorithm. It needs a tidy up but I wanted to see if i could 
-    do it without a library"""
-    vector_dimension = encoded_data.shape[1]
-    k_means = {tuple(np.random.rand(vector_dimension)): [] for i in range(k)}
-    
-   
-    last_error = np.inf
-    error = 0
-    TARGET = 0.0001
-    # Step three: assign each point to the closest mean, and then move that mean to the average of all the points it is assigned to
-    while(abs(error - last_error) > TARGET):
-        last_error = error
-        error = 0
-        for id, data_point in encoded_data.iterrows(): # go through and assign all points to their closest neigbour
-            min_distance = np.inf
-            current_closest = None
-            for vector in k_means.keys():
-                k_vector = np.array(vector)
-                new_dist = np.sum((k_vector - data_point) ** 2) 
-                if new_dist < min_distance:
-                    min_distance = new_dist
-                    current_closest = vector
-                print(min_distance)
-            k_means[current_closest].append(data_point)
-            error += min_distance
-        new_means = {}
-        for vector, elements in k_means.items():
-            if len(elements) > 0:
-                new_k = np.sum(np.array(elements), axis=0) / len(elements)
-            else:
-                new_k = vector
-            new_means[tuple(new_k)] = []
-        k_means = new_means
-
-    result = []
-    k_means = list(k_means.keys())
-    print(len(k_means))
-    for id, data_point in encoded_data.iterrows():
-        min_distance = np.inf
-        current_closest = None
-        for i in range(len(k_means)):
-            k_vector = np.array(k_means[i])
-            new_dist =  np.sum((k_vector - data_point) ** 2)
-            if new_dist < min_distance:
-                    min_distance = new_dist
-                    current_closest = i
-        result.append(current_closest)
-    return result, last_error
\ No newline at end of file
+def k_means_no_library(encoded_data, k: int, random_state=None, workers: int = None) -> pd.Series:
+    """This is my own implementation of the k-means algorithm. The actual work is done by the
+    vectorised engine in the clustering module, which seeds with k-means++ and stops once the
+    centroids stop moving. encoded_data may be a dense frame or a scipy sparse matrix.
+    With workers, the passes over the data are split across that many processes.
+
+    returns:
+        the cluster each row was assigned to, and the inertia of the final clustering
+    """
+    cluster_assignments, centroids, inertia = clustering.k_means(encoded_data, k, random_state=random_state,
+                                                                 workers=workers)
+    return cluster_assignments, inertia
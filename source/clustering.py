@@ -0,0 +1,415 @@
+"""
+    Module containing the numerical clustering engines used by the classification module.
+
+    Everything in here works on plain numpy arrays (or scipy sparse matrices), so that
+    it can be reused no matter how the transactions were encoded.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import logging
+import numpy as np
+import scipy.sparse
+
+import parallel
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# roughly how much memory a single (rows x clusters) distance block may use
+DISTANCE_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def as_float_matrix(data) -> np.ndarray:
+    """converts encoded data (DataFrame, bool or int array) into a 2-d float array.
+    float32 input is left alone so large datasets are not doubled in size, and
+    scipy sparse input stays sparse (as csr, so that blocks of rows can be sliced cheaply)"""
+    if scipy.sparse.issparse(data):
+        matrix = scipy.sparse.csr_matrix(data)
+        if matrix.dtype != np.float32 and matrix.dtype != np.float64:
+            matrix = matrix.astype(np.float64)
+        return matrix
+    matrix = np.asarray(data)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+    if matrix.dtype != np.float32 and matrix.dtype != np.float64:
+        matrix = matrix.astype(np.float64)
+    return matrix
+
+
+def get_chunk_size(n_rows: int, k: int, chunk_size: int = None) -> int:
+    """works out how many rows to put in each distance block so that a block
+    of float64 distances stays under DISTANCE_BLOCK_BYTES"""
+    if chunk_size is not None:
+        return max(1, int(chunk_size))
+    rows = DISTANCE_BLOCK_BYTES // (8 * max(k, 1))
+    return int(max(1, min(n_rows, rows)))
+
+
+def get_row_norms(data) -> np.ndarray:
+    """returns the squared length of every row of a dense or sparse matrix"""
+    if scipy.sparse.issparse(data):
+        return np.asarray(data.multiply(data).sum(axis=1)).ravel()
+    return np.einsum("ij,ij->i", data, data)
+
+
+def get_rows(data, index) -> np.ndarray:
+    """returns the given rows of a dense or sparse matrix as a dense array"""
+    rows = data[index]
+    if scipy.sparse.issparse(rows):
+        rows = rows.toarray()
+    return np.asarray(rows, dtype=np.float64)
+
+
+def get_mean_variance(data) -> float:
+    """returns the mean of the per-column variances without densifying sparse data"""
+    if scipy.sparse.issparse(data):
+        means = np.asarray(data.mean(axis=0)).ravel()
+        squares = np.asarray(data.multiply(data).mean(axis=0)).ravel()
+        return float(np.mean(squares - means ** 2))
+    return float(np.mean(np.var(data, axis=0)))
+
+
+def squared_distances(data, centroids: np.ndarray, row_norms: np.ndarray = None) -> np.ndarray:
+    """returns the (rows x centroids) matrix of squared euclidean distances, using
+    |x|^2 - 2x.c + |c|^2 so the whole block is a single matrix product.
+    data may be dense or scipy sparse, the result is always dense"""
+    if row_norms is None:
+        row_norms = get_row_norms(data)
+    centroid_norms = np.einsum("ij,ij->i", centroids, centroids)
+    distances = np.asarray(data @ centroids.T, dtype=np.float64)
+    distances *= -2
+    distances += row_norms[:, np.newaxis]
+    distances += centroid_norms[np.newaxis, :]
+    # rounding can push distances of identical points slightly below zero
+    np.maximum(distances, 0, out=distances)
+    return distances
+
+
+def assign_to_centroids(data, centroids: np.ndarray, chunk_size: int = None):
+    """assigns every row to its closest centroid.
+
+    returns:
+        labels: the index of the closest centroid for each row
+        min_distances: the squared distance from each row to that centroid
+    """
+    data = as_float_matrix(data)
+    labels, min_distances, _, _ = _lloyd_pass(data, centroids, chunk_size, accumulate=False)
+    return labels, min_distances
+
+
+def _lloyd_pass(data, centroids: np.ndarray, chunk_size: int = None, accumulate: bool = True):
+    """runs one assignment pass over the data in blocks of rows. When accumulate is set, the
+    per-cluster sums and counts needed for the centroid update are gathered in the same pass"""
+    n_rows = data.shape[0]
+    k = centroids.shape[0]
+    step = get_chunk_size(n_rows, k, chunk_size)
+
+    labels = np.empty(n_rows, dtype=np.int64)
+    min_distances = np.empty(n_rows, dtype=np.float64)
+    sums = np.zeros(centroids.shape, dtype=np.float64) if accumulate else None
+    counts = np.zeros(k, dtype=np.int64) if accumulate else None
+
+    for start in range(0, n_rows, step):
+        block = data[start:start + step]
+        distances = squared_distances(block, centroids)
+        block_labels = distances.argmin(axis=1)
+        labels[start:start + step] = block_labels
+        min_distances[start:start + step] = distances[np.arange(len(block_labels)), block_labels]
+        if accumulate:
+            membership = np.zeros((len(block_labels), k), dtype=np.float64)
+            membership[np.arange(len(block_labels)), block_labels] = 1
+            # written as (block.T @ membership).T so sparse blocks stay sparse
+            sums += np.asarray(block.T @ membership).T
+            counts += np.bincount(block_labels, minlength=k)
+    return labels, min_distances, sums, counts
+
+
+def share_matrix(data) -> dict:
+    """returns the arrays that make up a dense or csr matrix, ready to be put in shared memory"""
+    if scipy.sparse.issparse(data):
+        return {"data": data.data, "indices": data.indices, "indptr": data.indptr,
+                "shape": np.array(data.shape, dtype=np.int64)}
+    return {"matrix": data}
+
+
+def get_shared_rows(arrays: dict, start: int, stop: int):
+    """returns rows start to stop of a matrix split up by share_matrix, without copying them"""
+    if "matrix" in arrays:
+        return arrays["matrix"][start:stop]
+    indptr = arrays["indptr"]
+    first, last = indptr[start], indptr[stop]
+    return scipy.sparse.csr_matrix((arrays["data"][first:last], arrays["indices"][first:last],
+                                    indptr[start:stop + 1] - first), shape=(stop - start, int(arrays["shape"][1])))
+
+
+def _lloyd_shard(arrays: dict, start: int, stop: int, centroids: np.ndarray, accumulate: bool):
+    """runs _lloyd_pass on one shard in a worker, writing the labels and distances into the shared outputs"""
+    labels, min_distances, sums, counts = _lloyd_pass(get_shared_rows(arrays, start, stop), centroids,
+                                                      accumulate=accumulate)
+    arrays["labels"][start:stop] = labels
+    arrays["min_distances"][start:stop] = min_distances
+    return sums, counts
+
+
+def _parallel_lloyd_pass(pool: parallel.ShardPool, centroids: np.ndarray, accumulate: bool = True):
+    """runs _lloyd_pass over every shard in the pool, adding up the sums and counts of the shards in order"""
+    results = pool.map(_lloyd_shard, centroids, accumulate)
+    sums = np.zeros(centroids.shape, dtype=np.float64) if accumulate else None
+    counts = np.zeros(centroids.shape[0], dtype=np.int64) if accumulate else None
+    if accumulate:
+        for shard_sums, shard_counts in results:
+            sums += shard_sums
+            counts += shard_counts
+    return pool.arrays["labels"].copy(), pool.arrays["min_distances"].copy(), sums, counts
+
+
+def _assign(data, centroids: np.ndarray, chunk_size: int = None, pool: parallel.ShardPool = None):
+    if pool is None:
+        return assign_to_centroids(data, centroids, chunk_size)
+    return _parallel_lloyd_pass(pool, centroids, accumulate=False)[:2]
+
+
+def k_means_plus_plus(data, k: int, rng: np.random.Generator, chunk_size: int = None,
+                      pool: parallel.ShardPool = None) -> np.ndarray:
+    """chooses k starting centroids with k-means++ seeding: each new centroid is drawn with
+    probability proportional to its squared distance from the closest centroid so far.
+    The distances are worked out in the pool's worker processes if one is given"""
+    n_rows = data.shape[0]
+    centroids = np.empty((k, data.shape[1]), dtype=np.float64)
+    centroids[0] = get_rows(data, [rng.integers(n_rows)])[0]
+    closest = _assign(data, centroids[:1], chunk_size, pool)[1]
+
+    for i in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            # every point already sits on a centroid, so any choice is as good as another
+            index = rng.integers(n_rows)
+        else:
+            index = rng.choice(n_rows, p=closest / total)
+        centroids[i] = get_rows(data, [index])[0]
+        new_distances = _assign(data, centroids[i:i + 1], chunk_size, pool)[1]
+        np.minimum(closest, new_distances, out=closest)
+    return centroids
+
+
+def k_means(data, k: int, random_state=None, init: str = "k-means++", max_iter: int = 300,
+            tol: float = 1e-4, chunk_size: int = None, workers: int = None):
+    """clusters the rows of data into k groups using lloyd's algorithm.
+
+    parameters:
+        data: 2-d array-like or scipy sparse matrix of encoded data
+        k: the number of clusters to be formed
+        random_state: seed (or numpy Generator) used for the initial centroids
+        init: "k-means++" or "random"
+        max_iter: the maximum number of assignment/update rounds
+        tol: stop once the total squared centroid shift is below tol times the mean feature variance
+        chunk_size: number of rows per distance block, worked out from DISTANCE_BLOCK_BYTES if not given
+        workers: when given, the assignment and update steps run over shards of the data in this many
+            processes (see the parallel module). The result is the same for any number of workers
+
+    returns:
+        labels, centroids, inertia
+    """
+    data = as_float_matrix(data)
+    n_rows = data.shape[0]
+    if k < 1 or k > n_rows:
+        raise ValueError(f"k must be between 1 and the number of rows ({n_rows}), got {k}")
+    if init not in ("k-means++", "random"):
+        raise ValueError(f"Unknown initialisation method: {init}")
+    rng = np.random.default_rng(random_state)
+    pool = None
+    if workers is not None:
+        pool = parallel.ShardPool(share_matrix(data), {"labels": ((n_rows,), np.int64),
+                                                       "min_distances": ((n_rows,), np.float64)}, n_rows, workers)
+    try:
+        if init == "k-means++":
+            centroids = k_means_plus_plus(data, k, rng, chunk_size, pool)
+        else:
+            centroids = get_rows(data, rng.choice(n_rows, size=k, replace=False))
+
+        threshold = tol * get_mean_variance(data)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for iteration in range(max_iter):
+            with instrumentation.span("k_means iteration", iteration=iteration):
+                if pool is None:
+                    labels, min_distances, sums, counts = _lloyd_pass(data, centroids, chunk_size)
+                else:
+                    labels, min_distances, sums, counts = _parallel_lloyd_pass(pool, centroids)
+                new_centroids = centroids.copy()
+                filled = counts > 0
+                # empty clusters keep their old centroid
+                new_centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+                shift = np.sum((new_centroids - centroids) ** 2)
+                if debug:
+                    logger.debug("k_means iteration %d: centroid shift %.6g (threshold %.6g)", iteration, shift, threshold)
+                centroids = new_centroids
+                if shift <= threshold:
+                    break
+
+        labels, min_distances = _assign(data, centroids, chunk_size, pool)
+    finally:
+        if pool is not None:
+            pool.close()
+    return labels, centroids, float(min_distances.sum())
+
+
+def default_gamma(numeric: np.ndarray) -> float:
+    """the weight given to categorical mismatches, chosen the same way KPrototypes does"""
+    return 0.5 * float(np.mean(numeric.std(axis=0)))
+
+
+def prototype_distances(numeric: np.ndarray, codes: np.ndarray, num_centroids: np.ndarray,
+                        cat_centroids: np.ndarray, gamma: float) -> np.ndarray:
+    """returns the (rows x prototypes) k-prototypes dissimilarity: squared euclidean distance on the
+    numeric columns plus gamma times the number of categorical columns that don't match"""
+    distances = squared_distances(numeric, num_centroids)
+    for column in range(codes.shape[1]):
+        mismatches = codes[:, column][:, np.newaxis] != cat_centroids[:, column][np.newaxis, :]
+        distances += gamma * mismatches
+    return distances
+
+
+def assign_to_prototypes(numeric: np.ndarray, codes: np.ndarray, num_centroids: np.ndarray,
+                         cat_centroids: np.ndarray, gamma: float, chunk_size: int = None):
+    """assigns every row to its closest prototype, in blocks of rows.
+
+    returns:
+        labels: the index of the closest prototype for each row
+        min_distances: the dissimilarity from each row to that prototype
+    """
+    n_rows = numeric.shape[0]
+    step = get_chunk_size(n_rows, num_centroids.shape[0], chunk_size)
+    labels = np.empty(n_rows, dtype=np.int64)
+    min_distances = np.empty(n_rows, dtype=np.float64)
+    for start in range(0, n_rows, step):
+        distances = prototype_distances(numeric[start:start + step], codes[start:start + step],
+                                        num_centroids, cat_centroids, gamma)
+        block_labels = distances.argmin(axis=1)
+        labels[start:start + step] = block_labels
+        min_distances[start:start + step] = distances[np.arange(len(block_labels)), block_labels]
+    return labels, min_distances
+
+
+def extend_prototypes(numeric: np.ndarray, codes: np.ndarray, num_centroids: np.ndarray,
+                      cat_centroids: np.ndarray, k: int, gamma: float, rng: np.random.Generator):
+    """grows an existing set of prototypes to k of them, drawing each new one from the rows
+    with probability proportional to its dissimilarity from the closest prototype so far
+    (k-means++ style). Used to warm-start a fit for k from the fit for a smaller k"""
+    num_centroids = [np.asarray(row, dtype=np.float64) for row in num_centroids]
+    cat_centroids = [np.asarray(row) for row in cat_centroids]
+    if len(num_centroids) == 0:
+        index = rng.integers(numeric.shape[0])
+        num_centroids.append(numeric[index].astype(np.float64))
+        cat_centroids.append(codes[index])
+    closest = assign_to_prototypes(numeric, codes, np.array(num_centroids), np.array(cat_centroids), gamma)[1]
+
+    while len(num_centroids) < k:
+        total = closest.sum()
+        if total <= 0:
+            index = rng.integers(numeric.shape[0])
+        else:
+            index = rng.choice(numeric.shape[0], p=closest / total)
+        num_centroids.append(numeric[index].astype(np.float64))
+        cat_centroids.append(codes[index])
+        new_distances = assign_to_prototypes(numeric, codes, num_centroids[-1][np.newaxis, :],
+                                             cat_centroids[-1][np.newaxis, :], gamma)[1]
+        np.minimum(closest, new_distances, out=closest)
+    return np.array(num_centroids[:k]), np.array(cat_centroids[:k])
+
+
+def _prototype_shard(arrays: dict, start: int, stop: int, num_centroids: np.ndarray, cat_centroids: np.ndarray,
+                     gamma: float, n_categories: list):
+    """assigns one shard of rows to their closest prototypes, writing the labels and distances into
+    the outputs, and returns what the update step needs from the shard: the numeric sums, the counts,
+    and for each categorical column a (prototypes x categories + 1) count of each category (missing first)"""
+    numeric = arrays["numeric"][start:stop]
+    codes = arrays["codes"][start:stop]
+    labels, min_distances = assign_to_prototypes(numeric, codes, num_centroids, cat_centroids, gamma)
+    arrays["labels"][start:stop] = labels
+    arrays["min_distances"][start:stop] = min_distances
+    k = num_centroids.shape[0]
+    sums = np.column_stack([np.bincount(labels, weights=numeric[:, column], minlength=k)
+                            for column in range(numeric.shape[1])])
+    category_counts = [np.bincount(labels * (n + 1) + codes[:, column] + 1, minlength=k * (n + 1)).reshape(k, n + 1)
+                       for column, n in enumerate(n_categories)]
+    return sums, np.bincount(labels, minlength=k), category_counts
+
+
+def k_prototypes(numeric: np.ndarray, codes: np.ndarray, k: int, gamma: float = None, random_state=None,
+                 max_iter: int = 100, workers: int = None, shard_rows: int = None):
+    """clusters rows made of numeric columns and categorical codes (-1 where missing) with lloyd style
+    k-prototypes: every row goes to the prototype with the smallest prototype_distances, then each
+    numeric centroid becomes the mean and each categorical centroid the mode of the rows assigned to it.
+
+    The rows are worked on in shards, and the per-shard sums and counts are added up in shard order,
+    so the result only depends on the seed, and not on how many workers there are.
+
+    parameters:
+        gamma: the weight given to categorical mismatches, defaults to default_gamma
+        random_state: seed (or numpy Generator) for the k-means++ style starting prototypes
+        max_iter: the maximum number of assignment/update rounds, stopping early once no row changes cluster
+        workers: when given, the shards are run in this many processes (see the parallel module)
+
+    returns:
+        labels, numeric centroids, categorical centroids, cost
+    """
+    numeric = np.asarray(numeric, dtype=np.float64)
+    codes = np.asarray(codes)
+    n_rows = numeric.shape[0]
+    if k < 1 or k > n_rows:
+        raise ValueError(f"k must be between 1 and the number of rows ({n_rows}), got {k}")
+    if gamma is None:
+        gamma = default_gamma(numeric)
+    rng = np.random.default_rng(random_state)
+    num_centroids, cat_centroids = extend_prototypes(numeric, codes, np.empty((0, numeric.shape[1])),
+                                                     np.empty((0, codes.shape[1]), dtype=codes.dtype), k, gamma, rng)
+    cat_centroids = cat_centroids.astype(codes.dtype)
+    n_categories = [int(codes[:, column].max()) + 1 for column in range(codes.shape[1])]
+    outputs = {"labels": ((n_rows,), np.int64), "min_distances": ((n_rows,), np.float64)}
+    pool = None
+    if workers is not None:
+        pool = parallel.ShardPool({"numeric": numeric, "codes": codes}, outputs, n_rows, workers, shard_rows)
+        arrays = pool.arrays
+    else:
+        arrays = {"numeric": numeric, "codes": codes}
+        arrays.update({name: np.empty(shape, dtype=dtype) for name, (shape, dtype) in outputs.items()})
+
+    def run_shards(*args):
+        if pool is not None:
+            return pool.map(_prototype_shard, *args)
+        return [_prototype_shard(arrays, start, stop, *args) for start, stop in parallel.get_shards(n_rows, shard_rows)]
+
+    try:
+        labels = None
+        debug = logger.isEnabledFor(logging.DEBUG)
+        for iteration in range(max_iter):
+            with instrumentation.span("k_prototypes iteration", iteration=iteration):
+                results = run_shards(num_centroids, cat_centroids, gamma, n_categories)
+                sums, counts, category_counts = results[0]
+                for shard_sums, shard_counts, shard_category_counts in results[1:]:
+                    sums = sums + shard_sums
+                    counts = counts + shard_counts
+                    category_counts = [total + shard for total, shard in zip(category_counts, shard_category_counts)]
+                filled = counts > 0
+                # empty clusters keep their old prototype
+                num_centroids = num_centroids.copy()
+                num_centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+                cat_centroids = cat_centroids.copy()
+                for column, column_counts in enumerate(category_counts):
+                    cat_centroids[filled, column] = column_counts[filled].argmax(axis=1) - 1
+                new_labels = arrays["labels"].copy()
+                if debug:
+                    changed = len(new_labels) if labels is None else int((labels != new_labels).sum())
+                    logger.debug("k_prototypes iteration %d: %d labels changed", iteration, changed)
+                if labels is not None and np.array_equal(labels, new_labels):
+                    break
+                labels = new_labels
+
+        run_shards(num_centroids, cat_centroids, gamma, n_categories)
+        labels = arrays["labels"].copy()
+        cost = float(arrays["min_distances"].sum())
+    finally:
+        if pool is not None:
+            pool.close()
+    return labels, num_centroids, cat_centroids, cost
@@ -0,0 +1,206 @@
+"""
+    Module that represents sections of the data as views over one shared dataset.
+
+    A view is the base dataset together with the positions of the rows it contains, so
+    drilling down into a section of a section never copies the transactions. The rows are
+    only copied out into a new dataset when something needs to work on them, and that copy
+    is let go again once the user has gone back from the section (see DataView.release).
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER
+import rollups
+
+# the most sections of a view whose rows are kept for reuse, the least recently used are dropped past this
+MAX_CHILDREN = 16
+
+
+class Predicate:
+    """
+    Defines a condition on the transactions of a view.
+
+    Parameters:
+        key: a description of the condition, used to cache the rows it picks out
+        mask: a function taking a view and returning a boolean array over its rows
+        sql: the same condition as (SQL clause, parameters), so that a view of a database
+            (see transaction_database.DatabaseView) can have the database pick out the rows.
+            None if the condition can't be written in SQL
+    """
+
+    def __init__(self, key: tuple, mask, sql: tuple = None):
+        self.key = key
+        self.mask = mask
+        self.sql = sql
+
+    def __and__(self, other):
+        sql = None
+        if self.sql is not None and other.sql is not None:
+            sql = (f"({self.sql[0]}) AND ({other.sql[0]})", tuple(self.sql[1]) + tuple(other.sql[1]))
+        return Predicate(("and", self.key, other.key), lambda view: self.mask(view) & other.mask(view), sql)
+
+
+def spends_only() -> Predicate:
+    return Predicate(("spends",), lambda view: view.column(HEADER.QUANTITY) < 0,
+                     (f'"{HEADER.QUANTITY}" < 0', ()))
+
+
+def increases_only() -> Predicate:
+    return Predicate(("increases",), lambda view: view.column(HEADER.QUANTITY) >= 0,
+                     (f'"{HEADER.QUANTITY}" >= 0', ()))
+
+
+def type_in(spend_types: list) -> Predicate:
+    """transactions with one of the given transaction types"""
+    spend_types = list(spend_types)
+    return Predicate(("types", tuple(spend_types)),
+                     lambda view: pd.Series(view.column(HEADER.SPEND_TYPE)).isin(spend_types).to_numpy(),
+                     (f'"{HEADER.SPEND_TYPE}" IN ({", ".join("?" * len(spend_types))})', tuple(spend_types)))
+
+
+def account_in(accounts: list) -> Predicate:
+    """transactions from one of the given accounts"""
+    accounts = list(accounts)
+    return Predicate(("accounts", tuple(accounts)),
+                     lambda view: pd.Series(view.column(HEADER.ACCOUNT)).isin(accounts).to_numpy(),
+                     (f'"{HEADER.ACCOUNT}" IN ({", ".join("?" * len(accounts))})', tuple(accounts)))
+
+
+class DateIndex:
+    """
+    The dates of a dataset in sorted order, so that the transactions between two dates can be
+    found with a binary search instead of comparing every date.
+
+    If the dataset is already sorted by date (see spending_tracker.format_data) the date column is
+    used as it is. Otherwise order holds the positions of the transactions in date order.
+    """
+
+    def __init__(self, dates: pd.Series):
+        values = dates.to_numpy()
+        if dates.is_monotonic_increasing:
+            self.order = None
+            self.dates = values
+        else:
+            self.order = np.argsort(values, kind="stable")
+            self.dates = values[self.order]
+
+    def bounds(self, start_date, end_date) -> tuple:
+        """returns the range [low, high) of sorted positions with dates between start_date and end_date, inclusive"""
+        low = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start_date)), side="left")
+        high = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end_date)), side="right")
+        return low, max(low, high)
+
+
+class DataView:
+    """
+    A section of a dataset, stored as the row positions it contains.
+
+    Parameters:
+        base: the full dataset the view is of
+        rows: the sorted positions of the view's rows in base, or None for every row
+        date_index: the date index of base, when another view of it has already built one
+    """
+
+    def __init__(self, base: pd.DataFrame, rows: np.ndarray = None, date_index: DateIndex = None):
+        self.base = base
+        self.rows = rows
+        self._date_index = date_index
+        self._children = OrderedDict()
+        self._frame = None
+
+    @property
+    def date_index(self) -> DateIndex:
+        """the date index of the base dataset, built the first time it is needed and shared by every view of it"""
+        if self._date_index is None:
+            self._date_index = DateIndex(self.base[HEADER.DATE])
+        return self._date_index
+
+    def __len__(self):
+        return len(self.base) if self.rows is None else len(self.rows)
+
+    def column(self, name: str) -> np.ndarray:
+        """returns the values of one column for the rows in the view"""
+        values = self.base[name].to_numpy()
+        return values if self.rows is None else values[self.rows]
+
+    def filter(self, predicate: Predicate):
+        """returns a view of the rows of this view that satisfy predicate. Views already made
+        with the same predicate are reused, so going back and forth between sections doesn't
+        have to look at the transactions again"""
+        child = self._get_child(predicate.key)
+        if child is None:
+            positions = np.flatnonzero(predicate.mask(self))
+            rows = positions if self.rows is None else self.rows[positions]
+            child = self._add_child(predicate.key, DataView(self.base, rows, self.date_index))
+        return child
+
+    def _get_child(self, key):
+        child = self._children.get(key)
+        if child is not None:
+            self._children.move_to_end(key)
+        return child
+
+    def _add_child(self, key, child):
+        """keeps a section for reuse, dropping the least recently used one if there are too many"""
+        self._children[key] = child
+        if len(self._children) > MAX_CHILDREN:
+            self._children.popitem(last=False)[1].release()
+        return child
+
+    def between_dates(self, start_date, end_date):
+        """returns a view of the rows of this view between start_date and end_date (inclusive).
+        When the base dataset is sorted by date this is a couple of binary searches, for the
+        date range in the base and then for where that range falls in this view's rows"""
+        key = ("dates", pd.Timestamp(start_date), pd.Timestamp(end_date))
+        child = self._get_child(key)
+        if child is None:
+            index = self.date_index
+            low, high = index.bounds(start_date, end_date)
+            if index.order is None:
+                if self.rows is None:
+                    rows = np.arange(low, high)
+                else:
+                    rows = self.rows[np.searchsorted(self.rows, low):np.searchsorted(self.rows, high)]
+            else:
+                rows = np.sort(index.order[low:high])
+                if self.rows is not None:
+                    rows = np.intersect1d(self.rows, rows, assume_unique=True)
+            child = self._add_child(key, DataView(self.base, rows, index))
+        return child
+
+    def date_span(self) -> tuple:
+        """returns the first and last date in the view"""
+        if len(self) == 0:
+            return None, None
+        index = self.date_index
+        if index.order is None:
+            if self.rows is None:
+                return index.dates[0], index.dates[-1]
+            return index.dates[self.rows[0]], index.dates[self.rows[-1]]
+        dates = self.column(HEADER.DATE)
+        return dates.min(), dates.max()
+
+    def frame(self) -> pd.DataFrame:
+        """returns the rows of the view as a dataset of their own. This is the only place rows are copied,
+        and they are only copied once, so that everything worked out for the dataset (such as its rollups)
+        is kept between calls. A view of every row is just the base dataset"""
+        # columns added to the base since (such as a classification of all the data) mean the rows are
+        # copied again. Columns only the copy has (a classification of just this section) are its own
+        if self._frame is None or not self.base.columns.difference(self._frame.columns).empty:
+            self._frame = self.base if self.rows is None else self.base.iloc[self.rows]
+        return self._frame
+
+    def release(self) -> None:
+        """lets go of the copied rows of the view and of its sections, along with their rollups, so that
+        only their row positions are kept. Called once nothing is showing the view any more"""
+        self._frame = None
+        for child in self._children.values():
+            child.release()
+
+    def rollups(self):
+        """returns the rollups.RollupCube of the rows in the view, which is built once per view"""
+        return rollups.get_cube(self.frame())
@@ -0,0 +1,325 @@
+"""
+    Module that remembers which transactions have already been imported, so that importing
+    overlapping statements (each monthly download repeats a few days of the one before) doesn't
+    count the repeated days twice.
+
+    Each transaction is identified by a fingerprint: a 64 bit hash of its account, date, amount,
+    type, details, particulars, code and reference. The index keeps how many times each
+    fingerprint has been seen in one statement, since two identical purchases on the same day
+    are both genuine. A statement with three copies of a transaction, imported onto an index
+    that has seen two, only adds the third.
+
+    The index is a hash table kept in a file and mapped into memory, so looking a fingerprint up
+    or adding one only touches the slot it hashes to, and importing a statement costs the same
+    however long the history is. Changes stay in memory until the index is saved, so that an
+    import that fails can be rolled back without having changed the file. The table is kept at
+    most half full, so that lookups rarely have to look past the first slot. It can also keep a Bloom filter of every fingerprint,
+    which rules most new transactions out without looking in the table at all.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import math
+import os
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, to_cents
+
+INDEX_SUFFIX = ".index"
+BLOOM_SUFFIX = ".bloom"
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MIN_CAPACITY = 100_000
+FINGERPRINT_COLUMNS = [HEADER.ACCOUNT, HEADER.DATE, HEADER.QUANTITY, HEADER.SPEND_TYPE, HEADER.LOCATION,
+                       HEADER.PARTICULARS, HEADER.CODE, HEADER.REF]
+INDEX_MIN_SLOTS = 1 << 16
+# each slot of the table: a fingerprint, and the most copies of it seen in one statement. A fingerprint
+# of 0 marks an empty slot. The first slot of the file holds the number of fingerprints instead
+RECORD = np.dtype([("fingerprint", "<u8"), ("count", "<u4")])
+
+# csv exports leave empty text columns empty, which pandas reads as missing, so the two hash the same
+_MISSING_HASH = pd.util.hash_array(np.array([None], dtype=object))[0]
+_EMPTY_HASH = pd.util.hash_array(np.array([""], dtype=object))[0]
+
+
+def _hash_column(data: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in data.columns:
+        return np.full(len(data), _MISSING_HASH, dtype=np.uint64)
+    values = data[column]
+    if column == HEADER.DATE:
+        # days, so that dates parsed at different resolutions still match
+        return pd.util.hash_array(values.to_numpy().astype("datetime64[D]").astype(np.int64))
+    if column == HEADER.QUANTITY:
+        return pd.util.hash_array(to_cents(values))
+    # text repeats a lot, so each distinct value is only hashed once
+    codes, uniques = pd.factorize(values)
+    hashes = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    hashes[hashes == _EMPTY_HASH] = _MISSING_HASH
+    # codes of -1 (missing values) pick out the last entry
+    return np.append(hashes, _MISSING_HASH)[codes]
+
+
+def fingerprint(data: pd.DataFrame) -> np.ndarray:
+    """returns the fingerprint of every transaction in data. Columns that data doesn't have count as empty,
+    and amounts hash the same whether they are in dollars or cents"""
+    hashes = pd.DataFrame({column: _hash_column(data, column) for column in FINGERPRINT_COLUMNS})
+    fingerprints = pd.util.hash_pandas_object(hashes, index=False).to_numpy().copy()
+    # 0 marks an empty slot of the index
+    fingerprints[fingerprints == 0] = 1
+    return fingerprints
+
+
+def get_occurrences(fingerprints: np.ndarray) -> np.ndarray:
+    """returns which copy of its fingerprint each transaction is: 0 for the first, 1 for the second..."""
+    return pd.Series(fingerprints).groupby(fingerprints).cumcount().to_numpy()
+
+
+class BloomFilter:
+    """
+    A set of fingerprints that can say for certain that a fingerprint isn't in it, but only that
+    one probably is (wrongly, error_rate of the time once it holds capacity fingerprints).
+
+    Parameters:
+        capacity: the number of fingerprints it is sized for
+        error_rate: how often a fingerprint that isn't in it is said to probably be
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+        # how many fingerprints the index had when the filter was saved, to tell if it has fallen behind
+        self.index_size = 0
+
+    def _positions(self, fingerprints: np.ndarray) -> np.ndarray:
+        # the fingerprints are already hashes, so their two halves give every position (double hashing)
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        low = (fingerprints & np.uint64(0xFFFFFFFF))[:, None]
+        high = ((fingerprints >> np.uint64(32)) | np.uint64(1))[:, None]
+        return (low + high * np.arange(self.n_hashes, dtype=np.uint64)) % np.uint64(self.n_bits)
+
+    def add(self, fingerprints: np.ndarray) -> None:
+        positions = self._positions(fingerprints).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                         np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(fingerprints)
+
+    def might_contain(self, fingerprints: np.ndarray) -> np.ndarray:
+        """returns False for the fingerprints that are definitely not in the filter"""
+        positions = self._positions(fingerprints)
+        set_bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return set_bits.all(axis=1)
+
+    def save(self, filename: str) -> None:
+        with open(filename, "wb") as file:
+            np.savez(file, bits=self.bits, sizes=np.array([self.capacity, self.count, self.index_size]),
+                     error_rate=np.array([self.error_rate]))
+
+    @classmethod
+    def load(cls, filename: str):
+        with np.load(filename) as saved:
+            bloom = cls(int(saved["sizes"][0]), float(saved["error_rate"][0]))
+            bloom.bits = saved["bits"]
+            bloom.count = int(saved["sizes"][1])
+            bloom.index_size = int(saved["sizes"][2])
+        return bloom
+
+
+def delete_index(store_filename: str) -> None:
+    """deletes the index (and Bloom filter) kept next to a store. Used when the store is replaced as a
+    whole, so that the next import builds the index again from what the store holds now"""
+    for filename in (store_filename + INDEX_SUFFIX, store_filename + INDEX_SUFFIX + BLOOM_SUFFIX):
+        if os.path.exists(filename):
+            os.remove(filename)
+
+
+class DedupIndex:
+    """
+    The fingerprints of every transaction imported so far, with the most copies of each seen in one statement.
+
+    Parameters:
+        filename: the index file, or None to keep the index in memory only
+        bloom: keep a Bloom filter of the fingerprints (in filename + BLOOM_SUFFIX), so that
+            transactions that haven't been seen before can be told apart without looking in the table
+    """
+
+    def __init__(self, filename: str = None, bloom: bool = False):
+        self.filename = filename
+        # the number of fingerprints that had to be looked up in the table
+        self.lookups = 0
+        self.use_bloom = bloom
+        self._load()
+
+    def _load(self) -> None:
+        """reads the index in as it was last saved"""
+        if self.exists():
+            # copy on write, so changes only reach the file when they are saved
+            self.records = np.memmap(self.filename, dtype=RECORD, mode="c")
+        else:
+            self.records = self._allocate(INDEX_MIN_SLOTS)
+        # the slots changed since the index was last saved, while it is mapped from its file
+        self._changed = []
+        self.bloom = None
+        if self.use_bloom:
+            bloom_filename = self._bloom_filename()
+            if bloom_filename is not None and os.path.exists(bloom_filename):
+                self.bloom = BloomFilter.load(bloom_filename)
+            if self.bloom is None or self.bloom.index_size != len(self):
+                # an import was cut off between saving the index and saving the filter
+                self._rebuild_bloom()
+
+    def _allocate(self, n_slots: int) -> np.ndarray:
+        """returns an empty table of n_slots slots (a power of two). It is kept in memory until it is saved"""
+        return np.zeros(n_slots + 1, dtype=RECORD)
+
+    @property
+    def slots(self) -> np.ndarray:
+        return self.records[1:]
+
+    def _bloom_filename(self) -> str:
+        return None if self.filename is None else self.filename + BLOOM_SUFFIX
+
+    def exists(self) -> bool:
+        """whether the index has been saved before"""
+        return self.filename is not None and os.path.exists(self.filename)
+
+    def __len__(self):
+        return int(self.records[0]["fingerprint"])
+
+    def _get_fingerprints(self) -> np.ndarray:
+        fingerprints = self.slots["fingerprint"]
+        return np.asarray(fingerprints[fingerprints != 0])
+
+    def _rebuild_bloom(self) -> None:
+        self.bloom = BloomFilter(max(BLOOM_MIN_CAPACITY, 2 * len(self)))
+        self.bloom.add(self._get_fingerprints())
+
+    def _find(self, fingerprints: np.ndarray) -> np.ndarray:
+        """returns the slot of each fingerprint, or the empty slot it would go in. Collisions go in the next
+        free slot along (linear probing), so the slots are checked in rounds until every fingerprint is found"""
+        table = self.slots["fingerprint"]
+        mask = np.uint64(len(table) - 1)
+        positions = (fingerprints & mask).astype(np.int64)
+        waiting = np.arange(len(fingerprints))
+        while len(waiting):
+            stored = table[positions[waiting]]
+            found = (stored == fingerprints[waiting]) | (stored == 0)
+            waiting = waiting[~found]
+            positions[waiting] = (positions[waiting] + 1) & int(mask)
+        return positions
+
+    def get_counts(self, fingerprints: np.ndarray) -> np.ndarray:
+        """returns the most copies seen in one statement of each fingerprint (0 for ones never seen).
+        Each one is looked up in its slot of the table, and the Bloom filter (if there is one) rules
+        most new ones out first"""
+        counts = np.zeros(len(fingerprints), dtype=np.int64)
+        maybe = np.ones(len(fingerprints), dtype=bool) if self.bloom is None else self.bloom.might_contain(fingerprints)
+        if maybe.any():
+            positions = self._find(fingerprints[maybe])
+            counts[maybe] = self.slots["count"][positions]
+            self.lookups += int(maybe.sum())
+        return counts
+
+    def _grow(self, n_new: int) -> None:
+        """doubles the table until it will be at most half full, moving every fingerprint across"""
+        n_slots = len(self.slots)
+        if 2 * (len(self) + n_new) <= n_slots:
+            return
+        while 2 * (len(self) + n_new) > n_slots:
+            n_slots *= 2
+        saved = np.array(self.slots[self.slots["fingerprint"] != 0])
+        size = len(self)
+        self.records = self._allocate(n_slots)
+        self._put(saved["fingerprint"], saved["count"])
+        self.records[0]["fingerprint"] = size
+
+    def _put(self, fingerprints: np.ndarray, counts: np.ndarray) -> None:
+        """writes the counts of (distinct) fingerprints into their slots, claiming empty slots for new ones.
+        When new fingerprints want the same empty slot, the first one gets it and the rest look again"""
+        waiting = np.arange(len(fingerprints))
+        while len(waiting):
+            positions = self._find(fingerprints[waiting])
+            _, first = np.unique(positions, return_index=True)
+            placed = waiting[first]
+            self.slots["fingerprint"][positions[first]] = fingerprints[placed]
+            self.slots["count"][positions[first]] = counts[placed]
+            if isinstance(self.records, np.memmap):
+                self._changed.append(positions[first])
+            waiting = np.delete(waiting, first)
+
+    def add(self, data: pd.DataFrame, seen: dict = None) -> np.ndarray:
+        """adds a statement's transactions to the index.
+
+        parameters:
+            data: the transactions of one statement, or of one chunk of it
+            seen: when a statement is added a chunk at a time, a dictionary kept across its chunks
+                (the copies of each fingerprint in the chunks before), so that identical transactions
+                split between chunks still count as being in the same statement
+
+        returns:
+            a boolean array that is True for the transactions that are new
+        """
+        fingerprints = fingerprint(data)
+        uniques, inverse, copies = np.unique(fingerprints, return_inverse=True, return_counts=True)
+        if seen:
+            before = np.array([seen.get(value, 0) for value in uniques.tolist()], dtype=np.int64)
+        else:
+            before = np.zeros(len(uniques), dtype=np.int64)
+        counts = self.get_counts(uniques)
+        is_new = (before[inverse] + get_occurrences(fingerprints)) >= counts[inverse]
+
+        totals = before + copies
+        if seen is not None:
+            seen.update(zip(uniques.tolist(), totals.tolist()))
+        grown = totals > counts
+        unseen = uniques[grown & (counts == 0)]
+        self._grow(len(unseen))
+        self._put(uniques[grown], totals[grown])
+        self.records[0]["fingerprint"] = len(self) + len(unseen)
+        if self.bloom is not None:
+            self.bloom.add(unseen)
+            if self.bloom.count > self.bloom.capacity:
+                self._rebuild_bloom()
+        return is_new
+
+    def save(self) -> None:
+        """writes the changes since the index was last saved (and the Bloom filter) to disk. Only the
+        slots that changed are written into a table that is already on disk; a new (or grown) table is
+        written whole"""
+        if self.filename is None:
+            return
+        if isinstance(self.records, np.memmap):
+            if self._changed:
+                changed = np.concatenate(self._changed) + 1
+                saved = np.memmap(self.filename, dtype=RECORD, mode="r+")
+                saved[changed] = self.records[changed]
+                # the number of fingerprints last, once the slots it counts are there
+                saved[0] = self.records[0]
+                saved.flush()
+                del saved
+        else:
+            # replaced in one go, so that a failure part way through leaves the old table
+            self.records.tofile(self.filename + ".tmp")
+            os.replace(self.filename + ".tmp", self.filename)
+        self.records = np.memmap(self.filename, dtype=RECORD, mode="c")
+        self._changed = []
+        if self.bloom is not None:
+            self.bloom.index_size = len(self)
+            self.bloom.save(self._bloom_filename())
+
+    def rollback(self) -> None:
+        """forgets everything added since the index was last saved"""
+        self._load()
+
+    def clear(self) -> None:
+        """forgets every transaction, deleting the index files"""
+        for filename in (self.filename, self._bloom_filename()):
+            if filename is not None and os.path.exists(filename):
+                os.remove(filename)
+        self.records = self._allocate(INDEX_MIN_SLOTS)
+        self._changed = []
+        if self.bloom is not None:
+            self.bloom = BloomFilter(self.bloom.capacity, self.bloom.error_rate)
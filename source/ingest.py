@@ -0,0 +1,213 @@
+"""
+    Module that reads ANZ statement exports in fixed-size chunks, so that exports bigger
+    than memory can be appended to the transaction store without ever being loaded whole.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import os
+import time
+import pandas as pd
+
+from transaction_structure import HEADER, apply_schema, concat_frames
+from lazy_module import LazyModule
+import transaction_store as store
+import transaction_database as database
+import dedup_index
+import instrumentation
+from instrumentation import get_peak_rss
+
+pq = LazyModule("pyarrow.parquet")
+
+ANZ_DATE_FORMAT = "%d/%m/%Y"
+SUPPORTED_EXTENSIONS = ["csv", "xlsx", store.STORE_EXTENSION, database.DATABASE_EXTENSION]
+CHUNK_ROWS = 100_000
+# the types to parse an export with. Amounts are still in dollars here, apply_schema turns them into cents
+STATEMENT_DTYPES = {
+    HEADER.SPEND_TYPE: "category",
+    HEADER.LOCATION: str,
+    HEADER.PARTICULARS: str,
+    HEADER.CODE: "category",
+    HEADER.REF: str,
+    HEADER.QUANTITY: "float64",
+    HEADER.FOREIGN: "float64",
+    HEADER.CONVERSION_COST: "float64",
+}
+
+
+class IngestReport:
+    """
+    Defines the outcome of ingesting a statement.
+
+    Parameters:
+        rows: the number of transactions added
+        seconds: how long it took
+        peak_rss: the peak resident memory of the process in bytes
+        duplicates: the number of transactions left out because they had already been imported
+    """
+
+    def __init__(self, rows: int, seconds: float, peak_rss: int, duplicates: int = 0):
+        self.rows = rows
+        self.seconds = seconds
+        self.peak_rss = peak_rss
+        self.duplicates = duplicates
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self):
+        return (f"{self.rows} rows in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s), "
+                f"{self.duplicates} already imported, peak RSS {self.peak_rss / 2 ** 20:.0f} MB")
+
+
+def parse_statement_dates(dates: pd.Series) -> pd.Series:
+    """parses statement dates with the explicit ANZ format, which is much faster than letting pandas
+    guess. ISO dates (such as the ones save_data writes) are tried next, before falling back to
+    day-first parsing"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    for date_format in (ANZ_DATE_FORMAT, "ISO8601"):
+        try:
+            return pd.to_datetime(dates, format=date_format)
+        except ValueError:
+            pass
+    return pd.to_datetime(dates, dayfirst=True)
+
+
+def read_statement_chunks(filename: str, chunk_rows: int = CHUNK_ROWS):
+    """yields the transactions in a csv statement chunk_rows at a time, already typed (see transaction_structure.SCHEMA)"""
+    for chunk in pd.read_csv(filename, dtype=STATEMENT_DTYPES, chunksize=chunk_rows):
+        chunk[HEADER.DATE] = parse_statement_dates(chunk[HEADER.DATE])
+        yield apply_schema(chunk, in_dollars=True)
+
+
+def read_statement(filename: str, chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    """reads a whole csv statement, using the same typed chunked reader as ingest_statement"""
+    return concat_frames(list(read_statement_chunks(filename, chunk_rows)))
+
+
+def get_account_name(filename: str) -> str:
+    """the account a statement belongs to when nothing better is known: its file name without the extension"""
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+@instrumentation.traced()
+def load_statement(filename: str, account: str = None) -> pd.DataFrame:
+    """loads a csv, xlsx, store or database file, tagging every transaction with the account it belongs to.
+    Store files and databases that already have an account column keep it. Whatever the file type, the columns
+    come back with the types in transaction_structure.SCHEMA.
+
+    parameters:
+        filename: the file to load, which must have one of SUPPORTED_EXTENSIONS
+        account: the account name to use, defaults to the file name
+    """
+    extension = filename.split('.')[-1]
+    if extension == "csv":
+        data = read_statement(filename)
+    elif extension == store.STORE_EXTENSION:
+        data = store.load_store(filename)
+    elif extension == database.DATABASE_EXTENSION:
+        data = database.load_database(filename)
+        if data[HEADER.ACCOUNT].isna().all():
+            data = data.drop(columns=HEADER.ACCOUNT)
+    elif extension == "xlsx":
+        # without the types, a statement with only whole dollar amounts would have integer amounts
+        data = pd.read_excel(filename, dtype=STATEMENT_DTYPES)
+        data[HEADER.DATE] = parse_statement_dates(data[HEADER.DATE])
+        data = apply_schema(data, in_dollars=True)
+    else:
+        raise ValueError(f"Unsupported file type: {extension}")
+    if HEADER.ACCOUNT not in data.columns:
+        data[HEADER.ACCOUNT] = account if account is not None else get_account_name(filename)
+    return apply_schema(data)
+
+
+def get_dedup_index(store_filename: str, bloom: bool = False) -> dedup_index.DedupIndex:
+    """returns the index of the transactions already in a store file (or database), which is kept next
+    to it. A store that doesn't have one yet has it built from its transactions, and an index left
+    behind by a store that has since been deleted is cleared.
+
+    The Bloom filter is left off by default: while the index is in the page cache, looking every
+    fingerprint up is quicker than reading and writing the filter (see benchmarks/bench_dedup.py).
+
+    The index only knows about transactions added with ingest_statement, so saving a whole store
+    (transaction_store.save_store or transaction_database.save_database, as "save data" does)
+    deletes it, and it is built again here from what was saved.
+    """
+    index = dedup_index.DedupIndex(store_filename + dedup_index.INDEX_SUFFIX, bloom)
+    if not os.path.exists(store_filename):
+        index.clear()
+    elif not index.exists():
+        # the whole store counts as one statement, since every copy in it was kept on purpose
+        seen = {}
+        columns = dedup_index.FINGERPRINT_COLUMNS
+        if store_filename.endswith("." + database.DATABASE_EXTENSION):
+            with database.TransactionDatabase(store_filename) as transactions:
+                index.add(transactions.load(columns=columns), seen)
+        else:
+            for part in store.get_parts(store_filename):
+                existing = pq.ParquetFile(part)
+                part_columns = [column for column in columns if column in existing.schema_arrow.names]
+                for group in range(existing.num_row_groups):
+                    index.add(existing.read_row_group(group, columns=part_columns).to_pandas(), seen)
+        index.save()
+    return index
+
+
+@instrumentation.traced()
+def ingest_statement(filename: str, store_filename: str, chunk_rows: int = CHUNK_ROWS,
+                     account: str = None, deduplicate: bool = True) -> IngestReport:
+    """streams a csv statement into a store, one chunk at a time, tagging every
+    transaction with its account (the file name, unless one is given).
+
+    The new transactions are added to the store as a new part (see transaction_store.PartWriter),
+    so the transactions already in it are never read or rewritten, and memory use stays bounded
+    by the chunk size.
+
+    A store_filename ending in .db is a database (see transaction_database), which the chunks
+    are inserted into instead, all in one transaction that is committed once the whole statement is in.
+
+    Transactions that are already in the store (from an earlier statement that overlaps this one)
+    are left out, unless deduplicate is False. They are found with the store's dedup index (see
+    get_dedup_index), so checking them only costs as much as the new statement, not the history.
+    """
+    start = time.perf_counter()
+    if account is None:
+        account = get_account_name(filename)
+    index = get_dedup_index(store_filename) if deduplicate else None
+    # the copies of each transaction in the chunks of this statement so far
+    seen = {}
+    rows = 0
+    duplicates = 0
+
+    def get_new_rows(chunk: pd.DataFrame) -> pd.DataFrame:
+        nonlocal duplicates
+        chunk[HEADER.ACCOUNT] = account
+        if index is None:
+            return chunk
+        is_new = index.add(chunk, seen)
+        duplicates += len(chunk) - int(is_new.sum())
+        return chunk[is_new]
+
+    try:
+        if store_filename.endswith("." + database.DATABASE_EXTENSION):
+            with database.TransactionDatabase(store_filename) as transactions:
+                # committed together, so that a failure part way through adds none of the statement
+                with transactions.connection:
+                    for chunk in read_statement_chunks(filename, chunk_rows):
+                        rows += transactions.insert(get_new_rows(chunk), commit=False)
+        else:
+            with store.PartWriter(store_filename) as part:
+                for chunk in read_statement_chunks(filename, chunk_rows):
+                    part.write(get_new_rows(chunk))
+            rows = part.rows
+    except BaseException:
+        # the statement wasn't added, so the index forgets it too
+        if index is not None:
+            index.rollback()
+        raise
+    # only saved once the transactions are in the store, so that a failed import can't leave them marked as imported
+    if index is not None:
+        index.save()
+    return IngestReport(rows, time.perf_counter() - start, get_peak_rss(), duplicates)
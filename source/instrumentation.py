@@ -0,0 +1,275 @@
+"""
+    Module that records where the time (and memory) goes, so that slow steps can be found
+    without guessing.
+
+    The expensive steps (loading a file, formatting and encoding it, each clustering iteration,
+    the rollups and the plots) are wrapped in spans. Once tracing has been started every span
+    records how long it took and the memory of the process when it finished, and the spans can
+    be saved as a JSON trace (which chrome://tracing and Perfetto can open) or summed up in a
+    table. Until then a span does nothing but check whether tracing is on.
+
+    Menu actions can also be run under cProfile, which saves a .prof file per action for when
+    a span shows that something is slow but not why.
+
+    Debug output goes through the logging module, at the level given by the SPENDING_TRACKER_LOG
+    environment variable (WARNING by default), so that it costs nothing while it is switched off.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import argparse
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+try:
+    import resource
+except ImportError:
+    # Windows doesn't have it, so memory is read with psutil there instead (if it is installed)
+    resource = None
+
+LOG_LEVEL_VARIABLE = "SPENDING_TRACKER_LOG"
+PROFILE_DIRECTORY = "../data/profiles"
+# how many of the slowest functions of a profiled action are logged
+PROFILE_TOP_FUNCTIONS = 15
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+_profiler = None
+_disabled = nullcontext()
+
+
+def configure_logging(level: str = None) -> None:
+    """sets up logging for the whole program, at level (such as "DEBUG") or the level in the
+    SPENDING_TRACKER_LOG environment variable"""
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_VARIABLE, "WARNING")
+    logging.basicConfig(level=level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def _get_memory_info():
+    """returns psutil's memory info for this process, or None if psutil isn't installed"""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info()
+
+
+def get_peak_rss() -> int:
+    """returns the peak resident memory of this process so far, in bytes. Without the resource module
+    or psutil to read it with, this is 0"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # linux reports kilobytes, macOS reports bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    memory = _get_memory_info()
+    if memory is None:
+        return 0
+    # windows keeps the peak working set, which is its peak resident memory
+    return getattr(memory, "peak_wset", memory.rss)
+
+
+def get_rss() -> int:
+    """returns the resident memory of this process right now in bytes, or None where neither /proc
+    nor psutil is available"""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, AttributeError, ValueError):
+        memory = _get_memory_info()
+        return memory.rss if memory is not None else None
+
+
+class Span:
+    """
+    Defines one timed run of a step.
+
+    Parameters:
+        name: the step that ran
+        start: when it started, in seconds since tracing started
+        seconds: how long it took
+        depth: how many spans it was inside of
+        thread: the thread it ran on
+        rss: the resident memory of the process when it finished, in bytes
+        peak_rss: the peak resident memory of the process when it finished, in bytes
+        attributes: anything else recorded with it, such as the iteration number
+    """
+
+    def __init__(self, name: str, start: float, seconds: float, depth: int, thread: int,
+                 rss: int, peak_rss: int, attributes: dict):
+        self.name = name
+        self.start = start
+        self.seconds = seconds
+        self.depth = depth
+        self.thread = thread
+        self.rss = rss
+        self.peak_rss = peak_rss
+        self.attributes = attributes
+
+
+class Tracer:
+    """
+    Collects the spans recorded while it is the active tracer (see start_tracing).
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._local.depth = depth
+            span = Span(name, start - self.origin, seconds, depth, threading.get_ident(),
+                        get_rss(), get_peak_rss(), attributes)
+            # plots are drawn on other threads
+            with self._lock:
+                self.spans.append(span)
+
+    def summary(self) -> list:
+        """returns (name, calls, total seconds, longest seconds, peak RSS bytes) for every step, slowest first"""
+        steps = {}
+        for span in self.spans:
+            calls, total, longest, peak = steps.get(span.name, (0, 0.0, 0.0, 0))
+            steps[span.name] = (calls + 1, total + span.seconds, max(longest, span.seconds), max(peak, span.peak_rss))
+        rows = [(name,) + step for name, step in steps.items()]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+
+    def report(self) -> str:
+        lines = [f"{'step':<36}{'calls':>7}{'seconds':>10}{'mean ms':>10}{'max ms':>10}{'peak MB':>9}"]
+        for name, calls, total, longest, peak in self.summary():
+            lines.append(f"{name[:36]:<36}{calls:>7}{total:>10.3f}{total / calls * 1000:>10.2f}"
+                         f"{longest * 1000:>10.2f}{peak / 2 ** 20:>9.0f}")
+        return "\n".join(lines)
+
+    def to_trace(self) -> dict:
+        """returns the spans in the Chrome trace event format"""
+        events = []
+        for span in self.spans:
+            events.append({"name": span.name, "ph": "X", "pid": os.getpid(), "tid": span.thread,
+                           "ts": span.start * 1e6, "dur": span.seconds * 1e6,
+                           "args": {**{key: str(value) for key, value in span.attributes.items()},
+                                    "rss": span.rss, "peak_rss": span.peak_rss}})
+            if span.rss is not None:
+                events.append({"name": "memory", "ph": "C", "pid": os.getpid(), "tid": span.thread,
+                               "ts": (span.start + span.seconds) * 1e6, "args": {"rss": span.rss}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, filename: str) -> None:
+        """saves the spans as a JSON trace"""
+        with open(filename, "w") as file:
+            json.dump(self.to_trace(), file)
+
+
+def start_tracing() -> Tracer:
+    """starts recording spans, returning the tracer they are recorded in"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing() -> Tracer:
+    """stops recording spans, returning the tracer they were recorded in (None if tracing wasn't on)"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """returns a context manager that times the code inside it as a step called name, if tracing is on"""
+    if _tracer is None:
+        return _disabled
+    return _tracer.span(name, **attributes)
+
+
+def traced(name: str = None):
+    """decorator that runs every call of a function inside a span, named after the function by default"""
+    def decorator(function):
+        span_name = name if name is not None else f"{function.__module__}.{function.__qualname__}"
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with _tracer.span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def set_profiling(directory: str = PROFILE_DIRECTORY) -> None:
+    """runs every menu action from now on under cProfile, saving the profiles in directory.
+    None switches profiling off again"""
+    global _profiler
+    _profiler = directory
+
+
+def run_action(name: str, function, *args, **kwargs):
+    """runs a menu action inside a span, and under cProfile too if profiling is on (see set_profiling).
+    Each profile is saved to its own file, and the slowest functions in it are logged"""
+    with span("action: " + name):
+        if _profiler is None:
+            return function(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(function, *args, **kwargs)
+        finally:
+            os.makedirs(_profiler, exist_ok=True)
+            slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+            filename = os.path.join(_profiler, f"{slug}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            profile.dump_stats(filename)
+            if logger.isEnabledFor(logging.INFO):
+                top = io.StringIO()
+                pstats.Stats(profile, stream=top).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+                logger.info("profile of %s saved to %s\n%s", name, filename, top.getvalue())
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """adds the options for logging, tracing and profiling to a command line"""
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help=f"how much to log, defaults to ${LOG_LEVEL_VARIABLE} or WARNING")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="time every step, saving a JSON trace to FILE and printing a summary when done")
+    parser.add_argument("--profile", nargs="?", const=PROFILE_DIRECTORY, metavar="DIRECTORY",
+                        help=f"run each action under cProfile, saving the profiles in DIRECTORY ({PROFILE_DIRECTORY})")
+
+
+def start(options: argparse.Namespace) -> None:
+    """switches on what the options from add_arguments asked for"""
+    configure_logging(options.log_level)
+    if options.trace is not None:
+        start_tracing()
+    if options.profile is not None:
+        set_profiling(options.profile)
+
+
+def finish(options: argparse.Namespace) -> None:
+    """saves the trace the options asked for, and prints its summary"""
+    set_profiling(None)
+    tracer = stop_tracing()
+    if tracer is not None and options.trace is not None:
+        tracer.save(options.trace)
+        print(tracer.report(), file=sys.stderr)
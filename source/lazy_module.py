@@ -0,0 +1,49 @@
+"""
+    Module that lets the slow-to-import libraries (plotting, clustering, parquet) be imported
+    the first time they are actually used rather than when the program starts, so that
+    starting the menu doesn't wait on libraries the user might never need.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import importlib
+
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is first used, at which point the
+    module is imported and everything is passed through to it.
+
+    Parameters:
+        name: the full name of the module, for example "matplotlib.pyplot"
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute: str, value):
+        # _name and _module belong to the stand-in, anything else (such as a test replacing a
+        # function) is set on the real module
+        if attribute in ("_name", "_module"):
+            object.__setattr__(self, attribute, value)
+        else:
+            setattr(self._load(), attribute, value)
+
+    def __delattr__(self, attribute: str):
+        delattr(self._load(), attribute)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._module is not None
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'{' (loaded)' if self.is_loaded else ''}>"
@@ -0,0 +1,71 @@
+"""
+    Module that cleans up the merchant names in the Details and Particulars columns before
+    they are clustered.
+
+    Bank statements put store numbers, terminal ids, card numbers and dates into the merchant
+    text, so "COUNTDOWN 123 AUCKLAND" and "COUNTDOWN 456 AUCKLAND" look like two different
+    merchants. Stripping those out leaves one name per merchant, which makes far fewer
+    categories for the clustering to deal with.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from functools import lru_cache
+import re
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER
+
+MERCHANT_COLUMNS = [HEADER.LOCATION, HEADER.PARTICULARS]
+# how many raw names to remember the clean version of. The same merchants come up over and
+# over again, so this only needs to hold about as many names as someone shops at
+MEMO_SIZE = 65536
+
+_DATES = re.compile(r"\b\d{1,2}[/.-]\d{1,2}(?:[/.-]\d{2,4})?\b")
+_PUNCTUATION = re.compile(r"[^\w&' ]+")
+_SPACES = re.compile(r"\s+")
+
+
+def is_number_like(word: str) -> bool:
+    """whether a word is mostly digits: store numbers (#123), terminal ids (T12345) and masked card
+    numbers (1234-****-****-5678), but not names with a digit in them (7-ELEVEN)"""
+    digits = sum(character.isdigit() or character == "*" for character in word)
+    return digits * 2 >= sum(character.isalnum() or character == "*" for character in word)
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def normalize_merchant(raw: str) -> str:
+    """returns the canonical form of a merchant name: upper case, without numbers, dates or punctuation.
+    A name that is nothing but numbers is kept as it is, since there is nothing else to go on"""
+    text = raw.upper()
+    text = _DATES.sub(" ", text)
+    text = " ".join(word for word in text.split() if not is_number_like(word))
+    text = _PUNCTUATION.sub(" ", text)
+    text = _SPACES.sub(" ", text).strip()
+    return text if text else _SPACES.sub(" ", raw.upper()).strip()
+
+
+def normalize_column(values: pd.Series) -> pd.Series:
+    """returns values with every merchant name normalized, as a categorical column.
+
+    Only the distinct names are normalized (through the memo in normalize_merchant), and the rows
+    are then mapped onto the clean names by their integer codes, so the work grows with the number
+    of merchants rather than the number of transactions. Missing values stay missing.
+    """
+    codes, uniques = pd.factorize(values)
+    canonical_codes, canonical = pd.factorize(np.array([normalize_merchant(str(value)) for value in uniques],
+                                                       dtype=object))
+    # code -1 (missing) picks the -1 appended on the end
+    mapped = np.append(canonical_codes, -1)[codes]
+    return pd.Series(pd.Categorical.from_codes(mapped, categories=pd.Index(canonical, dtype=object)),
+                     index=values.index, name=values.name)
+
+
+def normalize_merchants(data: pd.DataFrame) -> pd.DataFrame:
+    """returns a copy of data with its merchant columns normalized"""
+    data = data.copy()
+    for column in MERCHANT_COLUMNS:
+        if column in data.columns:
+            data[column] = normalize_column(data[column])
+    return data
@@ -0,0 +1,150 @@
+"""
+    Module that keeps fitted classification models on disk, so that classifying the same
+    statement again doesn't mean clustering it again.
+
+    Models are keyed by a fingerprint of the encoded data and the number of clusters.
+    Every file name starts with the encoding schema version, so when the encoding changes
+    the old models are simply thrown away. The least recently used files are removed once
+    the cache grows past its limits.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from classification import EncodedData, PrototypeModel, ENCODING_SCHEMA_VERSION
+
+CACHE_DIRECTORY = "../data/model_cache"
+MAX_ENTRIES = 50
+MAX_BYTES = 50 * 1024 * 1024
+# the model most recently labelled by the user, which new transactions are classified against
+LATEST_MODEL_KEY = "latest"
+
+
+def fingerprint(encoded: EncodedData, k: int = None) -> str:
+    """returns a hash of the encoded data (and the number of clusters, when given)"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(encoded.numeric).tobytes())
+    digest.update(np.ascontiguousarray(encoded.codes).tobytes())
+    for categories in encoded.categories:
+        digest.update("\x1f".join(map(str, categories)).encode())
+        digest.update(b"\x1e")
+    if k is not None:
+        digest.update(f"k={k}".encode())
+    return digest.hexdigest()
+
+
+class ModelCache:
+    """
+    A directory of saved PrototypeModels with least-recently-used eviction.
+
+    Parameters:
+        directory: where the models are kept
+        max_entries: the most files to keep
+        max_bytes: the most disk space to use
+    """
+
+    def __init__(self, directory: str = CACHE_DIRECTORY, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prefix = f"v{ENCODING_SCHEMA_VERSION}-"
+        os.makedirs(directory, exist_ok=True)
+        self._remove_stale_versions()
+
+    def get(self, key: str) -> PrototypeModel:
+        """returns the saved model for key, or None if there isn't one"""
+        path = self._path(key, "npz")
+        try:
+            with np.load(path, allow_pickle=False) as saved:
+                meta = json.loads(str(saved["meta"]))
+                model = PrototypeModel(saved["numeric_centroids"], saved["categorical_centroids"],
+                                       meta["gamma"], meta["cost"],
+                                       {int(cluster): label for cluster, label in meta["labels"].items()},
+                                       categories=[pd.Index(values) for values in meta["categories"]],
+                                       numeric_min=saved["numeric_min"], numeric_range=saved["numeric_range"],
+                                       counts=saved["counts"],
+                                       category_counts=[saved[f"category_counts_{i}"]
+                                                        for i in range(len(meta["categories"]))])
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+        self._touch(path)
+        return model
+
+    def put(self, key: str, model: PrototypeModel) -> None:
+        """saves model under key, then evicts old entries if the cache is too big"""
+        meta = {
+            "gamma": float(model.gamma),
+            "cost": float(model.cost),
+            "labels": {str(cluster): label for cluster, label in model.labels.items()},
+            "categories": [categories.tolist() for categories in model.categories],
+        }
+        category_counts = {f"category_counts_{i}": counts for i, counts in enumerate(model.category_counts)}
+        path = self._path(key, "npz")
+        # write to a temporary file first so a half-written model is never read back
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as file:
+            np.savez(file, numeric_centroids=model.numeric_centroids,
+                     categorical_centroids=model.categorical_centroids,
+                     numeric_min=model.numeric_min, numeric_range=model.numeric_range,
+                     counts=model.counts, meta=np.array(json.dumps(meta)), **category_counts)
+        os.replace(temporary, path)
+        self._evict()
+
+    def get_elbow_k(self, key: str) -> int:
+        """returns the number of clusters the elbow method chose for the data with this key, or None"""
+        path = self._path(key, "json")
+        try:
+            with open(path) as file:
+                k = json.load(file)["k"]
+        except (FileNotFoundError, KeyError, ValueError):
+            return None
+        self._touch(path)
+        return k
+
+    def put_elbow_k(self, key: str, k: int) -> None:
+        """remembers the number of clusters the elbow method chose for the data with this key"""
+        with open(self._path(key, "json"), "w") as file:
+            json.dump({"k": int(k)}, file)
+        self._evict()
+
+    def clear(self) -> None:
+        """removes every saved model"""
+        for path in glob.glob(os.path.join(self.directory, "v*-*")):
+            os.remove(path)
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{self.prefix}{key}.{extension}")
+
+    def _touch(self, path: str) -> None:
+        """marks a file as recently used"""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def _remove_stale_versions(self) -> None:
+        """removes models saved under a different encoding schema"""
+        for path in glob.glob(os.path.join(self.directory, "v*-*")):
+            if not os.path.basename(path).startswith(self.prefix):
+                os.remove(path)
+
+    def _evict(self) -> None:
+        """removes the least recently used files until the cache is within its limits"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, f"{self.prefix}*")):
+            if path.endswith(".tmp"):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            os.remove(path)
+            total -= size
@@ -0,0 +1,113 @@
+"""
+    Module that runs the clustering passes over shards of the data in a pool of processes, so
+    that every core does part of the assignment step instead of just one.
+
+    The data is copied into shared memory once, when the pool starts, and each worker maps it
+    rather than being sent a copy with every task. Results that are one value per row (such as
+    each row's cluster) are written straight into shared output arrays, and everything else is
+    returned per shard and combined in the parent, in shard order.
+
+    The shards are a fixed number of rows no matter how many workers there are, so the same
+    seed gives exactly the same result with any number of workers.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+import sys
+import numpy as np
+
+SHARD_ROWS = 65536
+
+# the arrays a worker process has mapped, by name
+_shared = {}
+_blocks = []
+
+
+def get_shards(n_rows: int, shard_rows: int = None) -> list:
+    """returns the (start, stop) rows of every shard, of shard_rows (defaults to SHARD_ROWS) each"""
+    if shard_rows is None:
+        shard_rows = SHARD_ROWS
+    return [(start, min(start + shard_rows, n_rows)) for start in range(0, n_rows, shard_rows)]
+
+
+def _attach(specs: dict) -> None:
+    """maps the shared arrays into a worker process"""
+    for name, (block_name, shape, dtype) in specs.items():
+        if sys.version_info >= (3, 13):
+            # only the parent owns the block and unlinks it
+            block = shared_memory.SharedMemory(name=block_name, track=False)
+        else:
+            # the workers share the parent's resource tracker, so attaching again is harmless
+            block = shared_memory.SharedMemory(name=block_name)
+        _blocks.append(block)
+        _shared[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _run_shard(function, start: int, stop: int, args: tuple):
+    return function(_shared, start, stop, *args)
+
+
+class ShardPool:
+    """
+    A pool of worker processes that share a set of arrays.
+
+    Parameters:
+        inputs: the arrays to share, by name. They are copied into shared memory
+        outputs: (shape, dtype) of the arrays the workers write into, by name
+        n_rows: the number of rows to split into shards
+        workers: the number of processes
+        shard_rows: the number of rows in each shard, defaults to SHARD_ROWS
+    """
+
+    def __init__(self, inputs: dict, outputs: dict, n_rows: int, workers: int, shard_rows: int = None):
+        self.blocks = []
+        self.arrays = {}
+        self.shards = get_shards(n_rows, shard_rows)
+        self.executor = None
+        specs = {}
+        try:
+            for name, array in inputs.items():
+                specs[name] = self._allocate(name, array.shape, array.dtype)
+                self.arrays[name][...] = array
+            for name, (shape, dtype) in outputs.items():
+                specs[name] = self._allocate(name, shape, np.dtype(dtype))
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,))
+        except BaseException:
+            self.close()
+            raise
+
+    def _allocate(self, name: str, shape: tuple, dtype: np.dtype) -> tuple:
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self.blocks.append(block)
+        self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        return block.name, shape, dtype
+
+    def map(self, function, *args) -> list:
+        """runs function(arrays, start, stop, *args) on every shard, where arrays are the shared arrays
+        by name. function has to be defined at module level, so that it can be sent to the workers
+
+        returns:
+            the results of every shard, in shard order
+        """
+        starts, stops = zip(*self.shards) if self.shards else ((), ())
+        return list(self.executor.map(_run_shard, repeat(function), starts, stops, repeat(args)))
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        # the views into the blocks have to go before the blocks can be closed
+        self.arrays.clear()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,241 @@
+"""
+    Module that draws the plots for the menu in a background thread, saving them as image
+    files, so that the menu can carry on while a plot is being drawn.
+
+    Long histories are thinned out before drawing: the transactions are split into buckets and
+    only the smallest and largest amount in each bucket are kept, which looks the same at
+    screen resolution but draws much faster. Drawn plots are cached by a version of the data
+    they were drawn from, so asking for the same plot again just reuses the file. The least
+    recently used files are removed once there are too many of them, as with the model cache.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import glob
+import hashlib
+import os
+import uuid
+import weakref
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, to_dollars
+from lazy_module import LazyModule
+import account_metadata
+import rollups
+import instrumentation
+
+# only the object oriented interface is used, since pyplot isn't safe to use off the main thread
+figure_module = LazyModule("matplotlib.figure")
+backend_agg = LazyModule("matplotlib.backends.backend_agg")
+
+PLOT_DIRECTORY = "../data/plots"
+# about the number of pixels across a plot, so thinning out further than this can't be seen
+MAX_BUCKETS = 1000
+FIGURE_SIZE = (10, 8)
+MAX_PLOTS = 50
+MAX_BYTES = 50 * 1024 * 1024
+
+_plotter = None
+_data_versions = {}
+
+
+def get_version(*arrays) -> str:
+    """returns a hash of the numbers (or dates) a plot is drawn from, which changes whenever they do.
+    Only used for summaries (such as weekly totals), which are much shorter than the data"""
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def get_data_version(data: pd.DataFrame) -> str:
+    """returns a version of a dataset for plots drawn from every one of its transactions, so that they
+    can be found again without looking at the transactions. It is made up the first time the dataset is
+    plotted and again once rows have been added to it (in the same way as rollups.get_cube), so a dataset
+    is drawn once per session rather than once per request"""
+    entry = _data_versions.get(id(data))
+    if entry is None or entry[0]() is not data or entry[2] != len(data):
+        forget = lambda _, key=id(data): _data_versions.pop(key, None)
+        entry = (weakref.ref(data, forget), uuid.uuid4().hex[:16], len(data))
+        _data_versions[id(data)] = entry
+    return entry[1]
+
+
+def decimate(x: np.ndarray, y: np.ndarray, buckets: int = MAX_BUCKETS) -> tuple:
+    """thins out a series (sorted by x) for drawing, keeping only the points with the smallest and
+    largest y in each of buckets equal sized runs of points, in their original order.
+
+    returns:
+        x and y with at most 2 * buckets points
+    """
+    n = len(x)
+    if n <= 2 * buckets:
+        return x, y
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    keep = np.unique(np.concatenate([offsets + np.nanargmin(blocks, axis=1),
+                                     offsets + np.nanargmax(blocks, axis=1)]))
+    return x[keep], y[keep]
+
+
+class Plotter:
+    """
+    Draws plots into image files on a background thread.
+
+    Parameters:
+        directory: where the image files are saved (and looked for when a plot is asked for again)
+        workers: how many plots can be drawn at once
+        max_plots: the most image files to keep
+        max_bytes: the most disk space to use
+    """
+
+    def __init__(self, directory: str = PLOT_DIRECTORY, workers: int = 1, max_plots: int = MAX_PLOTS,
+                 max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.pending = {}
+        self.max_plots = max_plots
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Future:
+        """returns the plot for key if it has been drawn, or is being drawn, otherwise None"""
+        filename = self._path(key)
+        try:
+            # marks the plot as recently used
+            os.utime(filename)
+        except FileNotFoundError:
+            return self.pending.get(key)
+        future = Future()
+        future.set_result(filename)
+        return future
+
+    def plot(self, key: str, draw, *args) -> Future:
+        """draws a plot in the background, unless it has already been drawn.
+
+        parameters:
+            key: identifies the plot and the data it is of, used as the file name
+            draw: a function taking a matplotlib Axes and *args that draws the plot
+        returns:
+            a Future holding the file name of the plot once it has been saved
+        """
+        future = self.get(key)
+        if future is None:
+            future = self.executor.submit(self._render, self._path(key), draw, args)
+            self.pending[key] = future
+            future.add_done_callback(lambda _: self.pending.pop(key, None))
+        return future
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".png")
+
+    @instrumentation.traced()
+    def _render(self, filename: str, draw, args: tuple) -> str:
+        figure = figure_module.Figure(figsize=FIGURE_SIZE)
+        backend_agg.FigureCanvasAgg(figure)
+        draw(figure.add_subplot(), *args)
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = filename + ".tmp.png"
+        figure.savefig(temporary)
+        os.replace(temporary, filename)
+        self._evict()
+        return filename
+
+    def _evict(self) -> None:
+        """removes the least recently used plots until the cache is within its limits"""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.png")):
+            if path.endswith(".tmp.png"):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_plots or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            os.remove(path)
+            total -= size
+
+
+def get_plotter() -> Plotter:
+    """returns the plotter the menu uses, starting it the first time it is needed"""
+    global _plotter
+    if _plotter is None:
+        _plotter = Plotter()
+    return _plotter
+
+
+def draw_series(axes, x: np.ndarray, y: np.ndarray, title: str, xlabel: str, ylabel: str, label: str) -> None:
+    """draws a line plot of y against x, thinned out first if it is long"""
+    x, y = decimate(x, y)
+    axes.plot(x, y, label=label)
+    axes.set_xlabel(xlabel)
+    axes.set_ylabel(ylabel)
+    axes.set_title(title)
+    axes.legend()
+
+
+def draw_histogram(axes, values: np.ndarray, title: str, label: str) -> None:
+    counts, edges = np.histogram(values, bins=10)
+    axes.stairs(counts, edges, fill=True, label=label)
+    axes.set_ylabel("Frequency")
+    axes.set_title(title)
+    axes.legend()
+
+
+def spending_by_time(data: pd.DataFrame, plotter: Plotter = None) -> Future:
+    """plots every transaction amount over time"""
+    plotter = plotter if plotter is not None else get_plotter()
+    key = "spending-" + get_data_version(data)
+    drawn = plotter.get(key)
+    if drawn is not None:
+        return drawn
+    dates = data[HEADER.DATE].to_numpy()
+    amounts = to_dollars(data[HEADER.QUANTITY])
+    if not data[HEADER.DATE].is_monotonic_increasing:
+        order = np.argsort(dates, kind="stable")
+        dates, amounts = dates[order], amounts[order]
+    return plotter.plot(key, draw_series, dates, amounts,
+                        "Spending over time", "Date", "Quantity", HEADER.QUANTITY)
+
+
+def balance_by_time(data: pd.DataFrame, registry: account_metadata.AccountRegistry = None,
+                    plotter: Plotter = None) -> Future:
+    """plots the balance of all of the accounts in the data together, day by day"""
+    plotter = plotter if plotter is not None else get_plotter()
+    balances = account_metadata.get_balance_index(data, registry).balance_series(
+        data[HEADER.DATE].min(), data[HEADER.DATE].max())
+    # the balances themselves are hashed, so changing an anchor balance draws the plot again
+    key = "balance-" + get_version(balances.index.to_numpy(), balances.to_numpy())
+    return plotter.plot(key, draw_series, balances.index.to_numpy(), balances.to_numpy(),
+                        "Balance over time", "Date", "Balance", balances.name)
+
+
+def weekly_spending(data: pd.DataFrame, plotter: Plotter = None) -> Future:
+    """plots the total spent each week, from the rollup cube (data can also be a view, see rollups.get_cube)"""
+    plotter = plotter if plotter is not None else get_plotter()
+    cube = rollups.get_cube(data)
+    weekly = cube.get("week")["spent"].reindex(cube.period_range("week"), fill_value=0)
+    key = "weekly-" + get_version(weekly.index.to_numpy(), weekly.to_numpy())
+    return plotter.plot(key, draw_series, weekly.index.to_numpy(), weekly.to_numpy(),
+                        "Spending by week", "Week", "Quantity", "Spent")
+
+
+def spending_quantity_by_type(data: pd.DataFrame, spend_type: str, plotter: Plotter = None) -> Future:
+    """plots a histogram of the amounts of the transactions of one type"""
+    plotter = plotter if plotter is not None else get_plotter()
+    key = "type-" + get_data_version(data) + "-" + get_version(np.frombuffer(spend_type.encode(), dtype=np.uint8))
+    drawn = plotter.get(key)
+    if drawn is not None:
+        return drawn
+    amounts = to_dollars(data.loc[data[HEADER.SPEND_TYPE] == spend_type, HEADER.QUANTITY])
+    return plotter.plot(key, draw_histogram, amounts,
+                        f"Spendings of type {spend_type}", spend_type)
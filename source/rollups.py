@@ -0,0 +1,180 @@
+"""
+    Module that pre-aggregates transactions by day, ISO week and month, so that the spending
+    summaries don't have to regroup every transaction each time they are shown.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import weakref
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, to_cents
+import instrumentation
+
+PERIODS = ["day", "week", "month"]
+CLASSIFICATION = "classification"
+# the breakdowns kept for each period. None is the total over every transaction
+DIMENSIONS = [None, HEADER.SPEND_TYPE, CLASSIFICATION]
+PERIOD_NAME = "Period"
+PERIOD_FREQUENCIES = {"day": "D", "week": "7D", "month": "MS"}
+
+_cubes = {}
+
+
+def get_period_starts(dates: pd.Series, period: str) -> np.ndarray:
+    """returns the first day of the day, ISO week (starting monday) or month each date falls in"""
+    days = dates.to_numpy().astype("datetime64[D]")
+    if period == "day":
+        return days
+    if period == "week":
+        # day 0 (1 Jan 1970) was a thursday, so mondays are the days where (day - 4) % 7 == 0
+        numbers = days.astype(np.int64)
+        return (numbers - (numbers - 4) % 7).astype("datetime64[D]")
+    if period == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    raise ValueError(f"Unknown period: {period}")
+
+
+class RollupCube:
+    """
+    Sums, counts and averages of the transactions per day, ISO week and month, both overall
+    and broken down by transaction type and classification label.
+
+    Each table is indexed by period start (and category) with the columns:
+        total: the sum of every amount
+        spent: the sum of the negative amounts only
+        count: the number of transactions
+
+    The tables add up whole cents, so totals are exact however many transactions go into them.
+    get and average_per_period give amounts in dollars.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self.tables = {}
+        self.rows = 0
+        self.append(data)
+
+    def _dimensions(self, data: pd.DataFrame) -> list:
+        return [dimension for dimension in DIMENSIONS if dimension is None or dimension in data.columns]
+
+    def _rollup(self, data: pd.DataFrame, period: str, dimension) -> pd.DataFrame:
+        amounts = to_cents(data[HEADER.QUANTITY])
+        frame = pd.DataFrame({
+            PERIOD_NAME: get_period_starts(data[HEADER.DATE], period),
+            "total": amounts,
+            "spent": np.minimum(amounts, 0),
+            "count": 1,
+        })
+        keys = [PERIOD_NAME]
+        if dimension is not None:
+            frame[dimension] = data[dimension].astype(str).to_numpy()
+            keys.append(dimension)
+        return frame.groupby(keys, sort=True).sum()
+
+    @instrumentation.traced()
+    def append(self, new_data: pd.DataFrame) -> None:
+        """adds newly imported transactions. Only the new rows are grouped; their sums and counts are
+        then added onto the existing tables"""
+        for period in PERIODS:
+            for dimension in self._dimensions(new_data):
+                rollup = self._rollup(new_data, period, dimension)
+                key = (period, dimension)
+                if key in self.tables:
+                    rollup = self.tables[key].add(rollup, fill_value=0).astype(np.int64)
+                self.tables[key] = rollup
+        self.rows += len(new_data)
+
+    @instrumentation.traced()
+    def remove(self, old_data: pd.DataFrame) -> None:
+        """takes transactions back out (such as transfers that have been cancelled). Their sums and counts
+        are taken off the existing tables, and periods left without any transactions are dropped"""
+        for period in PERIODS:
+            for dimension in self._dimensions(old_data):
+                key = (period, dimension)
+                if key in self.tables:
+                    table = self.tables[key].sub(self._rollup(old_data, period, dimension), fill_value=0).astype(np.int64)
+                    self.tables[key] = table[table["count"] > 0]
+        self.rows -= len(old_data)
+
+    def copy(self):
+        """returns a copy of the cube that can be changed without changing this one"""
+        cube = RollupCube.__new__(RollupCube)
+        cube.tables = dict(self.tables)
+        cube.rows = self.rows
+        return cube
+
+    @instrumentation.traced()
+    def add_dimension(self, data: pd.DataFrame, dimension: str) -> None:
+        """builds the tables for a breakdown that wasn't in the data when the cube was built
+        (such as a classification done afterwards)"""
+        for period in PERIODS:
+            self.tables[(period, dimension)] = self._rollup(data, period, dimension)
+
+    def has_dimension(self, dimension: str) -> bool:
+        """whether there are tables broken down by dimension"""
+        return (PERIODS[0], dimension) in self.tables
+
+    def get(self, period: str, by: str = None) -> pd.DataFrame:
+        """returns the table for a period (and breakdown) in dollars, with an added mean column"""
+        table = self.tables[(period, by)].copy()
+        table["total"] = table["total"] / 100
+        table["spent"] = table["spent"] / 100
+        table["mean"] = table["total"] / table["count"]
+        return table
+
+    def average_per_period(self, period: str, by: str, column: str = "spent") -> pd.Series:
+        """returns the average of column per period for every category, counting periods
+        in which nothing happened in that category as 0"""
+        table = self.tables[(period, by)][column].unstack(by, fill_value=0)
+        if column != "count":
+            table = table / 100
+        return table.reindex(self.period_range(period), fill_value=0).mean().sort_values()
+
+    def period_range(self, period: str) -> pd.DatetimeIndex:
+        """returns the start of every period between the first and last transaction, including empty ones"""
+        starts = self.tables[(period, None)].index
+        return pd.date_range(starts.min(), starts.max(), freq=PERIOD_FREQUENCIES[period], name=PERIOD_NAME)
+
+
+def get_cube(data: pd.DataFrame) -> RollupCube:
+    """returns the rollup cube for a dataset, building it the first time it is asked for.
+    A cube that has fallen out of date with the data (rows added, or a classification made
+    since it was built) is fixed up before being returned.
+
+    data can also be a view of a dataset or of a database (see data_view and transaction_database),
+    which are summarised by their own rollups"""
+    if not isinstance(data, pd.DataFrame):
+        return data.rollups()
+    entry = _cubes.get(id(data))
+    cube = entry[1] if entry is not None and entry[0]() is data else None
+    if cube is None or cube.rows != len(data):
+        cube = _register(data, RollupCube(data))
+    for dimension in cube._dimensions(data):
+        if (PERIODS[0], dimension) not in cube.tables:
+            cube.add_dimension(data, dimension)
+    return cube
+
+
+def _register(data: pd.DataFrame, cube: RollupCube) -> RollupCube:
+    """makes cube the rollup cube of data, for as long as data is around"""
+    _cubes[id(data)] = (weakref.ref(data, lambda _, key=id(data): _cubes.pop(key, None)), cube)
+    return cube
+
+
+def append_to_cube(data: pd.DataFrame, new_data: pd.DataFrame, combined: pd.DataFrame) -> RollupCube:
+    """registers a cube for combined (which is data with new_data added on the end), built by
+    adding new_data onto data's cube rather than grouping everything again"""
+    cube = get_cube(data).copy()
+    cube.append(new_data)
+    _register(combined, cube)
+    return get_cube(combined)
+
+
+def remove_from_cube(data: pd.DataFrame, old_data: pd.DataFrame, remaining: pd.DataFrame) -> RollupCube:
+    """registers a cube for remaining (which is data without the rows old_data), built by
+    taking old_data off data's cube rather than grouping everything again"""
+    cube = get_cube(data).copy()
+    cube.remove(old_data)
+    _register(remaining, cube)
+    return get_cube(remaining)
@@ -0,0 +1,123 @@
+"""
+    Module that labels transactions from rules before anything is clustered.
+
+    Most transactions are at merchants that have been labelled before, so they don't need
+    clustering again. There are two kinds of rule:
+        merchant rules: an exact (normalized) merchant name and its label, looked up in a dict
+        keyword rules: a word that labels any transaction with it in the Details, Particulars
+            or Code, matched by one compiled regex over all of the keywords at once
+
+    Merchant rules are learnt automatically from the labels the user picks while classifying.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER
+import merchants
+
+RULES_FILE = "../data/rules.json"
+KEYWORD_COLUMNS = [HEADER.LOCATION, HEADER.PARTICULARS, HEADER.CODE]
+
+
+class RuleSet:
+    """
+    The merchant and keyword rules, saved as a json file.
+
+    Parameters:
+        filename: where the rules are loaded from and saved to
+    """
+
+    def __init__(self, filename: str = RULES_FILE):
+        self.filename = filename
+        self.merchant_rules = {}
+        self.keyword_rules = {}
+        self._pattern = None
+        if os.path.exists(filename):
+            with open(filename) as file:
+                saved = json.load(file)
+            self.merchant_rules = saved.get("merchants", {})
+            self.keyword_rules = saved.get("keywords", {})
+
+    def __len__(self):
+        return len(self.merchant_rules) + len(self.keyword_rules)
+
+    def save(self) -> None:
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.filename, "w") as file:
+            json.dump({"merchants": self.merchant_rules, "keywords": self.keyword_rules}, file, indent=2)
+
+    def add_merchant(self, merchant: str, label: str) -> None:
+        self.merchant_rules[merchants.normalize_merchant(merchant)] = label
+
+    def add_keyword(self, keyword: str, label: str) -> None:
+        self.keyword_rules[keyword.upper()] = label
+        self._pattern = None
+
+    def get_pattern(self) -> re.Pattern:
+        """returns one regex matching any keyword as a whole word. Longer keywords come first, so the
+        most specific keyword wins when one contains another"""
+        if self._pattern is None and self.keyword_rules:
+            keywords = sorted(self.keyword_rules, key=len, reverse=True)
+            self._pattern = re.compile(r"\b(" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b")
+        return self._pattern
+
+    def _merchant_labels(self, data: pd.DataFrame) -> np.ndarray:
+        """looks up each distinct merchant once, then spreads the labels over the rows by their codes"""
+        normalized = merchants.normalize_column(data[HEADER.LOCATION])
+        labels = np.array([self.merchant_rules.get(merchant) for merchant in normalized.cat.categories] + [None],
+                          dtype=object)
+        return labels[normalized.cat.codes.to_numpy()]
+
+    def _keyword_labels(self, data: pd.DataFrame) -> np.ndarray:
+        """searches each distinct combination of the keyword columns once"""
+        columns = [column for column in KEYWORD_COLUMNS if column in data.columns]
+        text = data[columns[0]].astype(object).fillna("").astype(str)
+        for column in columns[1:]:
+            text = text + " " + data[column].astype(object).fillna("").astype(str)
+        codes, uniques = pd.factorize(text.str.upper())
+        matches = pd.Series(uniques).str.extract(self.get_pattern(), expand=False)
+        labels = np.array([self.keyword_rules.get(match) if isinstance(match, str) else None for match in matches]
+                          + [None], dtype=object)
+        return labels[codes]
+
+    def apply(self, data: pd.DataFrame) -> pd.Series:
+        """labels every transaction a rule applies to, merchant rules first.
+
+        returns:
+            the label for every row of data, or None where no rule applies
+        """
+        labels = np.full(len(data), None, dtype=object)
+        if self.merchant_rules:
+            labels = self._merchant_labels(data)
+        if self.keyword_rules:
+            unknown = pd.isna(labels)
+            labels[unknown] = self._keyword_labels(data[unknown])
+        return pd.Series(labels, index=data.index, dtype=object)
+
+    def learn(self, data: pd.DataFrame, labels: pd.Series) -> int:
+        """adds a merchant rule for every merchant whose transactions were all given the same label.
+        Merchants given different labels (a supermarket that is sometimes groceries and sometimes
+        a gift card) are left to the clustering. Cluster numbers that were never labelled are ignored.
+
+        returns:
+            the number of new rules
+        """
+        named = labels.map(lambda label: isinstance(label, str)).to_numpy(dtype=bool)
+        normalized = merchants.normalize_column(data.loc[named, HEADER.LOCATION])
+        chosen = pd.DataFrame({"merchant": normalized.to_numpy(), "label": labels[named].to_numpy()}).dropna()
+        per_merchant = chosen.groupby("merchant", observed=True)["label"].agg(["nunique", "first"])
+        unanimous = per_merchant[per_merchant["nunique"] == 1]
+        new_rules = 0
+        for merchant, label in unanimous["first"].items():
+            if merchant not in self.merchant_rules:
+                new_rules += 1
+            self.merchant_rules[merchant] = label
+        return new_rules
@@ -14,12 +14,25 @@ For example, I need to be able to dump all the data in, and then classify the di
 @date 27 Oct 2023
 """
 import pandas as pd
-import matplotlib.pyplot as plt
 import glob
 
-from transaction_structure import HEADER
-import classification as classifier
+from transaction_structure import HEADER, concat_frames, to_display
+from lazy_module import LazyModule
+import transaction_store as store
+import transaction_database as database
+import ingest
+import account_metadata
+import rollups
+import statement_merge
+import plotting
+import rules as rule_engine
 import ui_helper as ui_helper
+import instrumentation
+
+# clustering is slow to import, so it is only imported once it is used
+classifier = LazyModule("classification")
+model_cache = LazyModule("model_cache")
+
 FILENAME = "transactions-year.csv"
 
 PERSONAL_SPENDING_TYPES = ["Rent", "Bills", "Flat things",
@@ -28,64 +41,186 @@ PERSONAL_SPENDING_TYPES = ["Rent", "Bills", "Flat things",
 def get_valid_classifier_input(max_int) -> str:
     """prompts the user to enter a valid integer or '-' with value less than equal to the 
     max allowable integer"""
-    choice  = input(" : ")
-    try:
-        if choice == '-':
-            return choice
-        else:
+    while True:
+        choice = ui_helper.read_input(" : ")
+        try:
+            if choice == '-':
+                return choice
             int_choice = int(choice)
+            if int_choice < 0 or int_choice > max_int:
+                raise ValueError
             return choice
-    except ValueError:
-        print("Invalid input, please try again.")
-        return get_valid_classifier_input()
+        except ValueError:
+            print("Invalid input, please try again.")
 
 
-def prompt_for_spending_types(data):
+def prompt_for_spending_types(data, cache=None, rules=None):
     """ask user to list the types of things they spend money on.
     then perfroms k-means classification and asks the user to assign them 
 
+    Transactions that a rule already knows the label for (see rules.py) are labelled straight
+    away, and only the rest are clustered. The labels the user picks become new rules.
+    If the same data has been classified before, the saved model and labels are reused
+    instead of clustering and asking again. The saved model is looked up by all of the data
+    rather than just the rest, since the rules learnt the first time leave less of it to cluster
+    the next.
+
     parameters:
         data: the data to be classified
+        cache: the model_cache.ModelCache to use, defaults to the one in ../data
+        rules: the rules.RuleSet to use, defaults to the one in ../data
 
     returns:
         new_data, the data together with a labeled classification column
     
-    TODO: figure out how many catagories the data should be split into automatically
     TODO: add invalid input catching
     """
+    if cache is None:
+        cache = model_cache.ModelCache()
+    if rules is None:
+        rules = rule_engine.RuleSet()
+    labels = rules.apply(data)
+    unknown = labels.isna().to_numpy()
+    print(f"{len(data) - unknown.sum()} of {len(data)} transactions were labelled by the saved rules.")
+    if not unknown.any():
+        return _set_classification(data, labels)
+    remainder = data[unknown]
+    data_encoded = classifier.encode_data_sparse(data)
+
     print("Welcome to the data classification menu. Would you like to run a test for the ideal number of partitions?")
     if ui_helper.get_confirmation():
         # run elbow method, but without graph
-        k = classifier.elbow_method_for_number_clusters()
+        data_key = model_cache.fingerprint(data_encoded)
+        k = cache.get_elbow_k(data_key)
+        if k is None:
+            k = classifier.elbow_method_for_number_clusters(remainder)
+            cache.put_elbow_k(data_key, k)
     else:
         k = ui_helper.get_natural_number("How many partitions should your data be split into?")
-        
+
+    model_key = model_cache.fingerprint(data_encoded, k)
+    model = cache.get(model_key)
+    if model is not None:
+        print("This data has been classified before, so the saved labels have been used.")
+        labels[unknown] = model.label(model.encode(remainder)).to_numpy()
+        cache.put(model_cache.LATEST_MODEL_KEY, model)
+        return _set_classification(data, labels)
+
+    encoded = classifier.encode_data_sparse(remainder)
+    k = max(1, min(k, len(remainder)))
 
     print("Label the catagories of things that you spend money on (type q to stop):\n")
     catagories = []
     
-    new_data, inertia = classifier.perform_k_prototypes_clustering(data, 6)
+    model, clusters = classifier.fit_prototype_model(encoded, k, workers=classifier.get_cluster_workers(len(remainder)))
 
     mapping = {}
-    for catagory in new_data["classification"].unique():
+    for catagory in pd.unique(clusters):
         print("Please assign a label to spends that look like this:\n")
-        print(data[data["classification"] == catagory].head(15))
-        for i in range(len(catagories)):
-            print(f"{catagories[i]}: {(i)}")
+        print(to_display(remainder[clusters == catagory].head(15)))
         for i in range(len(catagories)):
             print(f"{catagories[i]}: ({i})")
         print("New: (-)")
-        choice = get_valid_classifier_input()
+        choice = get_valid_classifier_input(len(catagories) - 1)
         if choice == "-":
-            catagories.append(input("enter a new catagory: "))
+            catagories.append(ui_helper.read_input("enter a new catagory: "))
             mapping[catagory] = catagories[-1]
         else:
             choice = int(choice)
             mapping[catagory] = catagories[choice]
     
-    new_data["classification"] = new_data["classification"].replace(mapping)
+    labels[unknown] = pd.Series(clusters).map(mapping).to_numpy()
+    model.labels = {int(cluster): label for cluster, label in mapping.items()}
+    cache.put(model_key, model)
+    cache.put(model_cache.LATEST_MODEL_KEY, model)
+    new_rules = rules.learn(remainder, labels[unknown])
+    rules.save()
+    print(f"{new_rules} merchants will be labelled automatically from now on.")
+
+    return _set_classification(data, labels)
+
+
+def _set_classification(data, labels):
+    """adds the classification column to data, and to its rollup cube"""
+    data["classification"] = labels.to_numpy()
+    rollups.get_cube(data).add_dimension(data, rollups.CLASSIFICATION)
+    return data
+
+
+def classify_new_transactions(data, new_data, cache=None, rules=None):
+    """classifies newly imported transactions against the most recently labelled classification,
+    so that only the new rows need to be looked at. Rows a rule applies to are labelled by the rule.
+    If there is no saved classification, or the new transactions don't fit it, everything is
+    classified from scratch instead.
+
+    parameters:
+        data: the transactions that have already been classified
+        new_data: the newly imported transactions
+        cache: the model_cache.ModelCache to use, defaults to the one in ../data
+        rules: the rules.RuleSet to use, defaults to the one in ../data
+
+    returns:
+        the old and new transactions together, with a labeled classification column
+    """
+    if cache is None:
+        cache = model_cache.ModelCache()
+    if rules is None:
+        rules = rule_engine.RuleSet()
+    model = cache.get(model_cache.LATEST_MODEL_KEY)
+    if model is None:
+        print("There is no saved classification to build on, so all of the data needs classifying.")
+        return prompt_for_spending_types(concat_frames([data, new_data]), cache, rules)
+
+    labels = rules.apply(new_data)
+    unknown = labels.isna().to_numpy()
+    if unknown.any():
+        model_labels, drifted = classifier.classify_incrementally(model, new_data[unknown])
+        if drifted:
+            print("The new transactions don't fit the existing catagories very well, so all of the data needs reclassifying.")
+            return prompt_for_spending_types(concat_frames([data, new_data]), cache, rules)
+        labels[unknown] = model_labels.to_numpy()
+
+    new_data = new_data.assign(classification=labels.to_numpy())
+    cache.put(model_cache.LATEST_MODEL_KEY, model)
+    combined = concat_frames([data, new_data])
+    rollups.append_to_cube(data, new_data, combined)
+    return combined
+
 
-    return new_data
+def combine_data(data, other, cancel: bool = True, cache=None, rules=None):
+    """adds the transactions of another statement onto the end of data, leaving out the ones data
+    already has where the statements overlap. Only the new transactions are added to the rollups and
+    balance index of data, and only the cancelled transfers are taken off the rollups again. If data
+    has been classified the new transactions are classified against its classification (see
+    classify_new_transactions) rather than everything being classified again.
+
+    parameters:
+        data: the transactions being looked at
+        other: the transactions of the other statement
+        cancel: cancel out the transfers between the accounts afterwards
+        cache: the model_cache.ModelCache to use, defaults to the one in ../data
+        rules: the rules.RuleSet to use, defaults to the one in ../data
+
+    returns:
+        the combined transactions
+    """
+    new_data = statement_merge.get_new_transactions(data, other)
+    if rollups.CLASSIFICATION in data.columns:
+        combined = classify_new_transactions(data, new_data, cache, rules)
+    else:
+        combined = concat_frames([data, new_data])
+        rollups.append_to_cube(data, new_data, combined)
+    if HEADER.ACCOUNT in data.columns:
+        account_metadata.append_to_balance_index(data, new_data, combined)
+    if cancel:
+        # the cancelled transfers are taken back off the rollups, but the balances still include them
+        transfers = statement_merge.get_transfer_rows(combined)
+        if len(transfers):
+            cancelled = statement_merge.cancel_transfers(combined, transfers=transfers)
+            rollups.remove_from_cube(combined, combined.iloc[transfers], cancelled)
+            account_metadata.keep_balance_index(combined, cancelled)
+            combined = cancelled
+    return combined
 
 
 def get_spending_types(data):
@@ -106,39 +241,68 @@ def get_total_spending_per_day(data):
         data: The data to be analysed
     returns:
         a new dataset of the form date, quantity which describes how much was spent on any set day"""
-    daily_spendings = data.groupby(HEADER.DATE)[HEADER.QUANTITY].sum().to_frame()
+    daily_spendings = rollups.get_cube(data).get("day")["total"].rename(HEADER.QUANTITY).to_frame()
     daily_spendings.index.name = HEADER.DATE
     daily_spendings.reset_index(inplace=True)
     return daily_spendings
 
 
+def show_plot(plot) -> None:
+    """tells the user where a plot that is being drawn in the background will be saved"""
+    if plot.done():
+        print(f"The plot has been saved to {plot.result()}")
+    else:
+        print("The plot is being drawn in the background, and will be saved to "
+              f"{plotting.get_plotter().directory} when it's done")
+
 def plot_spending_by_time(data):
     """
     Takes in a set of data, and plots the spending of it by time
     """
-    data.set_index(HEADER.DATE, inplace=True)
-    data[HEADER.QUANTITY].plot(figsize=(10, 8), legend=True)
-    plt.xlabel("Date")
-    plt.ylabel("Quantity")
-    plt.axes = True
-    plt.title("Spending over time")
-    plt.show()
+    show_plot(plotting.spending_by_time(data))
+
+def plot_balance_by_time(data):
+    """
+    Plots the balance of all of the accounts in the data together, day by day.
+    Balances are anchored on the balances saved with "Add metadata"
+    """
+    show_plot(plotting.balance_by_time(data))
 
 def display_weekly_spending(data):
-    """displays a time series that displays spending by week"""
-    pass
+    """displays a time series that displays spending by week, along with the average
+    spent per week on each type of transaction (and each catagory, if the data is classified).
+    data can be a dataset or a view of one, and a view of a database is summed by the database"""
+    cube = rollups.get_cube(data)
+    print("Average spent per week by transaction type:")
+    print(cube.average_per_period("week", HEADER.SPEND_TYPE).to_string())
+    if cube.has_dimension(rollups.CLASSIFICATION):
+        print("\nAverage spent per week by catagory:")
+        print(cube.average_per_period("week", rollups.CLASSIFICATION).to_string())
+
+    show_plot(plotting.weekly_spending(data))
 
 def save_data(data: pd.DataFrame) -> None:
-    """saves a data file as a .csv file for easy retreval at a later date"""
-    filename = "../data/" + input("Please enter the name your file should be saved as: ") + ".csv"
+    """saves a data file to the transaction store for quick retreval at a later date.
+    Entering a name ending in .csv saves a plain .csv file instead, and a name ending in .db
+    saves a database that can be sectioned without loading it (see transaction_database)"""
+    name = ui_helper.read_input("Please enter the name your file should be saved as: ")
+    if name.endswith(".csv"):
+        filename = "../data/" + name
+        save = to_display(data).to_csv
+    elif name.endswith("." + database.DATABASE_EXTENSION):
+        filename = "../data/" + name
+        save = lambda filename: database.save_database(data, filename)
+    else:
+        filename = "../data/" + name + "." + store.STORE_EXTENSION
+        save = lambda filename: store.save_store(data, filename)
     file_exists = glob.glob(filename)
     if not file_exists:
-        data.to_csv(filename)
+        save(filename)
         print("File saved!")
     else:
         print("This file already exists! Are you sure you want to replace it?")
         if ui_helper.get_confirmation():
-            data.to_csv(filename)
+            save(filename)
             print("File saved!")
     return
 
@@ -153,21 +317,22 @@ def display_spending_quantity_by_type(data, spend_type):
     data: pandas Dataframe
     spend_type: String
     """
-    data.loc[data[HEADER.SPEND_TYPE] == spend_type, HEADER.QUANTITY].plot(kind="hist", figsize=(10,8),
-                                                                    title=f"Spendings of type {spend_type}",
-                                                                    legend=True,
-                                                                    label=spend_type)
+    show_plot(plotting.spending_quantity_by_type(data, spend_type))
 
 def display_general_info(data):
     """funciton that prints information about a csv spending file""" 
     print(data.info())
-    print(data.head())
+    print(to_display(data.head()))
 
     spending_types = data[HEADER.SPEND_TYPE].unique()
     print(f"The types of purchases you made were: \n {spending_types}")
 
+@instrumentation.traced()
 def format_data(data: pd.DataFrame) -> pd.DataFrame:
-    """formats inputted data into a more usable format"""
+    """formats inputted data into a more usable format: dates are parsed, and the transactions
+    are put in date order (oldest first) so that date ranges can be found with a binary search"""
 
-    data[HEADER.DATE] = pd.to_datetime(data[HEADER.DATE], dayfirst=True)
+    data[HEADER.DATE] = ingest.parse_statement_dates(data[HEADER.DATE])
+    if not data[HEADER.DATE].is_monotonic_increasing:
+        data = data.sort_values(HEADER.DATE, kind="stable", ignore_index=True)
     return data
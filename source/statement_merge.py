@@ -0,0 +1,136 @@
+"""
+    Module that combines statements from several files and accounts into one dataset.
+
+    Statements downloaded at different times overlap, so transactions that appear in more
+    than one file of the same account are only kept once. Transfers between the accounts
+    (money leaving one account and arriving in another within a few days) can be
+    cancelled out, since they aren't really spending.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, concat_frames, to_cents
+import ingest
+import dedup_index
+
+# how many days apart the two halves of a transfer can be
+TRANSFER_WINDOW_DAYS = 3
+
+
+def load_statements(filenames: list, workers: int = None) -> list:
+    """loads several statement files at once in a thread pool, returning them in the same order"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(ingest.load_statement, filenames))
+
+
+def get_cents(amounts: pd.Series) -> np.ndarray:
+    """returns amounts as whole cents so they can be compared exactly"""
+    return to_cents(amounts)
+
+
+def remove_overlaps(frames: list) -> pd.DataFrame:
+    """combines statements, keeping each transaction of an account only once when the statements overlap.
+
+    Transactions are identified by their fingerprint (see dedup_index), the same one that ingest_statement
+    checks imports against. Identical transactions within one file are all genuine (two coffees on the
+    same day), so the n-th copy in a file is only dropped if an earlier file already had an n-th copy.
+    """
+    keyed = []
+    for file_number, frame in enumerate(frames):
+        keys = dedup_index.fingerprint(frame)
+        keyed.append(pd.DataFrame({"key": keys, "occurrence": dedup_index.get_occurrences(keys),
+                                   "file": file_number, "row": np.arange(len(frame))}))
+    index = pd.concat(keyed, ignore_index=True)
+    kept = index[~index.duplicated(subset=["key", "occurrence"])]
+
+    combined = concat_frames([frames[file_number].iloc[rows["row"].to_numpy()]
+                              for file_number, rows in kept.groupby("file", sort=True)])
+    return combined.sort_values(HEADER.DATE, kind="stable", ignore_index=True)
+
+
+def get_new_transactions(data: pd.DataFrame, new_data: pd.DataFrame) -> pd.DataFrame:
+    """returns the transactions of new_data that data doesn't already have, deciding which are the
+    same transaction the way remove_overlaps does"""
+    index = dedup_index.DedupIndex()
+    index.add(data)
+    return new_data[index.add(new_data)].reset_index(drop=True)
+
+
+def match_transfers(data: pd.DataFrame, window_days: int = TRANSFER_WINDOW_DAYS) -> pd.DataFrame:
+    """finds transfers between accounts: a payment out of one account matched with a payment of the same
+    amount into a different account, no more than window_days apart. Each transaction is matched at most
+    once, preferring the closest dates.
+
+    Candidates are found with a hash join on (amount in cents, day) against the incoming payments shifted by
+    every offset in the window, so the work grows with the number of transactions rather than its square.
+
+    returns:
+        a frame of matched (outgoing, incoming) row positions in data
+    """
+    cents = get_cents(data[HEADER.QUANTITY])
+    days = data[HEADER.DATE].to_numpy().astype("datetime64[D]").astype(np.int64)
+    accounts = data[HEADER.ACCOUNT].astype(str).to_numpy()
+    positions = np.arange(len(data))
+
+    outgoing = pd.DataFrame({"cents": -cents, "day": days, "account": accounts, "outgoing": positions})[cents < 0]
+    incoming = pd.DataFrame({"cents": cents, "day": days, "account": accounts, "incoming": positions})[cents > 0]
+
+    candidates = []
+    for offset in range(-window_days, window_days + 1):
+        shifted = incoming.assign(day=incoming["day"] - offset)
+        pairs = outgoing.merge(shifted, on=["cents", "day"], suffixes=("_out", "_in"))
+        pairs = pairs[pairs["account_out"] != pairs["account_in"]]
+        candidates.append(pairs[["outgoing", "incoming"]].assign(gap=abs(offset)))
+    candidates = pd.concat(candidates, ignore_index=True).sort_values(["gap", "outgoing", "incoming"], kind="stable")
+
+    used_outgoing = set()
+    used_incoming = set()
+    matches = []
+    for out_position, in_position in zip(candidates["outgoing"].to_numpy(), candidates["incoming"].to_numpy()):
+        if out_position not in used_outgoing and in_position not in used_incoming:
+            used_outgoing.add(out_position)
+            used_incoming.add(in_position)
+            matches.append((out_position, in_position))
+    return pd.DataFrame(matches, columns=["outgoing", "incoming"], dtype=np.int64)
+
+
+def get_transfer_rows(data: pd.DataFrame, window_days: int = TRANSFER_WINDOW_DAYS) -> np.ndarray:
+    """returns the sorted row positions in data of both halves of every transfer between accounts"""
+    matches = match_transfers(data, window_days)
+    return np.sort(np.concatenate([matches["outgoing"].to_numpy(), matches["incoming"].to_numpy()]))
+
+
+def cancel_transfers(data: pd.DataFrame, window_days: int = TRANSFER_WINDOW_DAYS,
+                     transfers: np.ndarray = None) -> pd.DataFrame:
+    """removes both halves of every transfer between accounts. data itself is given back when there
+    aren't any, so that whatever has been worked out for it (such as its rollups) is kept.
+
+    parameters:
+        transfers: the row positions of the transfers in data, when they have already been found
+            (see get_transfer_rows)
+    """
+    if transfers is None:
+        transfers = get_transfer_rows(data, window_days)
+    if len(transfers) == 0:
+        return data
+    keep = np.ones(len(data), dtype=bool)
+    keep[transfers] = False
+    return data[keep].reset_index(drop=True)
+
+
+def merge_frames(frames: list, cancel: bool = True, window_days: int = TRANSFER_WINDOW_DAYS) -> pd.DataFrame:
+    """combines already loaded statements, removing overlaps and (optionally) transfers between accounts"""
+    combined = remove_overlaps(frames)
+    if cancel:
+        combined = cancel_transfers(combined, window_days)
+    return combined
+
+
+def merge_statements(filenames: list, workers: int = None, cancel: bool = True,
+                     window_days: int = TRANSFER_WINDOW_DAYS) -> pd.DataFrame:
+    """loads and combines statement files, see merge_frames"""
+    return merge_frames(load_statements(filenames, workers), cancel, window_days)
@@ -0,0 +1,308 @@
+"""
+    Module that keeps transactions in a local SQLite database, so that sections of a long
+    history and the sums over them can be worked out by the database instead of loading
+    every transaction into pandas first.
+
+    The table has one column per column of a statement (see transaction_structure), with
+    amounts kept as whole cents and dates as ISO text, which sorts and groups the same way
+    the dates do. Inserts are batched with executemany inside a single transaction, and the
+    database runs in WAL mode so that reading it doesn't wait on a write.
+
+    A DatabaseView is a section of the database, in the same way that a data_view.DataView is a
+    section of a dataset: it is only the WHERE clause picking out its rows, and its rows are only
+    loaded when something needs them.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from collections import OrderedDict
+from contextlib import nullcontext
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+
+from transaction_structure import HEADER, SCHEMA, CENTS_COLUMNS, apply_schema, to_cents
+import data_view
+import dedup_index
+import rollups
+import instrumentation
+
+DATABASE_EXTENSION = "db"
+TABLE = "transactions"
+CLASSIFICATION = "classification"
+INSERT_BATCH_ROWS = 50_000
+DATE_FORMAT = "%Y-%m-%d"
+
+# the SQLite type of each column type in transaction_structure.SCHEMA
+SQL_TYPES = {
+    "category": "TEXT",
+    "str": "TEXT",
+    "int64": "INTEGER NOT NULL",
+    "Int64": "INTEGER",
+    "Float64": "REAL",
+}
+# one column for every column of a statement, in the same order, and then the classification label.
+# Dates are kept as ISO text
+COLUMN_TYPES = {column: "TEXT NOT NULL" if column == HEADER.DATE else SQL_TYPES[SCHEMA[column]]
+                for name, column in vars(HEADER).items() if not name.startswith("_")}
+COLUMN_TYPES[CLASSIFICATION] = "TEXT"
+COLUMNS = list(COLUMN_TYPES)
+INDEXES = {
+    "account_date": (HEADER.ACCOUNT, HEADER.DATE),
+    "date": (HEADER.DATE,),
+    "type": (HEADER.SPEND_TYPE,),
+    "classification": (CLASSIFICATION,),
+}
+# the first day of the day, ISO week (starting monday) or month of a date. %w counts from sunday
+PERIOD_EXPRESSIONS = {
+    "day": f'"{HEADER.DATE}"',
+    "week": f"""date("{HEADER.DATE}", '-' || ((CAST(strftime('%w', "{HEADER.DATE}") AS INTEGER) + 6) % 7) || ' days')""",
+    "month": f"""strftime('%Y-%m-01', "{HEADER.DATE}")""",
+}
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def to_sql_values(data: pd.DataFrame, column: str) -> list:
+    """returns the values of one column the way they are stored: dates as ISO text, amounts as
+    whole cents, and missing values as None (NULL)"""
+    if column not in data.columns:
+        return [None] * len(data)
+    values = data[column]
+    if column == HEADER.DATE:
+        days = pd.to_datetime(values).to_numpy().astype("datetime64[D]")
+        return np.datetime_as_string(days).tolist()
+    missing = values.isna().to_numpy()
+    if column in CENTS_COLUMNS:
+        values = to_cents(values.fillna(0)) if missing.any() else to_cents(values)
+    elif column == HEADER.FOREIGN:
+        values = values.to_numpy(dtype=np.float64, na_value=0)
+    else:
+        values = values.astype(str)
+    return [None if gap else value for value, gap in zip(values.tolist(), missing)]
+
+
+def to_where(clauses: tuple) -> str:
+    return " WHERE " + " AND ".join(f"({clause})" for clause in clauses) if clauses else ""
+
+
+class TransactionDatabase:
+    """
+    A SQLite database of transactions.
+
+    Parameters:
+        filename: the database file, which is made (with its table and indexes) if it doesn't exist
+        create: if False, opening a database that doesn't exist raises FileNotFoundError instead
+    """
+
+    def __init__(self, filename: str, create: bool = True):
+        if not create and not os.path.exists(filename):
+            raise FileNotFoundError(filename)
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # with WAL, a commit is only synced at checkpoints, which is safe against everything but a power cut
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{quote(column)} {sql_type}" for column, sql_type in COLUMN_TYPES.items())
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} ({columns})")
+            for name, columns in INDEXES.items():
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_{name} ON {TABLE} "
+                                        f"({', '.join(quote(column) for column in columns)})")
+
+    def insert(self, data: pd.DataFrame, replace: bool = False, commit: bool = True) -> int:
+        """adds the transactions in data, all in one transaction so that a failure part way through
+        leaves the database as it was. Columns the table doesn't have are ignored.
+
+        parameters:
+            data: the transactions to add
+            replace: delete every transaction already in the database first
+            commit: commit them straight away. Otherwise they are committed (or rolled back) along with
+                everything else the caller adds, such as the rest of a statement being imported
+
+        returns:
+            the number of transactions added
+        """
+        statement = (f"INSERT INTO {TABLE} ({', '.join(quote(column) for column in COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * len(COLUMNS))})")
+        data = apply_schema(data)
+        with self.connection if commit else nullcontext():
+            if replace:
+                self.connection.execute(f"DELETE FROM {TABLE}")
+            for start in range(0, len(data), INSERT_BATCH_ROWS):
+                batch = data.iloc[start:start + INSERT_BATCH_ROWS]
+                self.connection.executemany(statement, zip(*(to_sql_values(batch, column) for column in COLUMNS)))
+        return len(data)
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        return self.connection.execute(sql, params).fetchall()
+
+    def load(self, where: tuple = (), params: tuple = (), columns: list = None) -> pd.DataFrame:
+        """loads the transactions matching the where clauses (every transaction by default), in date order,
+        with the types in transaction_structure.SCHEMA. A classification column that is empty is left out"""
+        columns = COLUMNS if columns is None else columns
+        cursor = self.connection.execute(
+            f"SELECT {', '.join(quote(column) for column in columns)} FROM {TABLE}{to_where(where)} "
+            f'ORDER BY "{HEADER.DATE}", rowid', params)
+        rows = cursor.fetchall()
+        data = pd.DataFrame({column: pd.Series([row[i] for row in rows], dtype=object)
+                             for i, column in enumerate(columns)})
+        if HEADER.DATE in data.columns:
+            data[HEADER.DATE] = pd.to_datetime(data[HEADER.DATE], format=DATE_FORMAT)
+        for column in CENTS_COLUMNS:
+            # the amounts are already in cents, so they are made integers before apply_schema sees them
+            if column in data.columns:
+                data[column] = data[column].astype("Int64")
+        if HEADER.FOREIGN in data.columns:
+            data[HEADER.FOREIGN] = data[HEADER.FOREIGN].astype("Float64")
+        if CLASSIFICATION in data.columns and data[CLASSIFICATION].isna().all():
+            data = data.drop(columns=CLASSIFICATION)
+        return apply_schema(data, in_dollars=False)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def save_database(data: pd.DataFrame, filename: str) -> None:
+    """saves data to a database file, replacing whatever was in it (and deleting its dedup index)"""
+    with TransactionDatabase(filename) as database:
+        database.insert(data, replace=True)
+    dedup_index.delete_index(filename)
+
+
+def load_database(filename: str) -> pd.DataFrame:
+    """loads every transaction in a database file"""
+    with TransactionDatabase(filename, create=False) as database:
+        return database.load()
+
+
+class DatabaseView:
+    """
+    A section of a database, stored as the conditions its rows satisfy. It has the same methods
+    as data_view.DataView, so the menus can section either one, but filtering and summing happen
+    in the database, using its indexes.
+
+    Parameters:
+        database: the database the view is of
+        where: SQL conditions that the view's rows satisfy, all of them
+        params: the values of the ? placeholders in where, in order
+    """
+
+    def __init__(self, database: TransactionDatabase, where: tuple = (), params: tuple = ()):
+        self.database = database
+        self.where = where
+        self.params = params
+        self._children = OrderedDict()
+        self._length = None
+
+    def __len__(self):
+        if self._length is None:
+            self._length = self.database.query(f"SELECT COUNT(*) FROM {TABLE}{to_where(self.where)}", self.params)[0][0]
+        return self._length
+
+    def column(self, name: str) -> np.ndarray:
+        """returns the values of one column for the rows in the view, in date order"""
+        return self.database.load(self.where, self.params, columns=[name])[name].to_numpy()
+
+    def _child(self, key: tuple, clause: str, params: tuple):
+        child = self._children.get(key)
+        if child is None:
+            child = DatabaseView(self.database, self.where + (clause,), self.params + tuple(params))
+            self._children[key] = child
+            if len(self._children) > data_view.MAX_CHILDREN:
+                self._children.popitem(last=False)[1].release()
+        else:
+            self._children.move_to_end(key)
+        return child
+
+    def filter(self, predicate: data_view.Predicate):
+        """returns a view of the rows of this view that satisfy predicate. Predicates that can't be
+        written as SQL are worked out on the loaded rows instead, giving a data_view.DataView"""
+        if predicate.sql is None:
+            return data_view.DataView(self.frame()).filter(predicate)
+        clause, params = predicate.sql
+        return self._child(predicate.key, clause, params)
+
+    def between_dates(self, start_date, end_date):
+        """returns a view of the rows of this view between start_date and end_date (inclusive)"""
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        return self._child(("dates", start, end), f'"{HEADER.DATE}" BETWEEN ? AND ?',
+                           (start.strftime(DATE_FORMAT), end.strftime(DATE_FORMAT)))
+
+    def date_span(self) -> tuple:
+        """returns the first and last date in the view"""
+        first, last = self.database.query(
+            f'SELECT MIN("{HEADER.DATE}"), MAX("{HEADER.DATE}") FROM {TABLE}{to_where(self.where)}', self.params)[0]
+        if first is None:
+            return None, None
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def frame(self) -> pd.DataFrame:
+        """returns the rows of the view as a dataset, loaded from the database"""
+        return self.database.load(self.where, self.params)
+
+    def rollups(self):
+        return DatabaseRollups(self)
+
+    def release(self) -> None:
+        """the rows of a database view are loaded afresh each time, so there is nothing kept to let go of"""
+        pass
+
+
+class _RollupTables(dict):
+    """the rollup tables of a view, each one summed by the database the first time it is asked for"""
+
+    def __init__(self, view: DatabaseView):
+        super().__init__()
+        self.view = view
+
+    @instrumentation.traced()
+    def __missing__(self, key: tuple) -> pd.DataFrame:
+        period, dimension = key
+        keys = [f"{PERIOD_EXPRESSIONS[period]} AS {quote(rollups.PERIOD_NAME)}"]
+        if dimension is not None:
+            keys.append(quote(dimension))
+        rows = self.view.database.query(
+            f'SELECT {", ".join(keys)}, SUM("{HEADER.QUANTITY}"), SUM(MIN("{HEADER.QUANTITY}", 0)), COUNT(*) '
+            f"FROM {TABLE}{to_where(self.view.where)} GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))} "
+            f"ORDER BY {', '.join(str(i + 1) for i in range(len(keys)))}", self.view.params)
+        names = [rollups.PERIOD_NAME] + ([dimension] if dimension is not None else [])
+        table = pd.DataFrame(rows, columns=names + ["total", "spent", "count"])
+        # the same day resolution as rollups.get_period_starts
+        table[rollups.PERIOD_NAME] = np.array(table[rollups.PERIOD_NAME].tolist(), dtype="datetime64[D]")
+        if dimension is not None:
+            table[dimension] = table[dimension].astype(str)
+        table = table.astype({"total": np.int64, "spent": np.int64, "count": np.int64}).set_index(names)
+        self[key] = table
+        return table
+
+
+class DatabaseRollups(rollups.RollupCube):
+    """
+    The rollup tables of a DatabaseView, in the same form as a rollups.RollupCube, but summed
+    with GROUP BY in the database instead of from the loaded transactions.
+
+    Parameters:
+        view: the view to summarise
+    """
+
+    def __init__(self, view: DatabaseView):
+        self.view = view
+        self.tables = _RollupTables(view)
+        self.rows = len(view)
+
+    def has_dimension(self, dimension: str) -> bool:
+        if dimension in (None, HEADER.SPEND_TYPE):
+            return True
+        clauses = self.view.where + (f"{quote(dimension)} IS NOT NULL",)
+        return bool(self.view.database.query(f"SELECT EXISTS (SELECT 1 FROM {TABLE}{to_where(clauses)})",
+                                             self.view.params)[0][0])
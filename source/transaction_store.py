@@ -0,0 +1,201 @@
+"""
+    Module that saves and loads transactions in a typed, columnar store (parquet files).
+
+    Unlike the csv files, the store keeps dates as timestamps and the low-cardinality
+    text columns as dictionary-encoded categories, so loading it needs no parsing, and
+    reads can pick out just the columns and dates that are needed.
+
+    A store is a directory of parquet files (a parquet dataset), one for each time transactions
+    were added to it, so that adding a statement only writes the new transactions instead of
+    the whole history again. Stores saved as a single file are still read, and are turned into
+    a directory the first time something is added to them.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+from __future__ import annotations
+import os
+import re
+import shutil
+import pandas as pd
+
+from transaction_structure import HEADER, apply_schema
+import dedup_index
+from lazy_module import LazyModule
+
+# pyarrow is only imported once a store file is actually read or written
+pa = LazyModule("pyarrow")
+pq = LazyModule("pyarrow.parquet")
+
+STORE_EXTENSION = "parquet"
+CLASSIFICATION = "classification"
+# small enough row groups that a date filter can skip most of a multi-year history
+ROW_GROUP_SIZE = 100_000
+PART_NAME = "part-{:05d}.parquet"
+PART_PATTERN = re.compile(r"part-(\d+)\.parquet")
+
+
+def to_store_types(data: pd.DataFrame) -> pd.DataFrame:
+    """returns a copy of data with the column types the store uses, which are the ones in
+    transaction_structure.SCHEMA"""
+    data = apply_schema(data)
+    if not pd.api.types.is_datetime64_any_dtype(data[HEADER.DATE]):
+        data[HEADER.DATE] = pd.to_datetime(data[HEADER.DATE], dayfirst=True)
+    if CLASSIFICATION in data.columns and data[CLASSIFICATION].dtype == object:
+        # labelled and unlabelled clusters can be mixed, and parquet needs one type per column
+        data[CLASSIFICATION] = data[CLASSIFICATION].astype(str).astype("category")
+    return data
+
+
+def to_table(data: pd.DataFrame) -> pa.Table:
+    """converts data into an arrow table with the store's column types. Categories always get int32
+    dictionary indices, since pandas picks the smallest index type that fits and files written
+    at different times need to agree"""
+    table = pa.Table.from_pandas(to_store_types(data), preserve_index=False)
+    fields = []
+    for field in table.schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+        fields.append(field)
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    """returns table with exactly the columns and types in schema, filling any missing columns with nulls"""
+    columns = []
+    for field in schema:
+        if field.name in table.column_names:
+            columns.append(table[field.name].cast(field.type))
+        else:
+            columns.append(pa.nulls(len(table), field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def get_parts(filename: str) -> list:
+    """returns the files a store is made of, oldest first. A store saved as a single file is its own only part"""
+    if not os.path.isdir(filename):
+        return [filename] if os.path.exists(filename) else []
+    return sorted(os.path.join(filename, name) for name in os.listdir(filename) if PART_PATTERN.fullmatch(name))
+
+
+def delete_store(filename: str) -> None:
+    """deletes a store, whether it is a directory or a single file"""
+    if os.path.isdir(filename):
+        shutil.rmtree(filename)
+    elif os.path.exists(filename):
+        os.remove(filename)
+
+
+def save_store(data: pd.DataFrame, filename: str) -> None:
+    """saves data as a new store, replacing any store already called filename. The transactions are
+    sorted by date, so that date filters can skip whole row groups. The dedup index of a store that is
+    replaced is deleted with it, since it no longer says what the store holds"""
+    data = data.sort_values(HEADER.DATE, kind="stable")
+    temporary = filename + ".tmp"
+    delete_store(temporary)
+    os.makedirs(temporary)
+    pq.write_table(to_table(data), os.path.join(temporary, PART_NAME.format(0)), compression="zstd",
+                   row_group_size=ROW_GROUP_SIZE)
+    delete_store(filename)
+    dedup_index.delete_index(filename)
+    os.replace(temporary, filename)
+
+
+def convert_store(filename: str) -> None:
+    """turns a store saved as a single file into a directory with that file as its first part.
+    Stores saved before amounts were kept in cents are converted to cents as well (a row group at a
+    time), since every part of a store has to have the same column types"""
+    if not os.path.isfile(filename):
+        return
+    temporary = filename + ".tmp"
+    delete_store(temporary)
+    os.makedirs(temporary)
+    part = os.path.join(temporary, PART_NAME.format(0))
+    existing = pq.ParquetFile(filename)
+    if pd.api.types.is_integer_dtype(existing.schema_arrow.field(HEADER.QUANTITY).type.to_pandas_dtype()):
+        existing.close()
+        os.replace(filename, part)
+    else:
+        with pq.ParquetWriter(part, to_table(existing.read_row_group(0).to_pandas()).schema,
+                              compression="zstd") as writer:
+            for group in range(existing.num_row_groups):
+                writer.write_table(conform(to_table(existing.read_row_group(group).to_pandas()), writer.schema))
+        existing.close()
+        os.remove(filename)
+    os.replace(temporary, filename)
+
+
+class PartWriter:
+    """
+    Adds transactions to a store as a new part, a table at a time, creating the store if there
+    isn't one yet. The part is written under a hidden name, which reading the store skips, and
+    only takes its real name when the writer is closed, so an append that fails part way through
+    leaves the store as it was. Used as a context manager, the part is thrown away if anything
+    inside the with block raises.
+
+    Parameters:
+        filename: the store to add to
+    """
+
+    def __init__(self, filename: str):
+        convert_store(filename)
+        os.makedirs(filename, exist_ok=True)
+        parts = get_parts(filename)
+        # new parts are written with the columns of the first, so that every part agrees
+        self.schema = pq.read_schema(parts[0]) if parts else None
+        number = int(PART_PATTERN.fullmatch(os.path.basename(parts[-1])).group(1)) + 1 if parts else 0
+        self.filename = os.path.join(filename, PART_NAME.format(number))
+        self.temporary = os.path.join(filename, "." + PART_NAME.format(number))
+        self.writer = None
+        self.rows = 0
+
+    def write(self, data: pd.DataFrame) -> None:
+        if len(data) == 0:
+            return
+        table = to_table(data)
+        if self.schema is None:
+            self.schema = table.schema
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.temporary, self.schema, compression="zstd")
+        self.writer.write_table(conform(table, self.schema), row_group_size=ROW_GROUP_SIZE)
+        self.rows += len(data)
+
+    def close(self) -> None:
+        """finishes the part, adding it to the store. Nothing is added if no transactions were written"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            os.replace(self.temporary, self.filename)
+
+    def abort(self) -> None:
+        """throws the part away"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            os.remove(self.temporary)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if error_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def load_store(filename: str, columns: list = None, start_date=None, end_date=None) -> pd.DataFrame:
+    """loads transactions from a store.
+
+    parameters:
+        filename: the store to load
+        columns: only load these columns (all of them by default)
+        start_date, end_date: only load transactions between these dates (inclusive).
+            The filter is pushed down into the parquet reader, so skipped data is never decoded.
+    """
+    filters = []
+    if start_date is not None:
+        filters.append((HEADER.DATE, ">=", pd.Timestamp(start_date)))
+    if end_date is not None:
+        filters.append((HEADER.DATE, "<=", pd.Timestamp(end_date)))
+    return pd.read_parquet(filename, columns=columns, filters=filters or None)
@@ -1,3 +1,18 @@
+"""
+    Module that describes the columns of a statement: their names, and the types they are kept
+    as once a statement has been loaded.
+
+    The text columns that only have a few distinct values are kept as categories, amounts are
+    kept as whole cents (so that totals add up exactly, without floating point drift), and the
+    foreign currency columns use nullable types, since most transactions don't have them.
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import numpy as np
+import pandas as pd
+
+
 class HEADER:
     SPEND_TYPE = "Type"
     LOCATION = "Details"
@@ -8,3 +23,95 @@ class HEADER:
     QUANTITY = "Amount"
     FOREIGN = "ForeignCurrencyAmount"
     CONVERSION_COST = "ConversionCharge"
+    ACCOUNT = "Account"
+
+
+# the type of every column once it has been through apply_schema. Dates are parsed by the ingest module
+SCHEMA = {
+    HEADER.SPEND_TYPE: "category",
+    HEADER.LOCATION: "category",
+    HEADER.PARTICULARS: "category",
+    HEADER.CODE: "category",
+    HEADER.REF: "str",
+    HEADER.QUANTITY: "int64",
+    HEADER.FOREIGN: "Float64",
+    HEADER.CONVERSION_COST: "Int64",
+    HEADER.ACCOUNT: "category",
+}
+# the columns kept as whole cents. The foreign amount is in another currency, so it is left alone
+CENTS_COLUMNS = [HEADER.QUANTITY, HEADER.CONVERSION_COST]
+
+
+def is_cents(values: pd.Series) -> bool:
+    """amounts are in cents once they have been through apply_schema, which makes them integers"""
+    return pd.api.types.is_integer_dtype(values)
+
+
+def to_cents(values: pd.Series) -> np.ndarray:
+    """returns amounts (in dollars or already in cents) as an array of whole cents"""
+    if is_cents(values):
+        return values.to_numpy(dtype=np.int64)
+    return np.round(values.to_numpy(dtype=np.float64) * 100).astype(np.int64)
+
+
+def to_dollars(values: pd.Series) -> np.ndarray:
+    """returns amounts (in dollars or in cents) as a float array of dollars, with NaN where they are missing"""
+    dollars = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return dollars / 100 if is_cents(values) else dollars
+
+
+def apply_schema(data: pd.DataFrame, in_dollars: bool = None) -> pd.DataFrame:
+    """returns data with its columns converted to the types in SCHEMA. Columns that already have
+    the right type are left alone, so applying it again is cheap.
+
+    parameters:
+        in_dollars: whether the amounts are in dollars (True, as they are in a statement export) or
+            already in cents (False). Anything read from outside the program should say which, since
+            a statement with only whole dollar amounts can come back with integer columns. When it
+            isn't given, floats are taken to be dollars and integers to be cents, which is only right
+            for data that has been through apply_schema before (such as the transaction store)
+    """
+    data = data.copy(deep=False)
+    for column, dtype in SCHEMA.items():
+        if column not in data.columns:
+            continue
+        values = data[column]
+        if column in CENTS_COLUMNS:
+            if in_dollars or (in_dollars is None and not is_cents(values)):
+                if dtype == "int64" and values.isna().any():
+                    raise ValueError(f"Some transactions have no {column}")
+                values = pd.Series(np.round(values.to_numpy(dtype=np.float64, na_value=np.nan) * 100),
+                                   index=data.index)
+            data[column] = values.astype(dtype)
+        elif dtype == "category":
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                data[column] = values.astype(dtype)
+        elif values.dtype != dtype:
+            data[column] = values.astype(dtype)
+    return data
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """concatenates frames that have been through apply_schema. pd.concat turns category columns into
+    plain text unless every frame has exactly the same categories, so they are given the same ones first"""
+    frames = [frame.copy(deep=False) for frame in frames]
+    for column, dtype in SCHEMA.items():
+        if dtype != "category" or not frames:
+            continue
+        if not all(column in frame.columns and isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames):
+            continue
+        categories = frames[0][column].cat.categories
+        for frame in frames[1:]:
+            categories = categories.union(frame[column].cat.categories)
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_display(data: pd.DataFrame) -> pd.DataFrame:
+    """returns a copy of data with its amounts in dollars, for printing and saving as csv"""
+    data = data.copy(deep=False)
+    for column in CENTS_COLUMNS:
+        if column in data.columns and is_cents(data[column]):
+            data[column] = to_dollars(data[column])
+    return data
@@ -5,42 +5,90 @@
 """
 import datetime as datetime
 
+# where read_input gets its input from. None means the keyboard
+_input_source = None
+
+
+class ScriptedInput:
+    """
+    An input source that replays a fixed list of inputs, so that a session can be repeated
+    exactly (for benchmarks and tests). Raises EOFError once the inputs run out, the same
+    as input does at the end of a piped file.
+
+    Parameters:
+        inputs: the inputs to give, in order
+        echo: whether to print each prompt along with the input given to it
+    """
+
+    def __init__(self, inputs: list, echo: bool = False):
+        self.inputs = iter(inputs)
+        self.echo = echo
+
+    def __call__(self, prompt: str = "") -> str:
+        try:
+            value = next(self.inputs)
+        except StopIteration:
+            raise EOFError("the scripted inputs have run out")
+        if self.echo:
+            print(f"{prompt}{value}")
+        return value
+
+
+def set_input_source(source) -> None:
+    """sets the function read_input uses to get each input. None goes back to the keyboard"""
+    global _input_source
+    _input_source = source
+
+
+def read_input(prompt: str = "") -> str:
+    """reads one input from the current input source"""
+    if _input_source is None:
+        return input(prompt)
+    return _input_source(prompt)
+
+
 def get_confirmation() -> bool:
     """gets user to confirm whether they want to proceed"""
-    user_input = input('(y/n) : ')
-    if user_input == 'y':
-        return True
-    elif user_input == 'n':
-        return False
-    else:
+    while True:
+        user_input = read_input('(y/n) : ')
+        if user_input == 'y':
+            return True
+        elif user_input == 'n':
+            return False
         print('Invalid input, try again')
-        return get_confirmation()
 
 def get_valid_datetime(message):
     """prompts the user for a valid datetime expression,
     otherwise prompts them again"""
-    
-    print("please enter date in dd-mm-yyyy")
-    date = input(message)
-    if date == '-':
-        return None
-    try:
-        date = datetime.datetime(day=int(date[0:2]), month=int(date[3:5]), year=int(date[6:10]))
-        return date
-    except ValueError:
-        print("Invalid Format, please try again.")
-        return get_valid_datetime(message)
+    while True:
+        print("please enter date in dd-mm-yyyy")
+        date = read_input(message)
+        if date == '-':
+            return None
+        try:
+            return datetime.datetime(day=int(date[0:2]), month=int(date[3:5]), year=int(date[6:10]))
+        except ValueError:
+            print("Invalid Format, please try again.")
 
 def get_natural_number(message: str) -> int:
-    number = input(message)
-    try:
-        number = int(number)
-        if number < 0:
-            raise ValueError
-        return number
-    except ValueError:
-        print("That was not a valid number!")
-        return get_natural_number(message)
+    while True:
+        number = read_input(message)
+        try:
+            number = int(number)
+            if number < 0:
+                raise ValueError
+            return number
+        except ValueError:
+            print("That was not a valid number!")
+
+def get_float(message: str) -> float:
+    """prompts the user for a number, which may be negative or have decimals"""
+    while True:
+        number = read_input(message)
+        try:
+            return float(number)
+        except ValueError:
+            print("That was not a valid number!")
 
 def display_new_screen_ribbon():
     """prints a banner for moving to a new screen"""
@@ -4,11 +4,18 @@
     Author: Ben Shirley
     Date: 29 Oct 2023
 """
+import argparse
 from enum import Enum
 import pandas as pd
 import numpy as np
 import spending_tracker as tracker
 import ui_helper
+import ingest
+import account_metadata
+import rollups
+import data_view
+import transaction_database as database
+import instrumentation
 from transaction_structure import HEADER
 
 QUITSTR = 'q!'
@@ -41,119 +48,254 @@ def display_welcome():
 
 def user_interface():
     """commandline interface for analysing bank details"""
-    display_welcome()
-    print("To get started, enter the name of the file you want to analyse")
+    while True:
+        display_welcome()
+        print("To get started, enter the name of the file you want to analyse")
 
-    # prompt user for data, take action accordingly
-    data, action = get_user_file()
-    if action == UserAction.QUIT:
-        return
-    elif action == UserAction.BACK:
-        user_interface()
-        return
+        # prompt user for data, take action accordingly
+        data, action = get_user_file(open_database=True)
+        if action == UserAction.QUIT:
+            return
+        elif action == UserAction.VALID:
+            break
+    rollups.get_cube(data)
     
     # now display options for what we want to do with that data
     print("great!, now what would you like to do with this data?")
     options_screen(data)
-    
-    
 
 
-def options_screen(data):
-    """runs the options_screen for the application"""
-    options = {
-        "Display general info" : tracker.display_general_info,
-        "get payment methods" : tracker.get_spending_types,
-        "plot spending by time" : tracker.plot_spending_by_time,
-        "perform classification" : tracker.prompt_for_spending_types,
-        "analyse segment of the data": section_data_screen,
-        "save data" : tracker.save_data,
-        "combine this data with another file" : None,
-        "Add metadata": None
-    }
-
-    keys = list(options.keys())
-    for i in range(len(options.keys())):
-        print(f"({i}) : {keys[i]}")
-    print("(q) : back")
-    print("(q!) : quit")
-    print("")
-    # verify input
-    user_input = get_input("Where to?: ")
-    if user_input.status == UserAction.BACK:
-        return UserAction.BACK
-    elif user_input.status == UserAction.QUIT:
-        return UserAction.QUIT
-    
+def replay(inputs: list, data: pd.DataFrame = None, echo: bool = False) -> None:
+    """runs the program with a fixed list of inputs instead of the keyboard, stopping when they
+    run out. Used to repeat the same navigation for benchmarks and tests.
+
+    parameters:
+        inputs: everything the user would have typed, in order
+        data: starts at the options screen with this data, rather than asking for a file
+        echo: print each prompt together with the input given to it
+    """
+    ui_helper.set_input_source(ui_helper.ScriptedInput(inputs, echo))
     try:
-        user_input = int(user_input.message)
-        if(user_input < 0 or user_input >= len(options.keys())):
-            raise ValueError
-    except ValueError:
-        print("That wasn't part of the list!")
-        options_screen(data)
-        return
-     
-    # run the selected option
-    if options[keys[user_input]] != None:
-        res = options[keys[user_input]](data)
-        if res == UserAction.QUIT:
-            return UserAction.QUIT
-    else:
-        print("feature not yet implemented :()")
-    input("press any key to continue...")
-    print("")
-    options_screen(data)
-        
-    
+        if data is None:
+            user_interface()
+        else:
+            options_screen(data)
+    except EOFError:
+        pass
+    finally:
+        ui_helper.set_input_source(None)
 
 
-    
-def get_user_file() -> pd.DataFrame:
+class Screen:
+    """
+    A menu screen on the navigation stack. Screens only hold a view of the data (the shared
+    dataset and the positions of some of its rows), so the stack stays small however deep
+    the user goes.
+
+    Parameters:
+        view: the data the screen works on
+    """
+
+    def __init__(self, view: data_view.DataView):
+        self.view = view
+
+    def get_options(self) -> dict:
+        """returns {description: function} for everything the screen can do"""
+        raise NotImplementedError
+
+    def show_header(self) -> None:
+        pass
+
+    def run_option(self, option):
+        return option(self.view)
+
+    def show(self):
+        """shows the screen and handles one choice from it.
+
+        returns:
+            None to show this screen again, UserAction.BACK or UserAction.QUIT,
+            or a new Screen to go to
+        """
+        self.show_header()
+        options = self.get_options()
+        keys = list(options.keys())
+        for i in range(len(keys)):
+            print(f"({i}) : {keys[i]}")
+        print("(q) : back")
+        print("(q!) : quit")
+        print("")
+        # verify input
+        user_input = get_input("Where to?: ")
+        if user_input.status != UserAction.VALID:
+            return user_input.status
+
+        try:
+            user_input = int(user_input.message)
+            if(user_input < 0 or user_input >= len(keys)):
+                raise ValueError
+        except ValueError:
+            print("That wasn't part of the list!")
+            return None
+
+        # run the selected option
+        option = options[keys[user_input]]
+        if option != None:
+            result = instrumentation.run_action(keys[user_input], self.run_option, option)
+            if isinstance(result, Screen) or result is UserAction.QUIT:
+                return result
+        else:
+            print("feature not yet implemented :()")
+        ui_helper.read_input("press any key to continue...")
+        print("")
+        return None
+
+
+class OptionsScreen(Screen):
+    """the main menu, with everything that can be done with the data"""
+
+    def get_options(self) -> dict:
+        return {
+            "Display general info" : tracker.display_general_info,
+            "get payment methods" : tracker.get_spending_types,
+            "plot spending by time" : tracker.plot_spending_by_time,
+            "plot balance by time" : tracker.plot_balance_by_time,
+            "display weekly spending" : tracker.display_weekly_spending,
+            "perform classification" : tracker.prompt_for_spending_types,
+            "analyse segment of the data": section_data_screen,
+            "save data" : tracker.save_data,
+            "combine this data with another file" : combine_two_files,
+            "Add metadata": get_file_metadata
+        }
+
+    def run_option(self, option):
+        # sectioning and the weekly summary work on the view itself, everything else is given the rows as a dataset
+        if option in (section_data_screen, tracker.display_weekly_spending):
+            return option(self.view)
+        return option(self.view.frame())
+
+
+class SectionScreen(Screen):
+    """UI screen to guide the user through the process of cutting up their data.
+    Each section is a view of the same dataset, so nothing is copied until it is used"""
+
+    def show_header(self) -> None:
+        ui_helper.display_new_screen_ribbon()
+        print("Welcome to the data partitioning menu!")
+        print("please choose how you would like to section your data:")
+
+    def get_options(self) -> dict:
+        return {
+            "get spends only" : get_spends_only,
+            "get balance increases only": get_balance_increases_only,
+            "trim data based on transaction type": trim_data_based_on_transaction_type,
+            "trim data based on date": trim_by_date,
+            "trim data based on classification": None
+        }
+
+
+def run_screens(stack: list) -> UserAction:
+    """runs the menus in a loop until the user quits, or goes back from the first screen.
+    Choosing a new screen pushes it onto the stack and going back pops it off, letting go of
+    the rows of its section if no other screen shows them, so a session can go on for as long
+    as the user likes without using more memory.
+
+    returns:
+        UserAction.QUIT if the user quit, otherwise UserAction.BACK
+    """
+    try:
+        while stack:
+            result = stack[-1].show()
+            if result is UserAction.QUIT:
+                return UserAction.QUIT
+            elif result is UserAction.BACK:
+                screen = stack.pop()
+                if not any(other.view is screen.view for other in stack):
+                    screen.view.release()
+            elif isinstance(result, Screen):
+                stack.append(result)
+    except EOFError:
+        # the input has been closed, so there is nobody left to answer
+        return UserAction.QUIT
+    return UserAction.BACK
+
+
+def options_screen(data) -> UserAction:
+    """runs the options_screen for the application.
+    data can be a dataset, a data_view.DataView of one, or a transaction_database.DatabaseView"""
+    view = data if isinstance(data, (data_view.DataView, database.DatabaseView)) else data_view.DataView(data)
+    return run_screens([OptionsScreen(view)])
+
+
+def get_user_file(open_database: bool = False) -> pd.DataFrame:
     """prompts the user to enter the name of the file they want to analyse
     TODO: ensure file is in the correct format
+
+    parameters:
+        open_database: give a database file back as a transaction_database.DatabaseView of the
+            whole database rather than loading it, so that sections of it are worked out by the database
     """
-    response = get_input("Please enter the name of the file you want to analyse: ")
-    if response.status == UserAction.VALID:
+    while True:
+        response = get_input("Please enter the name of the file you want to analyse: ")
+        if response.status == UserAction.BACK:
+            return None, UserAction.BACK
+        elif response.status == UserAction.QUIT:
+            return None, UserAction.QUIT
+
         filename = response.message
         extension = filename.split('.')[-1]
-        if extension == "csv":
-            try:
-                data = pd.read_csv(filename)
-                data = tracker.format_data(data)
-                return data, UserAction.VALID
-            except FileNotFoundError:
-                print("We couldn't find that file, try again")
-                return get_user_file()
-        elif extension == "xlsx":
-            try:
-                data = pd.read_excel(filename)
-                data = tracker.format_data(data)
-                return data, UserAction.VALID
-            except FileNotFoundError:
-                print("We couldn't find that file, try again")
-                return get_user_file()
-        else:
+        if extension not in ingest.SUPPORTED_EXTENSIONS:
             print("We don't seem to support that type of file. Please try again")
-            return get_user_file()
-    elif response.status == UserAction.BACK:
-        return None, UserAction.BACK
-    elif response.status == UserAction.QUIT:
-        return None, UserAction.QUIT
+            continue
+        try:
+            # only the loading is timed, not the time spent typing the name
+            with instrumentation.span("user_interface.get_user_file", filename=filename):
+                if open_database and extension == database.DATABASE_EXTENSION:
+                    return database.DatabaseView(database.TransactionDatabase(filename, create=False)), UserAction.VALID
+                data = tracker.format_data(ingest.load_statement(filename))
+            return data, UserAction.VALID
+        except FileNotFoundError:
+            print("We couldn't find that file, try again")
     
-def combine_two_files(data: pd.DataFrame) -> pd.DataFrame:
-    """prompts the user for another file, combines it with the given file,
-    and then combines the two, returning a new options menu with the new data"""
+def combine_two_files(data: pd.DataFrame):
+    """prompts the user for another file and combines it with the given data (see
+    spending_tracker.combine_data), returning a new options menu with the new data"""
     print("Choose a dataset to combine with this one!")
-    file_to_combine_with = get_user_file()
+    file_to_combine_with, action = get_user_file()
+    if action != UserAction.VALID:
+        return action
+    print("Should transfers between the accounts be cancelled out?")
+    cancel = ui_helper.get_confirmation()
+    combined = tracker.combine_data(data, file_to_combine_with, cancel)
+    print(f"The combined data has {len(combined)} transactions.")
+    return OptionsScreen(data_view.DataView(combined))
 
-def get_file_metadata(data: pd.DataFrame):
+def get_file_metadata(data: pd.DataFrame, registry: account_metadata.AccountRegistry = None):
     """prompts the user to input metadata such as the account number, the name of the bank account,
     the current balance of the file, et cetera"""
+    if registry is None:
+        registry = account_metadata.AccountRegistry()
+    for account in data[HEADER.ACCOUNT].astype(str).unique():
+        ui_helper.display_new_screen_ribbon()
+        print(f"Enter the details for the account '{account}':")
+        existing = registry.get(account)
+        if existing is not None:
+            print(f"This account is already saved as {existing.name} ({existing.number}). Replace it?")
+            if not ui_helper.get_confirmation():
+                continue
+        number = ui_helper.read_input("Account number: ")
+        name = ui_helper.read_input("Account name: ")
+        balance = ui_helper.get_float("Balance of the account: ")
+        print("What date was that the balance for?")
+        anchor_date = ui_helper.get_valid_datetime("Balance date: ")
+        if anchor_date is None:
+            anchor_date = data.loc[data[HEADER.ACCOUNT].astype(str) == account, HEADER.DATE].max()
+        registry.add(account_metadata.AccountMetadata(account, number, name, balance, anchor_date))
+    registry.save()
+    print("Metadata saved!")
 
 def get_input(propmt: str) -> UserResponse:
     """prompts the user for input, and checks if they want to quit"""
-    user_input = input(propmt)
+    user_input = ui_helper.read_input(propmt)
     if user_input == QUITSTR:
         return UserResponse(user_input, UserAction.QUIT)
     elif user_input == BACKSTR:
@@ -161,112 +303,69 @@ def get_input(propmt: str) -> UserResponse:
     else:
         return UserResponse(user_input, UserAction.VALID) 
 
-def section_data_screen(data):
-    """UI function to guide the user through the process of cutting up their data"""
-    ui_helper.display_new_screen_ribbon()
-    print("Welcome to the data partitioning menu!")
-    print("please choose how you would like to section your data:")
-
-    options = {
-        "get spends only" : get_spends_only,
-        "get balance increases only": get_balance_increases_only,
-        "trim data based on transaction type": trim_data_based_on_transaction_type,
-        "trim data based on date (super buggy)": trim_by_date,
-        "trim data based on classification": None
-    }
-
-    keys = list(options.keys())
-    for i in range(len(keys)):
-        print(f"({i}) : {keys[i]}")
-    print("(q) : back")
-    print("(q!) : quit")
-    print("")
-    # verify input
-    user_input = get_input("Where to?: ")
-    if user_input.status == UserAction.BACK:
-        return UserAction.BACK
-    elif user_input.status == UserAction.QUIT:
-        return UserAction.QUIT
-    
-    try:
-        user_input = int(user_input.message)
-        if(user_input < 0 or user_input >= len(options.keys())):
-            raise ValueError
-    except ValueError:
-        print("That wasn't part of the list!")
-        section_data_screen(data)
-        return section_data_screen(data)
-     
-    # run the selected option
-    if options[keys[user_input]] != None:
-        action = options[keys[user_input]](data)
-        if action == UserAction.QUIT:
-            return UserAction.QUIT
-    else:
-        print("feature not yet implemented :()")
-    input("press any key to continue...")
-    print("")
-    section_data_screen(data)
+def section_data_screen(view: data_view.DataView) -> SectionScreen:
+    """takes the user to the data partitioning menu"""
+    return SectionScreen(view)
 
-def trim_by_date(data):
+def trim_by_date(view: data_view.DataView):
     """prompts the user for a date they would like to trim the data by, then takes them to
-    a new options screen
-    TODO: This is super buggy at the moment, please do not use!
-    """
+    a new options screen"""
     ui_helper.display_new_screen_ribbon()
-    print(f"This data stretches between {data[HEADER.DATE].min()} and {data[HEADER.DATE].max()}")
+    first_date, last_date = view.date_span()
+    print(f"This data stretches between {first_date} and {last_date}")
     start_date = ui_helper.get_valid_datetime("Select starting date (input '-' to select no date).")
     end_date = ui_helper.get_valid_datetime("Select end date (input '-' to select no end date)")
     if start_date == None:
-        start_date = data[HEADER.DATE].min()
+        start_date = first_date
     if end_date == None:
-        end_date = data[HEADER.DATE].max()
+        end_date = last_date
     
-    start_date = np.datetime64(start_date)
-    end_date = np.datetime64(end_date)
     print("\nTrimming data:\n")
-    print(data[HEADER.DATE].min(), data[HEADER.DATE].max())
-    new_data = data.loc[(data[HEADER.DATE] >= start_date) & (data[HEADER.DATE] <= end_date)]
-    return options_screen(new_data)
+    print(start_date, end_date)
+    return OptionsScreen(view.between_dates(start_date, end_date))
 
 
-def get_spends_only(data):
-    """takes the user to an options screen with a new dataset (spends only)"""
+def get_spends_only(view: data_view.DataView):
+    """takes the user to an options screen with a new section of the data (spends only)"""
     ui_helper.display_new_screen_ribbon()
     print("sectioning data into only your spends:")
-    sectioned_data = data[data[HEADER.QUANTITY] < 0]
-    return options_screen(sectioned_data)
+    return OptionsScreen(view.filter(data_view.spends_only()))
 
-def get_balance_increases_only(data):
+def get_balance_increases_only(view: data_view.DataView):
     """Takes the user to an oprions screen with only data increases"""
     ui_helper.display_new_screen_ribbon()
     print("sectioned data into only balance increases!")
-    section_data = data[data[HEADER.QUANTITY >=0 ]]
-    return options_screen(section_data)
+    return OptionsScreen(view.filter(data_view.increases_only()))
 
-def trim_data_based_on_transaction_type(data):
+def trim_data_based_on_transaction_type(view: data_view.DataView):
     """prompts the user for what transaction types they want to choose,
       then cuts the data accordingly"""
     
     ui_helper.display_new_screen_ribbon()
     print("Chose what transaction types you wish to restrict the data to:")
-    transaction_types = data[HEADER.SPEND_TYPE].unique()
+    transaction_types = pd.unique(view.column(HEADER.SPEND_TYPE))
     for i in range(len(transaction_types)):
         print(f"({i}) : {transaction_types[i]}")
     print("Enter the numbers of the transaction types you want to choose, seperated by commas")
-    user_input = input(": ")
+    user_input = ui_helper.read_input(": ")
     choices = user_input.split(',')
     results = []
     try:
         for choice in choices:
-            results.append(int(choice))
-    except ValueError:
+            results.append(transaction_types[int(choice)])
+    except (ValueError, IndexError):
         print("Invalid input, please try again")
         return
     
-    new_data = data[data[HEADER.SPEND_TYPE].isin(results)]
-    return options_screen(new_data)
+    return OptionsScreen(view.filter(data_view.type_in(results)))
 
     
 if __name__ == "__main__":
-    user_interface()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    instrumentation.add_arguments(parser)
+    options = parser.parse_args()
+    instrumentation.start(options)
+    try:
+        user_interface()
+    finally:
+        instrumentation.finish(options)
@@ -0,0 +1,95 @@
+"""Module to run the tests for the account_metadata module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import account_metadata
+from transaction_structure import HEADER
+import pandas as pd
+
+
+def make_data():
+    return pd.DataFrame({
+        HEADER.ACCOUNT: ["cheque", "cheque", "savings", "cheque"],
+        HEADER.DATE: pd.to_datetime(["2023-01-01", "2023-01-01", "2023-01-02", "2023-01-05"]),
+        HEADER.QUANTITY: [-10.0, -5.0, 100.0, 20.0],
+    })
+
+
+def make_registry(tmp_path):
+    registry = account_metadata.AccountRegistry(str(tmp_path / "accounts.json"))
+    registry.add(account_metadata.AccountMetadata("cheque", "01-1234", "Everyday", 500.0, "2023-01-01"))
+    return registry
+
+
+class TestAccountRegistry:
+    """
+    class that runs the tests for saving account metadata
+    """
+    def test_round_trip(self, tmp_path):
+        make_registry(tmp_path).save()
+        loaded = account_metadata.AccountRegistry(str(tmp_path / "accounts.json")).get("cheque")
+        assert loaded.name == "Everyday"
+        assert loaded.anchor_balance == 500.0
+        assert loaded.anchor_date == pd.Timestamp("2023-01-01")
+
+
+class TestBalanceIndex:
+    """
+    class that runs the tests for looking up balances
+    """
+    def test_balance_on_date(self, tmp_path):
+        index = account_metadata.BalanceIndex(make_data(), make_registry(tmp_path))
+        assert index.balance_on("2022-12-31", "cheque") == 515.0
+        assert index.balance_on("2023-01-01", "cheque") == 500.0
+        assert index.balance_on("2023-01-04", "cheque") == 500.0
+        assert index.balance_on("2023-01-05", "cheque") == 520.0
+        assert index.balance_on("2023-01-05") == 620.0
+
+    def test_balance_series(self, tmp_path):
+        index = account_metadata.BalanceIndex(make_data(), make_registry(tmp_path))
+        series = index.balance_series("2023-01-01", "2023-01-05")
+        assert list(series) == [500.0, 600.0, 600.0, 600.0, 620.0]
+
+    def test_append_later_and_earlier(self, tmp_path):
+        data = make_data()
+        index = account_metadata.BalanceIndex(data.iloc[:3], make_registry(tmp_path))
+        index.append(data.iloc[3:])
+        assert index.balance_on("2023-01-05", "cheque") == 520.0
+        earlier = pd.DataFrame({HEADER.ACCOUNT: ["cheque"], HEADER.DATE: pd.to_datetime(["2023-01-03"]),
+                                HEADER.QUANTITY: [-1.0]})
+        index.append(earlier)
+        assert index.balance_on("2023-01-03", "cheque") == 499.0
+        assert index.balance_on("2023-01-05", "cheque") == 519.0
+
+    def test_index_is_reused(self, tmp_path):
+        data = make_data()
+        registry = make_registry(tmp_path)
+        index = account_metadata.get_balance_index(data, registry)
+        registry.get("cheque").anchor_balance = 600.0
+        assert account_metadata.get_balance_index(data, registry) is index
+        # a changed anchor balance is picked up without building the index again
+        assert index.balance_on("2023-01-05", "cheque") == 620.0
+
+    def test_append_to_balance_index(self, tmp_path):
+        data = make_data()
+        registry = make_registry(tmp_path)
+        history = data.iloc[:3]
+        old = account_metadata.get_balance_index(history, registry)
+        combined = data.copy()
+        index = account_metadata.append_to_balance_index(history, data.iloc[3:], combined, registry)
+        assert account_metadata.get_balance_index(combined, registry) is index
+        assert index.balance_on("2023-01-05", "cheque") == 520.0
+        assert old.balance_on("2023-01-05", "cheque") == 500.0
+
+    def test_keep_balance_index(self, tmp_path):
+        data = make_data()
+        registry = make_registry(tmp_path)
+        index = account_metadata.get_balance_index(data, registry)
+        cancelled = data.iloc[[0, 1, 3]].reset_index(drop=True)
+        assert account_metadata.keep_balance_index(data, cancelled, registry) is index
+        assert account_metadata.get_balance_index(cancelled, registry) is index
+        assert index.balance_on("2023-01-05", "savings") == 100.0
@@ -0,0 +1,93 @@
+"""Module to run the tests for the batch module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import os
+import sys
+import json
+sys.path.insert(0, '../source')
+import batch
+import rollups
+import classification as classifier
+import model_cache
+from transaction_structure import HEADER
+from test_ingest import write_export
+from test_classification import make_data
+import pandas as pd
+
+
+class TestBatch:
+    """
+    class that runs the tests for the headless pipeline
+    """
+    def test_pipeline(self, tmp_path):
+        files = [str(tmp_path / "cheque.csv"), str(tmp_path / "savings.csv")]
+        for filename in files:
+            write_export(filename)
+        output = str(tmp_path / "combined.csv")
+        summary = str(tmp_path / "weekly.csv")
+        timer = batch.run_pipeline(files, output=output, summary=summary, by=HEADER.SPEND_TYPE, workers=2)
+        assert [stage[0] for stage in timer.stages] == ["ingest", "merge", "filter", "aggregate",
+                                                        "save summary", "save"]
+        combined = pd.read_csv(output)
+        assert set(combined[HEADER.ACCOUNT]) == {"cheque", "savings"}
+        assert pd.read_csv(summary)["count"].sum() == len(combined)
+
+    def test_parquet_summary(self, tmp_path):
+        filename = str(tmp_path / "cheque.csv")
+        write_export(filename)
+        summary = str(tmp_path / "monthly")
+        batch.run_pipeline([filename], summary=summary, period="month")
+        table = pd.read_parquet(summary + ".parquet")
+        assert rollups.PERIOD_NAME in table.columns
+        assert table["count"].sum() == 6
+
+    def test_database_summary_is_refused(self):
+        with pytest.raises(SystemExit):
+            batch.parse_arguments(["a.csv", "--summary", "weekly.db"])
+
+    def test_classification_summary_needs_a_model(self, tmp_path, capsys):
+        filename = str(tmp_path / "cheque.csv")
+        write_export(filename)
+        with pytest.raises(SystemExit) as error:
+            batch.main([filename, "--summary", str(tmp_path / "weekly.csv"), "--by", rollups.CLASSIFICATION])
+        assert "--model" in str(error.value)
+        assert not os.path.exists(str(tmp_path / "weekly.csv"))
+
+    def test_filters(self, tmp_path):
+        filename = str(tmp_path / "cheque.csv")
+        write_export(filename)
+        data = batch.load_file(filename)
+        filtered = batch.filter_data(data, start_date=str(data[HEADER.DATE].iloc[1].date()), spends_only=True)
+        expected = data[(data[HEADER.QUANTITY] < 0) & (data[HEADER.DATE] >= data[HEADER.DATE].iloc[1])]
+        assert len(filtered) == len(expected)
+
+    def test_job_file(self, tmp_path):
+        job = str(tmp_path / "job.json")
+        with open(job, "w") as file:
+            json.dump({"files": ["a.csv"], "period": "month", "spends_only": True}, file)
+        options = batch.parse_arguments(["--job", job, "--period", "day"])
+        assert options.files == ["a.csv"]
+        assert options.period == "day"
+        assert options.spends_only
+
+    def test_job_file_unknown_option(self, tmp_path):
+        job = str(tmp_path / "job.json")
+        with open(job, "w") as file:
+            json.dump({"files": ["a.csv"], "colour": "red"}, file)
+        with pytest.raises(SystemExit):
+            batch.parse_arguments(["--job", job])
+
+    def test_classify(self, tmp_path):
+        data = make_data()
+        model, clusters = classifier.fit_prototype_model(classifier.encode_data_sparse(data), 2,
+                                                         random_state=0, verbose=0)
+        model.labels = {0: "food", 1: "rent"}
+        cache = model_cache.ModelCache(str(tmp_path))
+        cache.put("model", model)
+        labelled = batch.classify(data, "model", cache)
+        assert list(labelled[rollups.CLASSIFICATION]) == [model.labels[cluster] for cluster in clusters]
+        with pytest.raises(ValueError):
+            batch.classify(data, "missing", cache)
@@ -0,0 +1,172 @@
+"""Module to run the tests for the classification module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+from types import SimpleNamespace
+import sys
+sys.path.insert(0, '../source')
+import classification
+import clustering
+from transaction_structure import HEADER
+import numpy as np
+import pandas as pd
+
+
+def make_data():
+    """a handful of transactions with repeated merchants"""
+    return pd.DataFrame({
+        HEADER.SPEND_TYPE: ["Eft-Pos", "Eft-Pos", "Bank Fee", "Salary", "Eft-Pos", "Bank Fee"],
+        HEADER.LOCATION: ["COUNTDOWN", "NEW WORLD", "ANZ", "WORK LTD", "COUNTDOWN", "ANZ"],
+        HEADER.PARTICULARS: ["CARD 1234", "CARD 1234", np.nan, "SALARY", "CARD 1234", np.nan],
+        HEADER.CODE: ["", "", "", "", "", ""],
+        HEADER.REF: ["", "", "", "", "", ""],
+        HEADER.QUANTITY: [-50.0, -30.0, -5.0, 2000.0, -75.5, -5.0],
+        HEADER.DATE: pd.to_datetime(["2023-01-01", "2023-01-02", "2023-01-03",
+                                     "2023-01-04", "2023-01-05", "2023-01-06"]),
+        HEADER.FOREIGN: np.nan,
+        HEADER.CONVERSION_COST: np.nan,
+    })
+
+
+class TestEncodeDataSparse:
+    """
+    class that runs the tests for the sparse encoding
+    """
+    def test_one_hot_matches_dense_encoding(self):
+        data = make_data()
+        dense = clustering.as_float_matrix(classification.encode_data_for_learning(data))
+        sparse = classification.encode_data_sparse(data).one_hot()
+        assert sparse.shape == dense.shape
+        assert np.allclose(sparse.toarray(), dense)
+
+    def test_missing_values_are_coded_negative(self):
+        encoded = classification.encode_data_sparse(make_data())
+        particulars = classification.CATEGORICAL_COLUMNS.index(HEADER.PARTICULARS)
+        assert list(encoded.codes[:, particulars] == -1) == [False, False, True, False, False, True]
+
+    def test_prototype_matrix_layout(self):
+        encoded = classification.encode_data_sparse(make_data())
+        matrix = encoded.prototype_matrix()
+        assert matrix.shape == (6, len(classification.NUMERIC_COLUMNS) + len(classification.CATEGORICAL_COLUMNS))
+        assert matrix[:, 0].min() == 0 and matrix[:, 0].max() == 1
+
+
+class TestElbowMethod:
+    """
+    class that runs the tests for the elbow search
+    """
+    def test_elbow_reached(self):
+        assert not classification.elbow_reached([100])
+        assert not classification.elbow_reached([100, 50])
+        assert classification.elbow_reached([100, 50, 49.9])
+        assert classification.elbow_reached([100, 0])
+
+    def test_cost_curve_stops_at_max_k(self):
+        costs = classification.elbow_cost_curve(make_data(), max_k=3, workers=1, random_state=0)
+        assert 1 <= len(costs) <= 3
+
+    def test_warm_start_uses_previous_centroids(self):
+        cold = classification.elbow_cost_curve(make_data(), max_k=2, workers=1, warm_start=False, random_state=0)
+        warm = classification.elbow_cost_curve(make_data(), max_k=2, workers=1, warm_start=True, random_state=0)
+        assert cold[0] == pytest.approx(warm[0])
+
+    @pytest.mark.parametrize("warm_start", [True, False])
+    def test_every_fit_has_the_same_number_of_starts(self, monkeypatch, warm_start):
+        from kmodes.kprototypes import KPrototypes
+        starts = []
+
+        def recording_fit(**options):
+            k_proto = KPrototypes(**options)
+            starts.append(k_proto.n_init)
+            return k_proto
+
+        monkeypatch.setattr(classification, "kprototypes", SimpleNamespace(KPrototypes=recording_fit))
+        classification.elbow_cost_curve(make_data(), max_k=3, workers=1, warm_start=warm_start, random_state=0)
+        assert len(starts) > 1
+        assert set(starts) == {classification.ELBOW_N_INIT}
+
+
+class TestIncrementalClassification:
+    """
+    class that runs the tests for classifying new transactions against an existing model
+    """
+    def fit_model(self):
+        model, clusters = classification.fit_prototype_model(classification.encode_data_sparse(make_data()), 2,
+                                                             random_state=0, verbose=0)
+        model.labels = {0: "first", 1: "second"}
+        return model, clusters
+
+    def test_existing_codes_are_kept(self):
+        data = make_data()
+        encoded = classification.encode_data_sparse(data)
+        new_data = data.iloc[[0, 3]].copy()
+        new_data.loc[new_data.index[1], HEADER.LOCATION] = "NEW SHOP"
+        reencoded = classification.encode_data_sparse(new_data, encoded.categories, encoded.numeric_min,
+                                                      encoded.numeric_range)
+        location = classification.CATEGORICAL_COLUMNS.index(HEADER.LOCATION)
+        assert reencoded.codes[0, location] == encoded.codes[0, location]
+        assert reencoded.categories[location][reencoded.codes[1, location]] == "NEW SHOP"
+        assert reencoded.numeric[0, 0] == encoded.numeric[0, 0]
+
+    def test_repeat_rows_get_the_same_labels(self):
+        model, clusters = self.fit_model()
+        labels, drifted = classification.classify_incrementally(model, make_data())
+        assert not drifted
+        assert list(labels) == [model.labels[cluster] for cluster in clusters]
+        assert model.counts.sum() == 2 * len(make_data())
+
+    def test_model_fitted_across_processes(self):
+        encoded = classification.encode_data_sparse(make_data())
+        model, clusters = classification.fit_prototype_model(encoded, 2, random_state=0, workers=2)
+        assert np.array_equal(model.predict(encoded)[0], clusters)
+        assert model.counts.sum() == len(make_data())
+        assert model.category_counts[0].sum() == len(make_data())
+
+    def test_drift_is_detected(self):
+        model, clusters = self.fit_model()
+        strange = make_data()
+        strange[HEADER.LOCATION] = "SOMEWHERE NEW"
+        strange[HEADER.SPEND_TYPE] = "Something Else"
+        strange[HEADER.QUANTITY] = 100000.0
+        centroids = model.numeric_centroids.copy()
+        labels, drifted = classification.classify_incrementally(model, strange)
+        assert drifted
+        assert np.array_equal(model.numeric_centroids, centroids)
+
+
+class TestMiniBatch:
+    """
+    class that runs the tests for fitting k-prototypes a mini-batch at a time
+    """
+    def make_groups(self, repeats=20):
+        """small grocery spends and large rent payments, which should come out as two clusters"""
+        data = pd.concat([make_data().iloc[[0, 1, 4]]] * repeats, ignore_index=True)
+        rent = data.iloc[::2].copy()
+        rent[HEADER.SPEND_TYPE] = "Automatic Payment"
+        rent[HEADER.LOCATION] = "LANDLORD"
+        rent[HEADER.QUANTITY] = -600.0
+        return pd.concat([data, rent], ignore_index=True).sample(frac=1, random_state=0).reset_index(drop=True)
+
+    def test_separate_groups_are_found(self):
+        data = self.make_groups()
+        chunks = [data.iloc[start:start + 25] for start in range(0, len(data), 25)]
+        model = classification.fit_mini_batch_model(chunks, 2, batch_rows=10, random_state=0)
+        clusters, _ = model.predict(model.encode(data))
+        rent = (data[HEADER.LOCATION] == "LANDLORD").to_numpy()
+        assert len(set(clusters[rent])) == 1
+        assert len(set(clusters[~rent])) == 1
+        assert clusters[rent][0] != clusters[~rent][0]
+        assert model.counts.sum() == len(data)
+
+    def test_categories_from_later_chunks_are_added(self):
+        data = make_data()
+        model = classification.fit_mini_batch_model([data.iloc[:2], data.iloc[2:]], 2, random_state=0)
+        location = classification.CATEGORICAL_COLUMNS.index(HEADER.LOCATION)
+        assert set(model.categories[location]) == {"COUNTDOWN", "NEW WORLD", "ANZ", "WORK LTD"}
+        assert model.category_counts[location].sum() == len(data)
+
+    def test_no_data(self):
+        with pytest.raises(ValueError):
+            classification.fit_mini_batch_model([], 2)
@@ -0,0 +1,86 @@
+"""Module to run the tests for the clustering module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import clustering
+import numpy as np
+import scipy.sparse
+
+
+def make_blobs(seed=0):
+    """three well separated groups of points"""
+    rng = np.random.default_rng(seed)
+    centres = np.array([[0, 0], [10, 10], [-10, 10]])
+    points = np.concatenate([centre + rng.normal(size=(100, 2)) for centre in centres])
+    return points
+
+
+class TestKMeans:
+    """
+    class that runs the tests for the vectorised k-means engine
+    """
+    def test_finds_separated_groups(self):
+        labels, centroids, inertia = clustering.k_means(make_blobs(), 3, random_state=1)
+        assert len(set(labels[:100])) == 1
+        assert len(set(labels[100:200])) == 1
+        assert len(set(labels[200:])) == 1
+        assert len(set(labels)) == 3
+
+    def test_fixed_seed_is_repeatable(self):
+        first = clustering.k_means(make_blobs(), 3, random_state=5)
+        second = clustering.k_means(make_blobs(), 3, random_state=5)
+        assert np.array_equal(first[0], second[0])
+        assert first[2] == second[2]
+
+    def test_chunked_matches_unchunked(self):
+        whole = clustering.k_means(make_blobs(), 3, random_state=2)
+        chunked = clustering.k_means(make_blobs(), 3, random_state=2, chunk_size=7)
+        assert np.array_equal(whole[0], chunked[0])
+        assert whole[2] == pytest.approx(chunked[2])
+
+    def test_inertia_matches_distances(self):
+        points = make_blobs()
+        labels, centroids, inertia = clustering.k_means(points, 3, random_state=3)
+        expected = np.sum((points - centroids[labels]) ** 2)
+        assert inertia == pytest.approx(expected)
+
+    def test_invalid_k(self):
+        with pytest.raises(ValueError):
+            clustering.k_means(make_blobs(), 0)
+
+
+class TestParallel:
+    """
+    class that runs the tests for clustering across worker processes
+    """
+    def test_k_means_is_the_same_with_any_number_of_workers(self, monkeypatch):
+        monkeypatch.setattr(clustering.parallel, "SHARD_ROWS", 64)
+        one = clustering.k_means(make_blobs(), 3, random_state=4, workers=1)
+        two = clustering.k_means(make_blobs(), 3, random_state=4, workers=2)
+        assert np.array_equal(one[0], two[0])
+        assert np.array_equal(one[1], two[1])
+        assert one[2] == two[2]
+
+    def test_sparse_k_means_matches_single_process(self):
+        points = scipy.sparse.csr_matrix(np.abs(make_blobs()))
+        serial = clustering.k_means(points, 3, random_state=1)
+        parallel = clustering.k_means(points, 3, random_state=1, workers=2)
+        assert np.array_equal(serial[0], parallel[0])
+        assert serial[2] == pytest.approx(parallel[2])
+
+    def test_k_prototypes_finds_separated_groups(self):
+        numeric = make_blobs()[:, :1]
+        codes = np.repeat(np.array([[0, 1], [1, 2], [2, -1]], dtype=np.int32), 100, axis=0)
+        serial = clustering.k_prototypes(numeric, codes, 3, random_state=0, shard_rows=50)
+        parallel = clustering.k_prototypes(numeric, codes, 3, random_state=0, workers=2, shard_rows=50)
+        labels = serial[0]
+        assert all(len(set(labels[start:start + 100])) == 1 for start in (0, 100, 200))
+        assert len(set(labels)) == 3
+        assert np.array_equal(labels, parallel[0])
+        assert np.array_equal(serial[2], parallel[2])
+        assert serial[3] == parallel[3]
+
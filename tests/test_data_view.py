@@ -0,0 +1,121 @@
+"""Module to run the tests for the data_view module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import data_view
+from transaction_structure import HEADER
+import pandas as pd
+
+
+def make_data():
+    return pd.DataFrame({
+        HEADER.SPEND_TYPE: ["Eftpos", "Salary", "Eftpos", "Payment", "Eftpos"],
+        HEADER.DATE: pd.to_datetime(["2023-01-02", "2023-01-08", "2023-01-09", "2023-01-20", "2023-02-01"]),
+        HEADER.QUANTITY: [-10.0, 100.0, -20.0, -40.0, 0.0],
+    })
+
+
+class TestDataView:
+    """
+    class that runs the tests for sectioning data with views
+    """
+    def test_spends_and_increases(self):
+        view = data_view.DataView(make_data())
+        assert list(view.filter(data_view.spends_only()).rows) == [0, 2, 3]
+        assert list(view.filter(data_view.increases_only()).rows) == [1, 4]
+
+    def test_nested_filters_share_the_base(self):
+        data = make_data()
+        view = data_view.DataView(data).filter(data_view.spends_only())
+        nested = view.filter(data_view.type_in(["Eftpos"]))
+        assert nested.base is data
+        assert list(nested.rows) == [0, 2]
+        pd.testing.assert_frame_equal(nested.frame(), data[(data[HEADER.QUANTITY] < 0)
+                                                           & (data[HEADER.SPEND_TYPE] == "Eftpos")])
+
+    def test_between_dates_is_inclusive(self):
+        view = data_view.DataView(make_data()).between_dates("2023-01-08", "2023-01-20")
+        assert list(view.rows) == [1, 2, 3]
+
+    def test_between_dates_after_another_filter(self):
+        view = data_view.DataView(make_data()).filter(data_view.spends_only())
+        assert list(view.between_dates("2023-01-05", "2023-03-01").rows) == [2, 3]
+        nested = view.between_dates("2023-01-05", "2023-03-01").filter(data_view.type_in(["Payment"]))
+        assert list(nested.rows) == [3]
+
+    def test_between_dates_unsorted(self):
+        data = make_data().iloc[::-1].reset_index(drop=True)
+        view = data_view.DataView(data)
+        assert view.date_index.order is not None
+        assert list(view.between_dates("2023-01-08", "2023-01-20").rows) == [1, 2, 3]
+        assert list(view.filter(data_view.spends_only()).between_dates("2023-01-08", "2023-01-20").rows) == [1, 2]
+
+    def test_date_span(self):
+        view = data_view.DataView(make_data()).filter(data_view.spends_only())
+        assert view.date_span() == (pd.Timestamp("2023-01-02"), pd.Timestamp("2023-01-20"))
+
+    def test_combined_predicates(self):
+        predicate = data_view.spends_only() & data_view.type_in(["Payment"])
+        assert list(data_view.DataView(make_data()).filter(predicate).rows) == [3]
+
+    def test_filters_are_cached(self):
+        view = data_view.DataView(make_data())
+        assert view.filter(data_view.spends_only()) is view.filter(data_view.spends_only())
+
+    def test_full_view_is_not_copied(self):
+        data = make_data()
+        assert data_view.DataView(data).frame() is data
+
+    def test_frame_and_rollups_are_kept(self):
+        view = data_view.DataView(make_data()).filter(data_view.spends_only())
+        assert view.frame() is view.frame()
+        assert view.rollups() is view.rollups()
+
+    def test_sections_share_the_date_index(self):
+        view = data_view.DataView(make_data())
+        spends = view.filter(data_view.spends_only())
+        assert spends.date_index is view.date_index
+        assert spends.filter(data_view.type_in(["Payment"])).date_index is view.date_index
+
+    def test_old_sections_are_dropped(self):
+        view = data_view.DataView(make_data())
+        first = view.filter(data_view.type_in(["Payment"]))
+        for number in range(data_view.MAX_CHILDREN):
+            view.filter(data_view.type_in([str(number)]))
+        assert len(view._children) == data_view.MAX_CHILDREN
+        assert view.filter(data_view.type_in(["Payment"])) is not first
+
+    def test_classifying_a_section_is_kept(self):
+        spends = data_view.DataView(make_data()).filter(data_view.spends_only())
+        spends.frame()["classification"] = ["food", "food", "rent"]
+        assert list(spends.frame()["classification"]) == ["food", "food", "rent"]
+        assert "classification" not in spends.base.columns
+
+    def test_new_columns_of_the_base_are_picked_up(self):
+        data = make_data()
+        spends = data_view.DataView(data).filter(data_view.spends_only())
+        spends.frame()
+        data["classification"] = ["a", "b", "c", "d", "e"]
+        assert list(spends.frame()["classification"]) == ["a", "c", "d"]
+
+    def test_release_keeps_only_the_rows(self):
+        view = data_view.DataView(make_data())
+        spends = view.filter(data_view.spends_only())
+        payments = spends.filter(data_view.type_in(["Payment"]))
+        spends.frame(), payments.frame()
+        spends.release()
+        assert spends._frame is None and payments._frame is None
+        assert view.filter(data_view.spends_only()) is spends
+        assert list(payments.frame().index) == [3]
+
+    def test_dropped_sections_are_released(self):
+        view = data_view.DataView(make_data())
+        first = view.filter(data_view.type_in(["Payment"]))
+        first.frame()
+        for number in range(data_view.MAX_CHILDREN):
+            view.filter(data_view.type_in([str(number)]))
+        assert first._frame is None
@@ -0,0 +1,113 @@
+"""Module to run the tests for the dedup_index module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import dedup_index
+from transaction_structure import HEADER, apply_schema
+from test_classification import make_data
+import numpy as np
+import pandas as pd
+
+
+class TestFingerprint:
+    """
+    class that runs the tests for fingerprinting transactions
+    """
+    def test_same_transaction_however_it_was_loaded(self):
+        data = make_data()
+        loaded = apply_schema(data.fillna({HEADER.PARTICULARS: ""}))
+        loaded[HEADER.DATE] = loaded[HEADER.DATE].astype("datetime64[s]")
+        assert list(dedup_index.fingerprint(data)) == list(dedup_index.fingerprint(loaded))
+
+    def test_every_column_counts(self):
+        data = make_data().iloc[[0, 0]].reset_index(drop=True)
+        data.loc[1, HEADER.CODE] = "1234"
+        fingerprints = dedup_index.fingerprint(data)
+        assert fingerprints[0] != fingerprints[1]
+
+
+class TestBloomFilter:
+    """
+    class that runs the tests for the Bloom filter
+    """
+    def test_no_false_negatives_and_few_false_positives(self, tmp_path):
+        rng = np.random.default_rng(0)
+        fingerprints = rng.integers(0, 2 ** 63, 20000).astype(np.uint64)
+        bloom = dedup_index.BloomFilter(20000)
+        bloom.add(fingerprints)
+        filename = str(tmp_path / "index.bloom")
+        bloom.save(filename)
+        bloom = dedup_index.BloomFilter.load(filename)
+        assert bloom.might_contain(fingerprints).all()
+        others = rng.integers(0, 2 ** 63, 20000).astype(np.uint64)
+        assert bloom.might_contain(others).mean() < 3 * dedup_index.BLOOM_ERROR_RATE
+
+
+class TestDedupIndex:
+    """
+    class that runs the tests for the persistent dedup index
+    """
+    def test_counts_survive_saving(self, tmp_path):
+        filename = str(tmp_path / "history.index")
+        index = dedup_index.DedupIndex(filename)
+        assert index.add(make_data()).all()
+        index.save()
+        index = dedup_index.DedupIndex(filename)
+        data = pd.concat([make_data(), make_data().iloc[[0]]], ignore_index=True)
+        # only the second copy of the first transaction is new
+        assert list(index.add(data)) == [False] * 6 + [True]
+        assert len(index) == 6
+
+    def test_changes_are_only_written_when_saved(self, tmp_path):
+        filename = str(tmp_path / "history.index")
+        index = dedup_index.DedupIndex(filename)
+        index.add(make_data().iloc[:3])
+        index.save()
+        index = dedup_index.DedupIndex(filename)
+        assert index.add(make_data().iloc[3:]).all()
+        assert len(dedup_index.DedupIndex(filename)) == 3
+        index.rollback()
+        assert len(index) == 3
+        assert index.add(make_data().iloc[3:]).all()
+        index.save()
+        assert not dedup_index.DedupIndex(filename).add(make_data()).any()
+
+    def test_new_transactions_skip_the_table(self, tmp_path):
+        filename = str(tmp_path / "history.index")
+        index = dedup_index.DedupIndex(filename, bloom=True)
+        index.add(make_data().iloc[:3])
+        index.save()
+        index = dedup_index.DedupIndex(filename, bloom=True)
+        assert index.add(make_data().iloc[3:]).all()
+        assert index.lookups == 0
+        assert not index.add(make_data().iloc[:1]).any()
+        assert index.lookups == 1
+
+    def test_table_grows(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(dedup_index, "INDEX_MIN_SLOTS", 4)
+        filename = str(tmp_path / "history.index")
+        index = dedup_index.DedupIndex(filename)
+        data = make_data()
+        for row in range(len(data)):
+            index.add(data.iloc[[row]])
+            index.save()
+        index = dedup_index.DedupIndex(filename)
+        assert len(index) == 6
+        assert len(index.slots) == 16
+        assert not index.add(data).any()
+
+    def test_filter_behind_the_index_is_rebuilt(self, tmp_path):
+        filename = str(tmp_path / "history.index")
+        index = dedup_index.DedupIndex(filename, bloom=True)
+        index.add(make_data().iloc[:3])
+        index.save()
+        # another import that saved the index but not the filter
+        other = dedup_index.DedupIndex(filename)
+        other.add(make_data().iloc[3:])
+        other.save()
+        index = dedup_index.DedupIndex(filename, bloom=True)
+        assert not index.add(make_data()).any()
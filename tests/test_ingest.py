@@ -0,0 +1,153 @@
+"""Module to run the tests for the ingest module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import ingest
+import transaction_store as store
+import transaction_database as database
+from transaction_structure import HEADER, to_dollars
+from test_classification import make_data
+import pandas as pd
+
+
+def write_export(filename, data=None):
+    """writes make_data (or data) out the way ANZ exports it"""
+    data = make_data() if data is None else data.copy()
+    data[HEADER.DATE] = data[HEADER.DATE].dt.strftime("%d/%m/%Y")
+    data.to_csv(filename, index=False)
+
+
+class TestIngest:
+    """
+    class that runs the tests for chunked statement ingest
+    """
+    def test_chunks_are_typed(self, tmp_path):
+        filename = str(tmp_path / "export.csv")
+        write_export(filename)
+        chunks = list(ingest.read_statement_chunks(filename, chunk_rows=4))
+        assert [len(chunk) for chunk in chunks] == [4, 2]
+        assert list(chunks[0][HEADER.DATE].dt.day) == [1, 2, 3, 4]
+        assert isinstance(chunks[0][HEADER.SPEND_TYPE].dtype, pd.CategoricalDtype)
+
+    def test_other_date_formats_still_parse(self):
+        dates = ingest.parse_statement_dates(pd.Series(["2023-01-05", "2023-02-06"]))
+        assert list(dates.dt.month) == [1, 2]
+
+    def test_whole_dollar_xlsx(self, monkeypatch):
+        # read_excel gives integer columns when every amount is a whole number of dollars
+        export = make_data().assign(**{HEADER.QUANTITY: [-50, -30, -5, 2000, -75, -5]})
+        export[HEADER.DATE] = export[HEADER.DATE].dt.strftime("%d/%m/%Y")
+
+        def read_excel(filename, dtype=None):
+            return export.astype({column: kind for column, kind in (dtype or {}).items() if column in export.columns})
+
+        monkeypatch.setattr(pd, "read_excel", read_excel)
+        data = ingest.load_statement("export.xlsx")
+        assert list(data[HEADER.QUANTITY]) == [-5000, -3000, -500, 200000, -7500, -500]
+
+    def test_ingest_appends_to_store(self, tmp_path):
+        filename = str(tmp_path / "export.csv")
+        store_filename = str(tmp_path / "history.parquet")
+        write_export(filename)
+        first = ingest.ingest_statement(filename, store_filename, chunk_rows=4)
+        second = ingest.ingest_statement(filename, store_filename, chunk_rows=4, deduplicate=False)
+        assert first.rows == second.rows == 6
+        data = store.load_store(store_filename)
+        assert len(data) == 12
+        assert list(to_dollars(data[HEADER.QUANTITY])) == list(make_data()[HEADER.QUANTITY]) * 2
+
+    def test_store_in_dollars_is_converted(self, tmp_path):
+        filename = str(tmp_path / "export.csv")
+        store_filename = str(tmp_path / "history.parquet")
+        write_export(filename)
+        # stores saved before amounts were kept in cents
+        make_data().assign(**{HEADER.ACCOUNT: "export"}).to_parquet(store_filename, index=False)
+        ingest.ingest_statement(filename, store_filename, chunk_rows=4, deduplicate=False)
+        data = store.load_store(store_filename)
+        assert list(data[HEADER.QUANTITY]) == [-5000, -3000, -500, 200000, -7550, -500] * 2
+
+    def test_ingest_onto_saved_store(self, tmp_path):
+        filename = str(tmp_path / "export.csv")
+        store_filename = str(tmp_path / "history.parquet")
+        write_export(filename)
+        saved = make_data()
+        saved["classification"] = "Rent"
+        store.save_store(saved, store_filename)
+        ingest.ingest_statement(filename, store_filename, chunk_rows=4)
+        # the new transactions are a part of their own, so the saved ones aren't rewritten
+        assert len(store.get_parts(store_filename)) == 2
+        data = store.load_store(store_filename)
+        assert len(data) == 12
+        assert data["classification"].isna().sum() == 6
+
+    @pytest.mark.parametrize("extension", ["parquet", "db"])
+    def test_overlapping_statements_are_added_once(self, tmp_path, extension):
+        store_filename = str(tmp_path / f"history.{extension}")
+        for number, rows in enumerate([slice(0, 4), slice(2, 6), slice(0, 6)]):
+            filename = str(tmp_path / f"export-{number}.csv")
+            write_export(filename, make_data().iloc[rows])
+            report = ingest.ingest_statement(filename, store_filename, chunk_rows=3, account="export")
+        assert (report.rows, report.duplicates) == (0, 6)
+        assert len(ingest.load_statement(store_filename)) == 6
+
+    @pytest.mark.parametrize("extension", ["parquet", "db"])
+    def test_failed_import_can_be_repeated(self, tmp_path, monkeypatch, extension):
+        store_filename = str(tmp_path / f"history.{extension}")
+        first = str(tmp_path / "export-0.csv")
+        write_export(first, make_data().iloc[:3])
+        ingest.ingest_statement(first, store_filename, chunk_rows=2, account="export")
+
+        second = str(tmp_path / "export-1.csv")
+        write_export(second)
+        read_statement_chunks = ingest.read_statement_chunks
+
+        def fail_part_way(filename, chunk_rows):
+            chunks = read_statement_chunks(filename, chunk_rows)
+            yield next(chunks)
+            raise OSError("the statement couldn't be read")
+
+        monkeypatch.setattr(ingest, "read_statement_chunks", fail_part_way)
+        with pytest.raises(OSError):
+            ingest.ingest_statement(second, store_filename, chunk_rows=4, account="export")
+        monkeypatch.undo()
+        report = ingest.ingest_statement(second, store_filename, chunk_rows=4, account="export")
+        assert (report.rows, report.duplicates) == (3, 3)
+        assert len(ingest.load_statement(store_filename)) == 6
+
+    @pytest.mark.parametrize("extension", ["parquet", "db"])
+    def test_saving_over_a_store_resets_its_index(self, tmp_path, extension):
+        store_filename = str(tmp_path / f"history.{extension}")
+        filename = str(tmp_path / "export.csv")
+        write_export(filename)
+        ingest.ingest_statement(filename, store_filename, account="export")
+        # saved over with only some of its transactions, the way "save data" does
+        kept = ingest.load_statement(store_filename).iloc[:3]
+        if extension == "db":
+            database.save_database(kept, store_filename)
+        else:
+            store.save_store(kept, store_filename)
+        report = ingest.ingest_statement(filename, store_filename, account="export")
+        assert (report.rows, report.duplicates) == (3, 3)
+        assert len(ingest.load_statement(store_filename)) == 6
+
+    def test_identical_purchases_are_kept(self, tmp_path):
+        store_filename = str(tmp_path / "history.parquet")
+        coffee = make_data().iloc[[0]]
+        for number, copies in enumerate([2, 3, 1]):
+            filename = str(tmp_path / f"export-{number}.csv")
+            write_export(filename, pd.concat([coffee] * copies))
+            # a chunk of one row splits the copies up, which shouldn't matter
+            ingest.ingest_statement(filename, store_filename, chunk_rows=1, account="export")
+        assert len(store.load_store(store_filename)) == 3
+
+    def test_index_is_built_for_an_existing_store(self, tmp_path):
+        filename = str(tmp_path / "export.csv")
+        store_filename = str(tmp_path / "history.parquet")
+        write_export(filename)
+        store.save_store(make_data().assign(**{HEADER.ACCOUNT: "export"}), store_filename)
+        report = ingest.ingest_statement(filename, store_filename)
+        assert (report.rows, report.duplicates) == (0, 6)
@@ -0,0 +1,107 @@
+"""Module to run the tests for the instrumentation module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import instrumentation
+import clustering
+import classification as classifier
+from test_clustering import make_blobs
+from test_classification import make_data
+import json
+import logging
+import os
+
+
+@pytest.fixture
+def tracer():
+    tracer = instrumentation.start_tracing()
+    yield tracer
+    instrumentation.stop_tracing()
+    instrumentation.set_profiling(None)
+
+
+class TestTracing:
+    """
+    class that runs the tests for recording spans
+    """
+    def test_nothing_is_recorded_until_tracing_starts(self):
+        assert instrumentation.get_tracer() is None
+        with instrumentation.span("step"):
+            pass
+        assert instrumentation.span("step") is instrumentation.span("other step")
+
+    def test_nested_spans(self, tracer):
+        @instrumentation.traced("inner")
+        def inner():
+            return 1
+
+        with instrumentation.span("outer", rows=10):
+            assert inner() == 1
+        inner_span, outer_span = tracer.spans
+        assert (inner_span.name, inner_span.depth) == ("inner", 1)
+        assert (outer_span.name, outer_span.depth) == ("outer", 0)
+        assert outer_span.attributes == {"rows": 10}
+        assert outer_span.seconds >= inner_span.seconds
+        assert outer_span.peak_rss > 0
+
+    def test_every_clustering_iteration_is_timed(self, tracer):
+        clustering.k_means(make_blobs(), 3, random_state=1)
+        iterations = [span for span in tracer.spans if span.name == "k_means iteration"]
+        assert len(iterations) >= 1
+        assert [span.attributes["iteration"] for span in iterations] == list(range(len(iterations)))
+
+    def test_trace_and_summary(self, tracer, tmp_path):
+        classifier.encode_data_sparse(make_data())
+        classifier.encode_data_sparse(make_data())
+        filename = str(tmp_path / "trace.json")
+        tracer.save(filename)
+        with open(filename) as file:
+            events = json.load(file)["traceEvents"]
+        assert [event["name"] for event in events if event["ph"] == "X"] == ["classification.encode_data_sparse"] * 2
+        name, calls, total, longest, peak = tracer.summary()[0]
+        assert (name, calls) == ("classification.encode_data_sparse", 2)
+        assert "classification.encode_data_sparse" in tracer.report()
+
+
+class TestMemory:
+    """
+    class that runs the tests for reading the memory of the process
+    """
+    def test_without_the_resource_module(self, monkeypatch):
+        # as on windows, where psutil is used instead if it is installed
+        monkeypatch.setattr(instrumentation, "resource", None)
+        monkeypatch.setattr(instrumentation, "_get_memory_info", lambda: None)
+        assert instrumentation.get_peak_rss() == 0
+        with instrumentation.start_tracing().span("step"):
+            pass
+        assert instrumentation.stop_tracing().spans[0].peak_rss == 0
+
+
+class TestProfiling:
+    """
+    class that runs the tests for profiling menu actions
+    """
+    def test_profile_saved_per_action(self, tracer, tmp_path):
+        instrumentation.set_profiling(str(tmp_path))
+        assert instrumentation.run_action("Show weekly spending", sum, [1, 2, 3]) == 6
+        assert len(os.listdir(tmp_path)) == 1
+        assert os.listdir(tmp_path)[0].startswith("show-weekly-spending-")
+        assert tracer.spans[0].name == "action: Show weekly spending"
+
+
+class TestLogging:
+    """
+    class that runs the tests for debug logging in the clustering loops
+    """
+    def test_iterations_only_logged_at_debug(self, caplog):
+        with caplog.at_level(logging.INFO, logger="clustering"):
+            clustering.k_means(make_blobs(), 3, random_state=1)
+        assert not caplog.records
+        assert classifier.get_kmodes_verbosity() == 0
+        with caplog.at_level(logging.DEBUG, logger="clustering"):
+            clustering.k_means(make_blobs(), 3, random_state=1)
+        assert "k_means iteration 0" in caplog.records[0].getMessage()
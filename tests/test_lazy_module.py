@@ -0,0 +1,62 @@
+"""Module to run the tests for the lazy_module module, and for how long the program takes to start
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import subprocess
+import sys
+sys.path.insert(0, '../source')
+from lazy_module import LazyModule
+
+# libraries that only some of the menu options need, which shouldn't slow down starting the menu
+LAZY_LIBRARIES = ["matplotlib", "kmodes", "sklearn", "scipy", "classification"]
+# how long importing the user interface can take on top of pandas, in microseconds
+STARTUP_BUDGET = 150_000
+
+
+def get_import_times(module: str) -> dict:
+    """imports module in a fresh interpreter with -X importtime, returning {module: cumulative microseconds}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd="../source", capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestLazyModule:
+    """
+    class that runs the tests for importing modules when they are first used
+    """
+    def test_imports_on_first_use(self):
+        module = LazyModule("json")
+        assert not module.is_loaded
+        assert module.loads("[1, 2]") == [1, 2]
+        assert module.is_loaded
+
+    def test_setting_attributes_sets_them_on_the_module(self, monkeypatch):
+        module = LazyModule("json")
+        monkeypatch.setattr(module, "loads", lambda text: "patched")
+        import json
+        assert json.loads("[]") == "patched"
+
+    def test_missing_module(self):
+        with pytest.raises(ModuleNotFoundError):
+            LazyModule("not_a_real_module").anything
+
+
+class TestStartup:
+    """
+    class that checks starting the menu doesn't import the plotting and clustering libraries
+    """
+    def test_heavy_libraries_are_not_imported(self):
+        times = get_import_times("user_interface")
+        assert [name for name in times if name.split(".")[0] in LAZY_LIBRARIES] == []
+
+    def test_startup_budget(self):
+        times = get_import_times("user_interface")
+        assert times["user_interface"] - times["pandas"] < STARTUP_BUDGET
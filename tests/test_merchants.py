@@ -0,0 +1,54 @@
+"""Module to run the tests for the merchants module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import merchants
+import classification
+from transaction_structure import HEADER
+from test_classification import make_data
+import numpy as np
+import pandas as pd
+
+
+class TestNormalizeMerchant:
+    """
+    class that runs the tests for cleaning up single merchant names
+    """
+    def test_store_numbers_are_removed(self):
+        assert merchants.normalize_merchant("COUNTDOWN 123 AUCKLAND") == "COUNTDOWN AUCKLAND"
+        assert merchants.normalize_merchant("Countdown #456 Auckland") == "COUNTDOWN AUCKLAND"
+
+    def test_dates_and_cards_are_removed(self):
+        assert merchants.normalize_merchant("PAK N SAVE 12/03/2023") == "PAK N SAVE"
+        assert merchants.normalize_merchant("4835-****-****-1234 DF") == "DF"
+
+    def test_names_with_digits_are_kept(self):
+        assert merchants.normalize_merchant("7-ELEVEN 2231") == "7 ELEVEN"
+
+    def test_numbers_only(self):
+        assert merchants.normalize_merchant("123456") == "123456"
+
+
+class TestNormalizeColumn:
+    """
+    class that runs the tests for normalizing whole columns
+    """
+    def test_codes_are_shared(self):
+        values = pd.Series(["COUNTDOWN 1 AKL", "COUNTDOWN 2 AKL", np.nan, "NEW WORLD 9"])
+        normalized = merchants.normalize_column(values)
+        assert list(normalized.cat.codes) == [0, 0, -1, 1]
+        assert list(normalized.cat.categories) == ["COUNTDOWN AKL", "NEW WORLD"]
+
+    def test_encoding_uses_normalized_names(self):
+        data = make_data()
+        data[HEADER.LOCATION] = ["COUNTDOWN 1", "NEW WORLD 2", "ANZ", "WORK LTD", "COUNTDOWN 3", "ANZ"]
+        encoded = classification.encode_data_sparse(data)
+        column = classification.CATEGORICAL_COLUMNS.index(HEADER.LOCATION)
+        assert len(encoded.categories[column]) == 4
+        assert encoded.codes[0, column] == encoded.codes[4, column]
+        raw = classification.encode_data_sparse(data, normalize=False)
+        assert len(raw.categories[column]) == 5
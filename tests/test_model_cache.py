@@ -0,0 +1,128 @@
+"""Module to run the tests for the model_cache module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+import os
+sys.path.insert(0, '../source')
+import classification
+import model_cache
+import rules
+import spending_tracker as tracker
+from test_classification import make_data
+from transaction_structure import HEADER, apply_schema
+import numpy as np
+import pandas as pd
+
+
+def make_model(labels=None):
+    categories = [pd.Index(["Eft-Pos", "Salary"]), pd.Index(["COUNTDOWN", "WORK LTD"]), pd.Index(["A", "B", "C"])]
+    return classification.PrototypeModel(np.array([[0.1], [0.9]]), np.array([[0, 1, -1], [1, 0, 2]], dtype=np.int32),
+                                         0.25, 12.5, labels, categories=categories,
+                                         numeric_min=np.array([-50.0]), numeric_range=np.array([100.0]),
+                                         counts=np.array([3, 1]),
+                                         category_counts=[np.ones((2, len(values) + 1), dtype=np.int64)
+                                                          for values in categories])
+
+
+class TestModelCache:
+    """
+    class that runs the tests for saving and loading models
+    """
+    def test_round_trip(self, tmp_path):
+        cache = model_cache.ModelCache(str(tmp_path))
+        cache.put("abc", make_model({0: "Groceries", 1: "Rent"}))
+        model = cache.get("abc")
+        assert np.array_equal(model.numeric_centroids, [[0.1], [0.9]])
+        assert np.array_equal(model.categorical_centroids, [[0, 1, -1], [1, 0, 2]])
+        assert model.labels == {0: "Groceries", 1: "Rent"}
+        assert model.gamma == 0.25
+        assert list(model.categories[1]) == ["COUNTDOWN", "WORK LTD"]
+        assert np.array_equal(model.counts, [3, 1])
+        assert model.category_counts[2].shape == (2, 4)
+
+    def test_miss(self, tmp_path):
+        assert model_cache.ModelCache(str(tmp_path)).get("nothing") is None
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        cache = model_cache.ModelCache(str(tmp_path), max_entries=2)
+        cache.put("first", make_model())
+        cache.put("second", make_model())
+        os.utime(os.path.join(str(tmp_path), f"{cache.prefix}first.npz"), (1, 1))
+        os.utime(os.path.join(str(tmp_path), f"{cache.prefix}second.npz"), (2, 2))
+        cache.get("first")
+        cache.put("third", make_model())
+        assert cache.get("first") is not None
+        assert cache.get("second") is None
+        assert cache.get("third") is not None
+
+    def test_schema_change_invalidates(self, tmp_path, monkeypatch):
+        model_cache.ModelCache(str(tmp_path)).put("abc", make_model())
+        monkeypatch.setattr(model_cache, "ENCODING_SCHEMA_VERSION", classification.ENCODING_SCHEMA_VERSION + 1)
+        assert model_cache.ModelCache(str(tmp_path)).get("abc") is None
+        assert os.listdir(str(tmp_path)) == []
+
+    def test_fingerprint_depends_on_data_and_k(self):
+        encoded = classification.encode_data_sparse(make_data())
+        other = make_data()
+        other.loc[0, "Amount"] = -51.0
+        assert model_cache.fingerprint(encoded, 2) == model_cache.fingerprint(classification.encode_data_sparse(make_data()), 2)
+        assert model_cache.fingerprint(encoded, 2) != model_cache.fingerprint(encoded, 3)
+        assert model_cache.fingerprint(encoded, 2) != model_cache.fingerprint(classification.encode_data_sparse(other), 2)
+
+
+class TestPromptForSpendingTypes:
+    """
+    class that runs the tests for reusing cached classifications
+    """
+    def test_second_session_reuses_labels(self, tmp_path, monkeypatch):
+        cache = model_cache.ModelCache(str(tmp_path))
+        inputs = iter(["n", "2", "-", "Spending", "-", "Income"])
+        monkeypatch.setattr('builtins.input', lambda _="": next(inputs))
+        first = tracker.prompt_for_spending_types(make_data(), cache, rules.RuleSet(str(tmp_path / "first.json")))
+
+        # without any rules, so that the second session has to cluster again
+        inputs = iter(["n", "2"])
+        second = tracker.prompt_for_spending_types(make_data(), cache, rules.RuleSet(str(tmp_path / "second.json")))
+        assert list(second["classification"]) == list(first["classification"])
+
+    def test_second_session_with_learnt_rules(self, tmp_path, monkeypatch):
+        cache = model_cache.ModelCache(str(tmp_path))
+        ruleset = str(tmp_path / "rules.json")
+        # WORK LTD is paid in and spent at, so it ends up with two labels and no rule
+        data = pd.concat([make_data(), make_data().iloc[[0]].assign(Details="WORK LTD")], ignore_index=True)
+        inputs = iter(["n", "2", "-", "Spending", "-", "Income"])
+        monkeypatch.setattr('builtins.input', lambda _="": next(inputs))
+        first = tracker.prompt_for_spending_types(data.copy(), cache, rules.RuleSet(ruleset))
+        assert first.loc[first["Details"] == "WORK LTD", "classification"].nunique() == 2
+
+        # the learnt rules leave only WORK LTD to cluster, which is still found in the cache
+        inputs = iter(["n", "2"])
+        second = tracker.prompt_for_spending_types(data.copy(), cache, rules.RuleSet(ruleset))
+        assert list(second["classification"]) == list(first["classification"])
+
+    def test_new_transactions_use_latest_labels(self, tmp_path, monkeypatch):
+        cache = model_cache.ModelCache(str(tmp_path))
+        inputs = iter(["n", "2", "-", "Spending", "-", "Income"])
+        monkeypatch.setattr('builtins.input', lambda _="": next(inputs))
+        history = tracker.prompt_for_spending_types(make_data(), cache, rules.RuleSet(str(tmp_path / "first.json")))
+
+        # the same rows again fit the saved prototypes exactly as well as the originals did
+        new_data = make_data()
+        combined = tracker.classify_new_transactions(history, new_data, cache,
+                                                     rules.RuleSet(str(tmp_path / "second.json")))
+        assert "classification" not in new_data.columns
+        assert len(combined) == 2 * len(history)
+        assert list(combined["classification"].iloc[len(history):]) == list(history["classification"])
+
+    def test_reclassifying_everything_keeps_the_schema(self, tmp_path, monkeypatch):
+        data = apply_schema(make_data(), in_dollars=True)
+        new_data = apply_schema(make_data().assign(Type="Direct Debit"), in_dollars=True)
+        monkeypatch.setattr(tracker, "prompt_for_spending_types", lambda data, cache, rules: data)
+        # there is no saved classification, so everything is handed over to be classified again
+        combined = tracker.classify_new_transactions(data, new_data, model_cache.ModelCache(str(tmp_path)),
+                                                     rules.RuleSet(str(tmp_path / "rules.json")))
+        assert isinstance(combined[HEADER.SPEND_TYPE].dtype, pd.CategoricalDtype)
+        assert set(combined[HEADER.SPEND_TYPE]) == set(data[HEADER.SPEND_TYPE]) | {"Direct Debit"}
@@ -0,0 +1,93 @@
+"""Module to run the tests for the plotting module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+import os
+sys.path.insert(0, '../source')
+import plotting
+from transaction_structure import HEADER
+import numpy as np
+import pandas as pd
+
+
+def make_data(n_rows=5000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        HEADER.SPEND_TYPE: rng.choice(["Eftpos", "Salary"], n_rows),
+        HEADER.DATE: pd.Timestamp("2020-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 1000, n_rows)), unit="D"),
+        HEADER.QUANTITY: np.round(rng.normal(-20, 50, n_rows), 2),
+        HEADER.ACCOUNT: "cheque",
+    })
+
+
+class TestDecimate:
+    """
+    class that runs the tests for thinning out long series
+    """
+    def test_keeps_extremes_in_order(self):
+        x = np.arange(10_000)
+        y = np.sin(x / 100.0)
+        y[1234] = 5
+        y[8765] = -5
+        thinned_x, thinned_y = plotting.decimate(x, y, buckets=100)
+        assert len(thinned_x) <= 200
+        assert np.all(np.diff(thinned_x) > 0)
+        assert 1234 in thinned_x and 8765 in thinned_x
+        assert thinned_y.max() == 5 and thinned_y.min() == -5
+
+    def test_short_series_untouched(self):
+        x = np.arange(10)
+        assert plotting.decimate(x, x * 2.0, buckets=100)[0] is x
+
+
+class TestPlotter:
+    """
+    class that runs the tests for drawing plots in the background
+    """
+    def test_plot_is_saved_and_reused(self, tmp_path):
+        plotter = plotting.Plotter(str(tmp_path))
+        data = make_data()
+        filename = plotting.spending_by_time(data, plotter).result()
+        assert os.path.exists(filename)
+        again = plotting.spending_by_time(data, plotter)
+        assert again.done() and again.result() == filename
+
+    def test_changed_data_is_drawn_again(self, tmp_path):
+        plotter = plotting.Plotter(str(tmp_path))
+        data = make_data()
+        first = plotting.spending_by_time(data, plotter).result()
+        data.loc[len(data)] = data.iloc[-1]
+        assert plotting.spending_by_time(data, plotter).result() != first
+        assert plotting.spending_by_time(data.copy(), plotter).result() != first
+
+    def test_transactions_are_not_hashed(self, tmp_path, monkeypatch):
+        plotter = plotting.Plotter(str(tmp_path))
+        data = make_data()
+        first = plotting.spending_by_time(data, plotter).result()
+        monkeypatch.setattr(plotting, "to_dollars", None)
+        monkeypatch.setattr(plotting, "get_version", None)
+        assert plotting.spending_by_time(data, plotter).result() == first
+
+    def test_least_recently_used_plots_are_removed(self, tmp_path):
+        plotter = plotting.Plotter(str(tmp_path), max_plots=2)
+        data = make_data(100)
+        first = plotting.spending_by_time(data, plotter).result()
+        second = plotting.spending_quantity_by_type(data, "Eftpos", plotter).result()
+        os.utime(second, (0, 0))
+        # asking for the first plot again makes the second the least recently used
+        plotting.spending_by_time(data, plotter).result()
+        third = plotting.spending_quantity_by_type(data, "Salary", plotter).result()
+        assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(path) for path in (first, third))
+
+    def test_data_is_not_changed(self, tmp_path):
+        plotter = plotting.Plotter(str(tmp_path))
+        data = make_data()
+        columns = list(data.columns)
+        plotting.spending_by_time(data, plotter).result()
+        plotting.spending_quantity_by_type(data, "Eftpos", plotter).result()
+        plotting.weekly_spending(data, plotter).result()
+        assert list(data.columns) == columns
+        assert len(os.listdir(tmp_path)) == 3
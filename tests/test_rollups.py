@@ -0,0 +1,88 @@
+"""Module to run the tests for the rollups module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import rollups
+from transaction_structure import HEADER
+import pandas as pd
+
+
+def make_data():
+    # 2 Jan 2023 was a monday
+    return pd.DataFrame({
+        HEADER.SPEND_TYPE: ["Eftpos", "Eftpos", "Salary", "Payment", "Eftpos"],
+        HEADER.DATE: pd.to_datetime(["2023-01-02", "2023-01-08", "2023-01-09", "2023-01-20", "2023-02-01"]),
+        HEADER.QUANTITY: [-10.0, -20.0, 100.0, -40.0, -6.0],
+    })
+
+
+class TestRollupCube:
+    """
+    class that runs the tests for the rollup cube
+    """
+    def test_weeks_start_on_monday(self):
+        starts = rollups.get_period_starts(make_data()[HEADER.DATE], "week")
+        assert list(pd.to_datetime(starts)) == list(pd.to_datetime(
+            ["2023-01-02", "2023-01-02", "2023-01-09", "2023-01-16", "2023-01-30"]))
+
+    def test_tables_match_groupby(self):
+        data = make_data()
+        cube = rollups.RollupCube(data)
+        daily = data.groupby(HEADER.DATE)[HEADER.QUANTITY].sum()
+        assert cube.get("day")["total"].to_numpy() == pytest.approx(daily.to_numpy())
+        monthly = cube.get("month", HEADER.SPEND_TYPE)
+        assert monthly.loc[(pd.Timestamp("2023-01-01"), "Eftpos"), "count"] == 2
+        assert monthly.loc[(pd.Timestamp("2023-01-01"), "Eftpos"), "mean"] == -15.0
+
+    def test_append_matches_rebuild(self):
+        data = make_data()
+        cube = rollups.RollupCube(data.iloc[:3])
+        cube.append(data.iloc[3:])
+        rebuilt = rollups.RollupCube(data)
+        for key, table in rebuilt.tables.items():
+            pd.testing.assert_frame_equal(cube.tables[key], table)
+
+    def test_average_counts_empty_weeks(self):
+        averages = rollups.RollupCube(make_data()).average_per_period("week", HEADER.SPEND_TYPE)
+        # 5 weeks from 2 Jan to 30 Jan, with 36 spent on eftpos
+        assert averages["Eftpos"] == pytest.approx(-36.0 / 5)
+        assert averages["Salary"] == 0
+
+
+class TestGetCube:
+    """
+    class that runs the tests for looking up the cube of a dataset
+    """
+    def test_cube_is_reused(self):
+        data = make_data()
+        assert rollups.get_cube(data) is rollups.get_cube(data)
+
+    def test_classification_added_later(self):
+        data = make_data()
+        rollups.get_cube(data)
+        data[rollups.CLASSIFICATION] = ["food", "food", "income", "rent", "food"]
+        averages = rollups.get_cube(data).average_per_period("month", rollups.CLASSIFICATION)
+        assert averages["rent"] == pytest.approx(-20.0)
+
+    def test_append_to_cube(self):
+        data = make_data()
+        new_data = make_data().assign(**{HEADER.DATE: pd.to_datetime(["2023-03-01"] * 5)})
+        combined = pd.concat([data, new_data], ignore_index=True)
+        cube = rollups.append_to_cube(data, new_data, combined)
+        assert cube.rows == len(combined)
+        assert rollups.get_cube(combined) is cube
+
+    def test_remove_from_cube(self):
+        data = make_data()
+        rollups.get_cube(data)
+        remaining = data.iloc[[0, 2, 4]].reset_index(drop=True)
+        cube = rollups.remove_from_cube(data, data.iloc[[1, 3]], remaining)
+        assert rollups.get_cube(remaining) is cube
+        expected = rollups.RollupCube(remaining)
+        for key, table in expected.tables.items():
+            pd.testing.assert_frame_equal(cube.tables[key], table)
+        assert rollups.get_cube(data).rows == len(data)
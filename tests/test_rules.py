@@ -0,0 +1,92 @@
+"""Module to run the tests for the rules module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import rules
+import model_cache
+import spending_tracker as tracker
+from transaction_structure import HEADER
+from test_classification import make_data
+import pandas as pd
+
+
+class TestRuleSet:
+    """
+    class that runs the tests for applying and learning rules
+    """
+    def test_merchant_rules_match_normalized_names(self, tmp_path):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        rule_set.add_merchant("Countdown 123", "Groceries")
+        data = make_data()
+        data.loc[4, HEADER.LOCATION] = "COUNTDOWN 456 "
+        labels = rule_set.apply(data)
+        assert list(labels) == ["Groceries", None, None, None, "Groceries", None]
+
+    def test_keyword_rules(self, tmp_path):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        rule_set.add_keyword("salary", "Income")
+        rule_set.add_keyword("card", "Spending")
+        rule_set.add_merchant("NEW WORLD", "Groceries")
+        labels = rule_set.apply(make_data())
+        assert list(labels) == ["Spending", "Groceries", None, "Income", "Spending", None]
+
+    def test_keywords_match_whole_words(self, tmp_path):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        rule_set.add_keyword("AN", "Wrong")
+        assert rule_set.apply(make_data()).isna().all()
+
+    def test_learn_only_unanimous_merchants(self, tmp_path):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        labels = pd.Series(["Groceries", "Groceries", "Fees", "Income", "Treats", 3], dtype=object)
+        # COUNTDOWN was given two labels, and the unlabelled cluster number doesn't count against ANZ
+        assert rule_set.learn(make_data(), labels) == 3
+        assert rule_set.merchant_rules == {"NEW WORLD": "Groceries", "WORK LTD": "Income", "ANZ": "Fees"}
+
+    def test_save_and_load(self, tmp_path):
+        filename = str(tmp_path / "nested" / "rules.json")
+        rule_set = rules.RuleSet(filename)
+        rule_set.add_merchant("ANZ", "Fees")
+        rule_set.add_keyword("salary", "Income")
+        rule_set.save()
+        loaded = rules.RuleSet(filename)
+        assert loaded.merchant_rules == {"ANZ": "Fees"}
+        assert loaded.keyword_rules == {"SALARY": "Income"}
+        assert len(loaded) == 2
+
+
+class TestPromptWithRules:
+    """
+    class that runs the tests for only clustering what the rules don't cover
+    """
+    def test_only_the_rest_is_clustered(self, tmp_path, monkeypatch):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        rule_set.add_merchant("COUNTDOWN", "Groceries")
+        rule_set.add_keyword("salary", "Income")
+        clustered = []
+        fit = tracker.classifier.fit_prototype_model
+        def fit_and_record(encoded, k, *args, **kwargs):
+            clustered.append(encoded.codes.shape[0])
+            return fit(encoded, k, *args, **kwargs)
+        monkeypatch.setattr(tracker.classifier, "fit_prototype_model", fit_and_record)
+        inputs = iter(["n", "2", "-", "Fees", "-", "Other"])
+        monkeypatch.setattr('builtins.input', lambda _="": next(inputs))
+
+        data = tracker.prompt_for_spending_types(make_data(), model_cache.ModelCache(str(tmp_path)), rule_set)
+        assert clustered == [3]
+        assert data.loc[[0, 4], "classification"].tolist() == ["Groceries", "Groceries"]
+        assert data.loc[3, "classification"] == "Income"
+        assert data.loc[2, "classification"] == data.loc[5, "classification"]
+        # what the user picked is remembered
+        assert set(rules.RuleSet(rule_set.filename).merchant_rules) >= {"COUNTDOWN", "ANZ"}
+
+    def test_nothing_left_to_cluster(self, tmp_path, monkeypatch):
+        rule_set = rules.RuleSet(str(tmp_path / "rules.json"))
+        for merchant in ["COUNTDOWN", "NEW WORLD", "ANZ", "WORK LTD"]:
+            rule_set.add_merchant(merchant, "Known")
+        monkeypatch.setattr('builtins.input', lambda _="": pytest.fail("nothing should be asked"))
+        data = tracker.prompt_for_spending_types(make_data(), model_cache.ModelCache(str(tmp_path)), rule_set)
+        assert (data["classification"] == "Known").all()
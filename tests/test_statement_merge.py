@@ -0,0 +1,72 @@
+"""Module to run the tests for the statement_merge module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import statement_merge
+from transaction_structure import HEADER
+import pandas as pd
+
+
+def make_statement(account, rows):
+    """rows are (date, amount, reference)"""
+    return pd.DataFrame({
+        HEADER.ACCOUNT: account,
+        HEADER.DATE: pd.to_datetime([row[0] for row in rows]),
+        HEADER.QUANTITY: [row[1] for row in rows],
+        HEADER.REF: [row[2] for row in rows],
+        HEADER.LOCATION: "SHOP",
+    })
+
+
+class TestRemoveOverlaps:
+    """
+    class that runs the tests for removing transactions repeated across statements
+    """
+    def test_overlapping_days_are_kept_once(self):
+        january = make_statement("cheque", [("2023-01-30", -5.0, "A"), ("2023-01-31", -6.0, "B")])
+        february = make_statement("cheque", [("2023-01-31", -6.0, "B"), ("2023-02-01", -7.0, "C")])
+        combined = statement_merge.remove_overlaps([january, february])
+        assert list(combined[HEADER.QUANTITY]) == [-5.0, -6.0, -7.0]
+
+    def test_identical_purchases_in_one_statement_survive(self):
+        january = make_statement("cheque", [("2023-01-31", -4.5, ""), ("2023-01-31", -4.5, "")])
+        february = make_statement("cheque", [("2023-01-31", -4.5, ""), ("2023-02-01", -7.0, "")])
+        combined = statement_merge.remove_overlaps([january, february])
+        assert list(combined[HEADER.QUANTITY]) == [-4.5, -4.5, -7.0]
+
+    def test_different_accounts_are_not_duplicates(self):
+        cheque = make_statement("cheque", [("2023-01-31", -6.0, "B")])
+        savings = make_statement("savings", [("2023-01-31", -6.0, "B")])
+        assert len(statement_merge.remove_overlaps([cheque, savings])) == 2
+
+
+class TestTransfers:
+    """
+    class that runs the tests for matching transfers between accounts
+    """
+    def test_transfer_is_cancelled(self):
+        cheque = make_statement("cheque", [("2023-01-01", -100.0, ""), ("2023-01-02", -20.0, "")])
+        savings = make_statement("savings", [("2023-01-03", 100.0, "")])
+        combined = statement_merge.merge_frames([cheque, savings])
+        assert list(combined[HEADER.QUANTITY]) == [-20.0]
+
+    def test_outside_window_is_not_a_transfer(self):
+        cheque = make_statement("cheque", [("2023-01-01", -100.0, "")])
+        savings = make_statement("savings", [("2023-01-10", 100.0, "")])
+        assert len(statement_merge.merge_frames([cheque, savings])) == 2
+
+    def test_same_account_is_not_a_transfer(self):
+        cheque = make_statement("cheque", [("2023-01-01", -100.0, ""), ("2023-01-01", 100.0, "refund")])
+        assert len(statement_merge.merge_frames([cheque])) == 2
+
+    def test_each_transaction_matches_once_closest_first(self):
+        cheque = make_statement("cheque", [("2023-01-01", -50.0, ""), ("2023-01-04", -50.0, "")])
+        savings = make_statement("savings", [("2023-01-04", 50.0, "")])
+        data = statement_merge.remove_overlaps([cheque, savings])
+        matches = statement_merge.match_transfers(data)
+        assert len(matches) == 1
+        assert data[HEADER.DATE].iloc[matches["outgoing"].iloc[0]] == pd.Timestamp("2023-01-04")
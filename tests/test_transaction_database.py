@@ -0,0 +1,108 @@
+"""Module to run the tests for the transaction_database module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import transaction_database as database
+import data_view
+import rollups
+import ingest
+from transaction_structure import HEADER, apply_schema
+from test_classification import make_data
+import pandas as pd
+
+
+class TestTransactionDatabase:
+    """
+    class that runs the tests for saving and loading the transaction database
+    """
+    def test_round_trip_keeps_types(self, tmp_path):
+        filename = str(tmp_path / "history.db")
+        database.save_database(make_data(), filename)
+        data = database.load_database(filename)
+        assert len(data) == 6
+        assert pd.api.types.is_datetime64_any_dtype(data[HEADER.DATE])
+        assert isinstance(data[HEADER.SPEND_TYPE].dtype, pd.CategoricalDtype)
+        assert list(data[HEADER.QUANTITY]) == [-5000, -3000, -500, 200000, -7550, -500]
+        assert data[HEADER.PARTICULARS].isna().sum() == 2
+        assert data[HEADER.CONVERSION_COST].isna().all()
+
+    def test_wal_mode_and_indexes(self, tmp_path):
+        with database.TransactionDatabase(str(tmp_path / "history.db")) as transactions:
+            assert transactions.query("PRAGMA journal_mode")[0][0] == "wal"
+            indexes = {row[0] for row in transactions.query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert {f"{database.TABLE}_{name}" for name in database.INDEXES} <= indexes
+
+    def test_save_replaces_and_insert_appends(self, tmp_path):
+        filename = str(tmp_path / "history.db")
+        database.save_database(make_data(), filename)
+        database.save_database(make_data(), filename)
+        with database.TransactionDatabase(filename) as transactions:
+            transactions.insert(make_data())
+            assert len(database.DatabaseView(transactions)) == 12
+
+    def test_missing_database(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            database.load_database(str(tmp_path / "missing.db"))
+
+    def test_load_statement_and_ingest(self, tmp_path):
+        statement = tmp_path / "cheque.csv"
+        exported = make_data()
+        exported[HEADER.DATE] = exported[HEADER.DATE].dt.strftime("%d/%m/%Y")
+        exported.to_csv(statement, index=False)
+        filename = str(tmp_path / "history.db")
+        report = ingest.ingest_statement(str(statement), filename)
+        assert report.rows == 6
+        data = ingest.load_statement(filename)
+        assert list(data[HEADER.ACCOUNT].astype(str).unique()) == ["cheque"]
+
+
+class TestDatabaseView:
+    """
+    class that runs the tests for sectioning and summing a database in SQL
+    """
+    @pytest.fixture
+    def views(self, tmp_path):
+        data = make_data()
+        data["classification"] = ["Groceries", "Groceries", "Fees", "Income", "Groceries", "Fees"]
+        filename = str(tmp_path / "history.db")
+        database.save_database(data, filename)
+        with database.TransactionDatabase(filename) as transactions:
+            yield database.DatabaseView(transactions), data_view.DataView(apply_schema(data))
+
+    def test_sections_match_data_views(self, views):
+        view, frame_view = views
+        for section in [lambda v: v.filter(data_view.spends_only()),
+                        lambda v: v.filter(data_view.increases_only()),
+                        lambda v: v.filter(data_view.spends_only()).filter(data_view.type_in(["Eft-Pos"])),
+                        lambda v: v.between_dates("2023-01-02", "2023-01-04").filter(data_view.spends_only())]:
+            expected = section(frame_view).frame()
+            result = section(view).frame()
+            assert list(result[HEADER.QUANTITY]) == list(expected[HEADER.QUANTITY])
+            assert len(section(view)) == len(expected)
+
+    def test_date_span(self, views):
+        view, _ = views
+        assert view.filter(data_view.spends_only()).date_span() == (pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-06"))
+        assert view.between_dates("2024-01-01", "2024-02-01").date_span() == (None, None)
+
+    def test_predicate_without_sql_falls_back(self, views):
+        view, _ = views
+        predicate = data_view.Predicate(("big",), lambda v: abs(v.column(HEADER.QUANTITY)) > 4000)
+        section = view.filter(predicate)
+        assert isinstance(section, data_view.DataView)
+        assert list(section.frame()[HEADER.QUANTITY]) == [-5000, 200000, -7550]
+
+    @pytest.mark.parametrize("period", rollups.PERIODS)
+    def test_rollups_match_the_cube(self, views, period):
+        view, frame_view = views
+        sums = rollups.get_cube(view.filter(data_view.spends_only()))
+        cube = rollups.get_cube(frame_view.filter(data_view.spends_only()))
+        assert sums.has_dimension(rollups.CLASSIFICATION)
+        for by in rollups.DIMENSIONS:
+            pd.testing.assert_frame_equal(sums.get(period, by), cube.get(period, by))
+        pd.testing.assert_series_equal(sums.average_per_period(period, HEADER.SPEND_TYPE),
+                                       cube.average_per_period(period, HEADER.SPEND_TYPE))
@@ -0,0 +1,79 @@
+"""Module to run the tests for the transaction_store module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import os
+import sys
+sys.path.insert(0, '../source')
+import transaction_store as store
+from transaction_structure import HEADER
+from test_classification import make_data
+import pandas as pd
+
+
+class TestTransactionStore:
+    """
+    class that runs the tests for saving and loading the columnar store
+    """
+    def test_round_trip_keeps_types(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.save_store(make_data(), filename)
+        data = store.load_store(filename)
+        assert len(data) == 6
+        assert pd.api.types.is_datetime64_any_dtype(data[HEADER.DATE])
+        assert isinstance(data[HEADER.SPEND_TYPE].dtype, pd.CategoricalDtype)
+        # amounts are stored as whole cents
+        assert list(data[HEADER.QUANTITY]) == [-5000, -3000, -500, 200000, -7550, -500]
+
+    def test_select_columns(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.save_store(make_data(), filename)
+        data = store.load_store(filename, columns=[HEADER.DATE, HEADER.QUANTITY])
+        assert list(data.columns) == [HEADER.DATE, HEADER.QUANTITY]
+
+    def test_date_filter(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.save_store(make_data(), filename)
+        data = store.load_store(filename, start_date="2023-01-02", end_date="2023-01-04")
+        assert list(data[HEADER.DATE].dt.day) == [2, 3, 4]
+
+    def test_mixed_classification_is_saved(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        data = make_data()
+        data["classification"] = pd.Series(["Rent", 3, "Rent", 1, 3, "Rent"], dtype=object)
+        store.save_store(data, filename)
+        assert list(store.load_store(filename)["classification"]) == ["Rent", "3", "Rent", "1", "3", "Rent"]
+
+    def test_appending_adds_a_part(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.save_store(make_data(), filename)
+        first_part, = store.get_parts(filename)
+        modified = os.path.getmtime(first_part)
+        with store.PartWriter(filename) as part:
+            part.write(make_data().iloc[:2])
+            part.write(make_data().iloc[2:])
+        assert [os.path.basename(part) for part in store.get_parts(filename)] == \
+            ["part-00000.parquet", "part-00001.parquet"]
+        # the transactions already in the store aren't written again
+        assert os.path.getmtime(first_part) == modified
+        assert len(store.load_store(filename)) == 12
+
+    def test_failed_append_leaves_the_store(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.save_store(make_data(), filename)
+        with pytest.raises(ValueError):
+            with store.PartWriter(filename) as part:
+                part.write(make_data())
+                raise ValueError("the statement couldn't be read")
+        assert os.listdir(filename) == ["part-00000.parquet"]
+        assert len(store.load_store(filename)) == 6
+
+    def test_single_file_store_is_converted(self, tmp_path):
+        filename = str(tmp_path / "history.parquet")
+        store.to_table(make_data()).to_pandas().to_parquet(filename, index=False)
+        with store.PartWriter(filename) as part:
+            part.write(make_data())
+        assert os.path.isdir(filename)
+        assert list(store.load_store(filename)[HEADER.QUANTITY]) == [-5000, -3000, -500, 200000, -7550, -500] * 2
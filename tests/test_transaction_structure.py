@@ -0,0 +1,68 @@
+"""Module to run the tests for the transaction_structure module
+
+    Author: Ben Shirley
+    Date: 18 Oct 2026
+"""
+import pytest
+import sys
+sys.path.insert(0, '../source')
+import transaction_structure as structure
+from transaction_structure import HEADER
+from test_classification import make_data
+import numpy as np
+import pandas as pd
+
+
+class TestSchema:
+    """
+    class that runs the tests for giving statements their column types
+    """
+    def test_columns_get_their_types(self):
+        data = structure.apply_schema(make_data().assign(**{HEADER.ACCOUNT: "cheque"}))
+        for column in (HEADER.SPEND_TYPE, HEADER.LOCATION, HEADER.PARTICULARS, HEADER.CODE, HEADER.ACCOUNT):
+            assert isinstance(data[column].dtype, pd.CategoricalDtype)
+        assert data[HEADER.QUANTITY].dtype == np.int64
+        assert data[HEADER.FOREIGN].dtype == "Float64"
+        assert data[HEADER.CONVERSION_COST].dtype == "Int64"
+        assert data[HEADER.CONVERSION_COST].isna().all()
+
+    def test_amounts_become_exact_cents(self):
+        data = make_data()
+        data[HEADER.QUANTITY] = [0.1, 0.2, -0.3, 19.99, -1e-9, 1234567.89]
+        data[HEADER.CONVERSION_COST] = [np.nan, 1.15, np.nan, np.nan, np.nan, np.nan]
+        typed = structure.apply_schema(data)
+        assert list(typed[HEADER.QUANTITY]) == [10, 20, -30, 1999, 0, 123456789]
+        assert typed[HEADER.QUANTITY].sum() == 123458788
+        assert typed[HEADER.CONVERSION_COST][1] == 115
+
+    def test_whole_dollar_amounts(self):
+        data = make_data()
+        data[HEADER.QUANTITY] = [-50, -30, -5, 2000, -75, -5]
+        assert list(structure.apply_schema(data, in_dollars=True)[HEADER.QUANTITY]) == \
+            [-5000, -3000, -500, 200000, -7500, -500]
+        assert list(structure.apply_schema(data, in_dollars=False)[HEADER.QUANTITY]) == [-50, -30, -5, 2000, -75, -5]
+
+    def test_applying_again_changes_nothing(self):
+        typed = structure.apply_schema(make_data())
+        again = structure.apply_schema(typed)
+        pd.testing.assert_frame_equal(typed, again)
+
+    def test_missing_amounts(self):
+        data = make_data()
+        data.loc[0, HEADER.QUANTITY] = np.nan
+        with pytest.raises(ValueError):
+            structure.apply_schema(data)
+
+    def test_dollars_and_display(self):
+        typed = structure.apply_schema(make_data())
+        assert list(structure.to_dollars(typed[HEADER.QUANTITY])) == list(make_data()[HEADER.QUANTITY])
+        assert list(structure.to_dollars(make_data()[HEADER.QUANTITY])) == list(make_data()[HEADER.QUANTITY])
+        display = structure.to_display(typed)
+        assert list(display[HEADER.QUANTITY]) == list(make_data()[HEADER.QUANTITY])
+        assert typed[HEADER.QUANTITY].dtype == np.int64
+
+    def test_concat_keeps_categories(self):
+        data = structure.apply_schema(make_data())
+        combined = structure.concat_frames([data.iloc[:2], data.iloc[2:]])
+        assert isinstance(combined[HEADER.LOCATION].dtype, pd.CategoricalDtype)
+        assert list(combined[HEADER.LOCATION]) == list(make_data()[HEADER.LOCATION])
@@ -46,4 +46,17 @@ class TestGetValidDateTime:
     def test_no_date(self, monkeypatch):
        monkeypatch.setattr('builtins.input', lambda _:'-')
        output = ui_helper.get_valid_datetime('test six') 
-       assert output == None
\ No newline at end of file
+       assert output == None
+
+class TestScriptedInput:
+    def test_replays_inputs(self, capsys):
+        ui_helper.set_input_source(ui_helper.ScriptedInput(["x", "y"], echo=True))
+        try:
+            assert ui_helper.get_confirmation() == True
+        finally:
+            ui_helper.set_input_source(None)
+        assert capsys.readouterr().out == "(y/n) : x\nInvalid input, try again\n(y/n) : y\n"
+
+    def test_runs_out(self):
+        with pytest.raises(EOFError):
+            ui_helper.ScriptedInput([])("prompt")
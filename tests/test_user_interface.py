@@ -6,31 +6,168 @@
     
 """
 import pytest
+import os
 import sys
 sys.path.insert(0, '../source')
 import user_interface
+import spending_tracker as tracker
+import model_cache
+import rules
+import rollups
+from transaction_structure import HEADER
+from test_ingest import write_export
+from test_classification import make_data as make_statement_data
 import pandas as pd
 
 class TestGetUserFile:
     """
     class that runs the tests for getting a valid user file
     """
-    valid_file = "../data/transactions.csv"
-    invalid_extension = "../data/transactions.csw"
-    non_existant_file = "../data/not_real.csv"
-    def test_valid_file(self, monkeypatch):
-        monkeypatch.setattr('builtins.input', lambda _: self.valid_file)
+    @pytest.fixture
+    def files(self, tmp_path):
+        """a statement to load, and names of files that can't be loaded, all in a temporary directory"""
+        valid_file = str(tmp_path / "transactions.csv")
+        write_export(valid_file)
+        return valid_file, str(tmp_path / "transactions.csw"), str(tmp_path / "not_real.csv")
+
+    def test_valid_file(self, monkeypatch, files):
+        valid_file, _, _ = files
+        monkeypatch.setattr('builtins.input', lambda _: valid_file)
         data, status = user_interface.get_user_file()
         assert type(data) == pd.DataFrame
-    def test_invalid_extension(self, monkeypatch, capsys):
-        inputs = iter([self.invalid_extension, self.valid_file])
+    def test_invalid_extension(self, monkeypatch, capsys, files):
+        valid_file, invalid_extension, _ = files
+        inputs = iter([invalid_extension, valid_file])
         monkeypatch.setattr('builtins.input', lambda _: next(inputs))
         user_interface.get_user_file()
         outputs = capsys.readouterr()
         assert outputs.out == "We don't seem to support that type of file. Please try again\n"
-    def test_non_existant_file(self, monkeypatch, capsys):
-        inputs = iter([self.non_existant_file, self.valid_file])
+    def test_non_existant_file(self, monkeypatch, capsys, files):
+        valid_file, _, non_existant_file = files
+        inputs = iter([non_existant_file, valid_file])
         monkeypatch.setattr('builtins.input', lambda _: next(inputs))
         user_interface.get_user_file()
         outputs = capsys.readouterr()
-        assert outputs.out == "We couldn't find that file, try again\n"
\ No newline at end of file
+        assert outputs.out == "We couldn't find that file, try again\n"
+
+def make_data():
+    return pd.DataFrame({
+        "Type": ["Eftpos", "Salary", "Eftpos", "Payment"],
+        "Date": pd.to_datetime(["2023-01-02", "2023-01-08", "2023-01-09", "2023-01-20"]),
+        "Amount": [-10.0, 100.0, -20.0, -40.0],
+    })
+
+
+class TestNavigation:
+    """
+    class that runs the tests for moving between the menu screens
+    """
+    def test_back_pops_the_stack(self):
+        view = user_interface.data_view.DataView(make_data())
+        stack = [user_interface.OptionsScreen(view)]
+        user_interface.ui_helper.set_input_source(user_interface.ui_helper.ScriptedInput(["6", "0", "q", "q", "q"]))
+        try:
+            assert user_interface.run_screens(stack) == user_interface.UserAction.BACK
+        finally:
+            user_interface.ui_helper.set_input_source(None)
+        assert stack == []
+
+    def test_drill_down_shares_the_data(self, monkeypatch):
+        screens = []
+        show = user_interface.Screen.show
+        monkeypatch.setattr(user_interface.Screen, "show", lambda self: screens.append(self) or show(self))
+        data = make_data()
+        user_interface.replay(["6", "0", "6", "2", "0", "q!"], data)
+        assert [type(screen).__name__ for screen in screens] == \
+            ["OptionsScreen", "SectionScreen", "OptionsScreen", "SectionScreen", "OptionsScreen"]
+        assert all(screen.view.base is data for screen in screens)
+        assert list(screens[-1].view.rows) == [0, 2]
+
+    def test_going_back_releases_the_section(self):
+        view = user_interface.data_view.DataView(make_data())
+        stack = [user_interface.OptionsScreen(view)]
+        screens = []
+        show = user_interface.Screen.show
+        user_interface.ui_helper.set_input_source(user_interface.ui_helper.ScriptedInput(["6", "0", "0", "", "q", "q"]))
+        try:
+            user_interface.Screen.show = lambda self: screens.append(self) or show(self)
+            user_interface.run_screens(stack)
+        except EOFError:
+            pass
+        finally:
+            user_interface.Screen.show = show
+            user_interface.ui_helper.set_input_source(None)
+        spends = screens[2].view
+        assert spends._frame is None
+        assert view.filter(user_interface.data_view.spends_only()) is spends
+
+    def test_long_sessions_dont_recurse(self, capsys):
+        # far more screens than the recursion limit allows
+        user_interface.replay(["6", "0", "q", "q"] * 2000 + ["q!"], make_data())
+        assert "Traceback" not in capsys.readouterr().out
+
+    def test_replay_stops_when_inputs_run_out(self):
+        user_interface.replay(["0"], make_data())
+        assert user_interface.ui_helper._input_source is None
+
+
+class TestCombineFiles:
+    """
+    class that runs the tests for combining the data with another file
+    """
+    def test_new_transactions_are_classified(self, tmp_path, monkeypatch):
+        history_file = str(tmp_path / "history.csv")
+        write_export(history_file)
+        history = tracker.format_data(user_interface.ingest.load_statement(history_file))
+        cache = model_cache.ModelCache(str(tmp_path / "models"))
+        inputs = iter(["n", "2", "-", "Spending", "-", "Income"])
+        monkeypatch.setattr('builtins.input', lambda _="": next(inputs))
+        history = tracker.prompt_for_spending_types(history, cache, rules.RuleSet(str(tmp_path / "first.json")))
+        columns = list(history.columns)
+
+        # the next statement of the same account has the same spending a week later, and overlaps the
+        # last one by a transaction
+        os.makedirs(tmp_path / "next")
+        new_file = str(tmp_path / "next" / "history.csv")
+        new_data = make_statement_data()
+        write_export(new_file, pd.concat([new_data.iloc[-1:], new_data.assign(Date=new_data["Date"] + pd.Timedelta(days=7))]))
+
+        screens = []
+        show = user_interface.Screen.show
+        monkeypatch.setattr(user_interface.Screen, "show", lambda self: screens.append(self) or show(self))
+        monkeypatch.setattr(tracker.model_cache, "ModelCache", lambda: cache)
+        # without the rules learnt from the first statement, so that the saved classification is used
+        second_rules = rules.RuleSet(str(tmp_path / "second.json"))
+        monkeypatch.setattr(tracker.rule_engine, "RuleSet", lambda: second_rules)
+        user_interface.replay(["8", new_file, "n", "q!"], history)
+
+        combined = screens[-1].view.base
+        assert len(combined) == 2 * len(history)
+        assert list(combined["classification"].iloc[len(history):]) == list(history["classification"])
+        assert rollups.get_cube(combined).rows == len(combined)
+        assert list(history.columns) == columns
+
+    def test_cancelled_transfers_keep_the_rollups_and_balances(self, tmp_path):
+        cheque = pd.DataFrame({
+            HEADER.ACCOUNT: "cheque",
+            HEADER.SPEND_TYPE: ["Eftpos", "Transfer", "Eftpos"],
+            HEADER.DATE: pd.to_datetime(["2023-01-02", "2023-01-05", "2023-01-09"]),
+            HEADER.QUANTITY: [-10.0, -50.0, -20.0],
+        })
+        savings = pd.DataFrame({
+            HEADER.ACCOUNT: "savings",
+            HEADER.SPEND_TYPE: ["Transfer", "Interest"],
+            HEADER.DATE: pd.to_datetime(["2023-01-05", "2023-01-31"]),
+            HEADER.QUANTITY: [50.0, 1.0],
+        })
+        rollups.get_cube(cheque)
+        combined = tracker.combine_data(cheque, savings)
+        assert list(combined[HEADER.QUANTITY]) == [-10.0, -20.0, 1.0]
+        cube = rollups._cubes[id(combined)][1]
+        assert rollups.get_cube(combined) is cube
+        for key, table in rollups.RollupCube(combined).tables.items():
+            pd.testing.assert_frame_equal(cube.tables[key], table)
+        # the transfer still moved money between the accounts
+        index = tracker.account_metadata.get_balance_index(combined, tracker.account_metadata.AccountRegistry(str(tmp_path / "accounts.json")))
+        assert index.balance_on("2023-01-31", "savings") == 51.0
+        assert index.balance_on("2023-01-31", "cheque") == -80.0